@@ -10,111 +10,127 @@ bl_info = {
 
 import bpy
 import bmesh
-import math
+import hashlib
 import json
-from bpy.props import FloatProperty, BoolProperty, PointerProperty, StringProperty
+import os
+import time
+import numpy as np
+from bpy.app.handlers import persistent
+from bpy.props import FloatProperty, BoolProperty, IntProperty, EnumProperty, PointerProperty, StringProperty
 from bpy.types import PropertyGroup, Panel, Operator
 from bpy_extras.io_utils import ExportHelper, ImportHelper
 
-# === Geometría base (no tocar) ===
-PATRON_DATA_ORIGINAL = [
-    (-89.4295674999999, 108.368099999),  # 0 sup izq
-    # Curva superior izquierda (manga)
-    (-89.4295674999999, 46.210293973832),  # 1 inicio manga
-    (-85.4717625, 45.924545373832),
-    (-79.56484300000002, 45.106066473832),
-    (-70.62415600000001, 43.590944473832),
-    (-60.612256, 41.706009473832),
-    (-50.739038, 39.683699973832),
-    (-45.912316, 38.499673973832),
-    (-45.912316, 38.40),  # 8 (sisa)
-    (-50.739038, 39.60),
-    (-60.612256, 41.60),
-    (-70.62415600000001, 43.50),
-    (-79.56484300000002, 45.00),
-    (-85.4717625, 45.80),
-    (-89.4295674999999, 46.10),   # 14 (costura espalda)
-    (-89.4295674999999, 0.0),     # 15 inf izq
-    (0.0, 0.0),                    # 16 inf der (ORIGEN deseado)
-    # Curva interna derecha (cuello)
-    (0.0, 48.81875597), # 17
-    (-1.61574627, 48.94363393),
-    (-3.22292108, 49.25368203),
-    (-5.19177542, 50.00156821),
-    (-7.36759500, 51.29351360),
-    (-9.19916964, 52.97313001),
-    (-10.69661122, 54.96572999),
-    (-11.87160416, 57.19749147),
-    (-12.73489788, 59.59486630),
-    (-13.30018230, 62.08450426),
-    (-13.57806829, 64.59372045),
-    (-13.52570075, 67.38230419),
-    (-13.04997109, 70.42167816),
-    (-12.40017228, 72.64027494),
-    (-12.32340131, 72.65777902),  # 31 base cuello
-    (-12.97174391, 70.44492978),
-    (-13.44602725, 67.41508375),
-    (-13.49814071, 64.63712349),
-    (-13.22129670, 62.13781068),
-    (-12.65811112, 59.65731164),
-    (-11.79838684, 57.26972847),
-    (-10.62900278, 55.04849795),
-    (-9.13989736, 53.06685893),
-    (-7.31994600, 51.39777534),
-    (-5.15645058, 50.11334673),
-    (-3.20022792, 49.37039591),
-    (-1.60529273, 49.06294801),
-    (0.0, 48.94875597), # 44
-    (0.0, 108.368099999),  # 45 sup der
-]
-
-CURVE_UPPER_LEFT_INDICES = list(range(1, 15))   # Manga
-CURVE_INTERNAL_RIGHT_INDICES = list(range(17, 45))  # Cuello
-
-def get_bounds(data):
-    xs = [p[0] for p in data]; ys = [p[1] for p in data]
-    return {'width': max(xs) - min(xs), 'height': max(ys) - min(ys)}
-
-ORIGINAL_BOUNDS = get_bounds(PATRON_DATA_ORIGINAL)
-
-def redistribute_curve_vertices(curve_points, equidistant=True):
-    if not equidistant or len(curve_points) < 3:
-        return curve_points
-    dists = [0.0]
-    for i in range(1, len(curve_points)):
-        x0, y0 = curve_points[i-1]; x1, y1 = curve_points[i]
-        dists.append(dists[-1] + math.hypot(x1-x0, y1-y0))
-    total = dists[-1]
-    if total == 0.0:
-        return curve_points
-    seg = total / (len(curve_points)-1)
-    out = [curve_points[0]]
-    j = 1
-    for k in range(1, len(curve_points)-1):
-        target = k * seg
-        while j < len(curve_points) and dists[j] < target:
-            j += 1
-        j = min(j, len(curve_points)-1)
-        x0,y0 = curve_points[j-1]; x1,y1 = curve_points[j]
-        t = 0.0 if dists[j] == dists[j-1] else (target - dists[j-1])/(dists[j]-dists[j-1])
-        out.append((x0 + t*(x1-x0), y0 + t*(y1-y0)))
-    out.append(curve_points[-1])
-    return out
+# Núcleo geométrico sin bpy (patronaje_core.py junto a este archivo)
+from patronaje_core import (
+    PATRON_SETTINGS_KEYS, solve_pattern, pattern_measurements, solve_traced, SOLVER_CACHE, _settings_key,
+    as_params, params_to_dict, DEFAULT_TEMPLATE, TemplateError, load_template,
+)
+from patronaje_curves import densify_outline_indexed
+from patronaje_panel import centre_indices, crossing_indices, mirror_panel, panel_pair
+from patronaje_waste import waste_metrics
+from patronaje_feasibility import FeasibilityTable, build_feasibility_table, CLAMP_LABELS
+from patronaje_profiles import ProfileStore
+from patronaje_changelog import ChangeLog, read_changes, replay
 
 # ========= Auto Update =========
 def _active_mesh(context):
     obj = context.active_object
     return obj if (obj and obj.type == 'MESH') else None
 
+# Planificador con timer: las actualizaciones se agrupan y se aplican sólo
+# con el último estado, a una frecuencia máxima (auto_update_hz).
+_AUTO_UPDATE_STATE = {'pending': False, 'force': False, 'last_run': 0.0,
+                      'last_applied': None, 'applied': 0, 'skipped': 0}
+
+def _schedule_patron_update(force=False):
+    """Marca el patrón como pendiente; el timer aplica el último estado."""
+    _AUTO_UPDATE_STATE['pending'] = True
+    _AUTO_UPDATE_STATE['force'] = _AUTO_UPDATE_STATE['force'] or force
+    if not bpy.app.timers.is_registered(_auto_update_tick):
+        bpy.app.timers.register(_auto_update_tick, first_interval=0.0)
+
+def _auto_update_tick():
+    state = _AUTO_UPDATE_STATE
+    if not state['pending']:
+        return None
+    p = getattr(bpy.context.scene, "patron_props", None)
+    if p is None:
+        state['pending'] = state['force'] = False
+        return None
+    interval = 1.0 / max(p.auto_update_hz, 1.0)
+    remaining = state['last_run'] + interval - time.perf_counter()
+    if remaining > 0.0:
+        return remaining
+    force = state['force']
+    state['pending'] = state['force'] = False
+    state['last_run'] = time.perf_counter()
+    if not (p.auto_update or force):
+        return None
+    obj = bpy.context.view_layer.objects.active
+    if obj and obj.type == 'MESH':
+        try:
+            _apply_pattern_to_object(obj, p, skip_unchanged=True)
+        except Exception:
+            pass
+    return None
+
 def _maybe_auto_update(self, context):
+    _record_changes(self)
+    p = getattr(context.scene, "patron_props", None)
+    if p and p.auto_update:
+        _schedule_patron_update()
+
+# ========= Registro de cambios =========
+# Con el registro activo, cada actualización de una propiedad anexa al
+# .jsonl los cambios respecto del último estado conocido ('last').
+_CHANGELOG_STATE = {'log': None, 'last': None, 'paused': False}
+
+def _record_changes(p):
+    state = _CHANGELOG_STATE
+    if state['log'] is None or state['paused']:
+        return
+    current = params_to_dict(p)
     try:
-        p = getattr(context.scene, "patron_props", None)
-        if not p or not p.auto_update:
-            return
-        if _active_mesh(context):
-            bpy.ops.mesh.update_patron()
-    except Exception:
-        pass
+        state['log'].record_diff(state['last'], current)
+    except OSError:
+        # Disco lleno o archivo borrado: se apaga el registro (cierra el archivo)
+        # en vez de fallar en cada cambio de propiedad
+        _close_changelog()
+        p.registrar_cambios = False
+        return
+    state['last'] = current
+
+def _close_changelog():
+    if _CHANGELOG_STATE['log'] is not None:
+        try:
+            _CHANGELOG_STATE['log'].close()
+        except OSError:
+            # El vaciado final puede fallar por lo mismo que la escritura
+            pass
+    _CHANGELOG_STATE['log'] = _CHANGELOG_STATE['last'] = None
+
+def _open_changelog(p):
+    try:
+        _CHANGELOG_STATE['log'] = ChangeLog(bpy.path.abspath(p.registro_cambios),
+                                            session=bpy.path.basename(bpy.data.filepath) or None)
+    except OSError:
+        # Ruta no escribible: el registro queda apagado
+        p.registrar_cambios = False
+        return
+    _CHANGELOG_STATE['last'] = params_to_dict(p)
+
+def _toggle_changelog(self, context):
+    _close_changelog()
+    if self.registrar_cambios:
+        _open_changelog(self)
+
+@persistent
+def _changelog_load_post(_dummy):
+    # El interruptor se guarda en el .blend, el registro abierto no
+    _close_changelog()
+    p = getattr(bpy.context.scene, "patron_props", None)
+    if p is not None and p.registrar_cambios:
+        _open_changelog(p)
 
 # ========= Propiedades =========
 class PatronShapeProperties(PropertyGroup):
@@ -162,7 +178,32 @@ class PatronShapeProperties(PropertyGroup):
 
     # Vista y preview
     vista_frontal_xz: BoolProperty(name="Generar en vista frontal (XZ)", default=True, update=_maybe_auto_update)
+    panel_modo: EnumProperty(name="Pieza", description="Media pieza, panel completo espejado o par delantero y espalda",
+                             items=[('MITAD', "Media pieza", "Media pieza anclada en el vértice 16"),
+                                    ('COMPLETO', "Panel completo", "Mitad y mitad espejada, soldadas en la línea central"),
+                                    ('PAR', "Delantero y espalda", "Dos paneles completos lado a lado")],
+                             default='MITAD', update=_maybe_auto_update)
+    panel_separacion_cm: FloatProperty(name="Separación (cm)", description="Distancia entre delantero y espalda", default=5.0, min=0.0, max=500.0, precision=1, update=_maybe_auto_update)
     auto_update: BoolProperty(name="Vista Previa en Tiempo Real", default=True)
+    auto_update_hz: FloatProperty(name="Frecuencia máxima (Hz)", description="Máximo de actualizaciones por segundo de la vista previa", default=30.0, min=1.0, max=120.0, precision=0)
+
+    # Resolución de curvas (spline; no cambia las medidas del patrón)
+    curvas_alta_resolucion: BoolProperty(name="Curvas en alta resolución", description="Reemplaza manga y cuello por muestras de una spline suave", default=False, update=_maybe_auto_update)
+    manga_puntos: IntProperty(name="Vértices manga", default=100, min=3, max=2000, update=_maybe_auto_update)
+    cuello_puntos: IntProperty(name="Vértices cuello", default=200, min=3, max=4000, update=_maybe_auto_update)
+    curvas_adaptividad: FloatProperty(name="Adaptividad por curvatura", description="0 = espaciado uniforme; valores mayores concentran vértices en las zonas más curvas", default=1.0, min=0.0, max=10.0, precision=2, update=_maybe_auto_update)
+
+    # Plantilla base (.json; vacío = remera incluida)
+    plantilla: StringProperty(name="Plantilla", description="Plantilla base (.json con puntos, hitos y curvas). Vacío = remera incluida", default="", subtype='FILE_PATH', update=_maybe_auto_update)
+
+    # Registro de cambios (.jsonl; no forma parte de las medidas guardadas)
+    registrar_cambios: BoolProperty(name="Registrar cambios", description="Anexar cada cambio de medidas al registro", default=False, update=_toggle_changelog)
+    registro_cambios: StringProperty(name="Registro", description="Archivo .jsonl de cambios", default="//patronaje_cambios.jsonl", subtype='FILE_PATH')
+
+    # Biblioteca de perfiles (SQLite; no forma parte de las medidas guardadas)
+    perfiles_db: StringProperty(name="Biblioteca", description="Base SQLite de perfiles de medidas", default="//perfiles_patronaje.sqlite", subtype='FILE_PATH')
+    perfil_id: IntProperty(name="Id", description="Id del perfil en la biblioteca", default=1, min=1)
+    perfil_nombre: StringProperty(name="Nombre", description="Nombre del perfil a guardar", default="")
 
     # === Entradas manuales (Manga)
     man_enable_v8_left:   BoolProperty(name="Ingresar manualmente", default=False, update=_maybe_auto_update)
@@ -190,400 +231,6 @@ class PatronShapeProperties(PropertyGroup):
     man_enable_len_17:     BoolProperty(name="Ingresar manualmente", default=False, update=_maybe_auto_update)
     man_len_17_cm:         FloatProperty(name="", default=20.0, min=0.0, max=2000.0, precision=1, update=_maybe_auto_update)
 
-# === Lista de propiedades a guardar/cargar ===
-PATRON_SETTINGS_KEYS = [
-    # Dimensiones
-    "pattern_width", "pattern_height", "mantener_proporcion",
-    # Manga
-    "usar_mitad_auto", "curve_upper_depth_cm",
-    "manga_usar_escala_x", "manga_limitar_x_a_mitad",
-    "curve_upper_scale_x", "curve_upper_scale_y",
-    "curve_upper_position_y", "manga_equidistante",
-    "lock_manga_lengths",
-    # Cuello
-    "cuello_seguir_patron", "cuello_scale_x", "cuello_scale_y",
-    "cuello_profundidad_cm", "curve_internal_position_y",
-    "cuello_equidistante", "cuello_limitar_altura", "lock_neck_lengths",
-    # Posición objeto
-    "pattern_position_x", "pattern_position_y", "pattern_position_z",
-    "vista_frontal_xz",
-    # Entradas manuales Manga
-    "man_enable_v8_left", "man_v8_left_cm",
-    "man_enable_v8_bottom", "man_v8_bottom_cm",
-    "man_enable_v14_bottom", "man_v14_bottom_cm",
-    "man_enable_sisa_sisa", "man_sisa_sisa_cm",
-    # Entradas manuales Cuello
-    "man_enable_base", "man_base_cm",
-    "man_enable_base_total", "man_base_total_cm",
-    "man_enable_len_base", "man_len_base_cm",
-    "man_enable_len_17", "man_len_17_cm",
-]
-
-# ===== Helpers de anclaje/orientación/medición =====
-def _apply_orientation_and_anchor(coords_xy_m, anchor_index=16, frontal=False):
-    ax, ay = coords_xy_m[anchor_index]
-    out = []
-    for (x, y) in coords_xy_m:
-        lx = x - ax
-        ly = y - ay
-        out.append((lx, 0.0, ly) if frontal else (lx, ly, 0.0))
-    return out
-
-def _measure_cm(props, coords, vidx, lateral_edge='LEFT', decimals=1):
-    """coords: ya ANCLADAS en el plano final (XY o XZ).
-    Devuelve (distancia_lateral_cm, distancia_desde_borde_inferior_cm)
-    usando como 'borde inferior' el mínimo V real de toda la pieza.
-    """
-    unit_cm_per_m = 100.0
-
-    # Coordenadas del punto a medir y borde inferior real
-    if props.vista_frontal_xz:
-        x = coords[vidx][0]
-        v = coords[vidx][2]  # Z como vertical en vista frontal
-        bottom_v = min(c[2] for c in coords)  # borde inferior real
-    else:
-        x = coords[vidx][0]
-        v = coords[vidx][1]  # Y como vertical en vista superior
-        bottom_v = min(c[1] for c in coords)  # borde inferior real
-
-    # Bordes laterales de la tela (anclado en 16)
-    right_x = 0.0
-    left_x  = -(props.pattern_width * 0.01)
-
-    # Distancia vertical desde el borde inferior real
-    dist_bottom_cm = max(0.0, (v - bottom_v) * unit_cm_per_m)
-
-    # Distancia lateral hacia el borde solicitado
-    if lateral_edge == 'RIGHT':
-        dist_lat_cm = max(0.0, (right_x - x) * unit_cm_per_m)
-    else:
-        dist_lat_cm = max(0.0, (x - left_x) * unit_cm_per_m)
-
-    # Redondeo
-    f = 10**decimals
-    fmt = lambda val: math.floor(val*f + 0.5)/f
-    return fmt(dist_lat_cm), fmt(dist_bottom_cm)
-
-# ===== Núcleo de transformación =====
-def transform_pattern_coordinates(props):
-    unit = 0.01  # cm -> m
-    MIN_GAP_CM = 0.5   # gap mínimo para evitar encimado (0.5 cm)
-    MIN_GAP_M  = MIN_GAP_CM * unit
-
-    # 1) Escala global del patrón
-    sx_w = (props.pattern_width * unit) / (ORIGINAL_BOUNDS['width'] * 0.05)
-    sy_h = (props.pattern_height * unit) / (ORIGINAL_BOUNDS['height'] * 0.05)
-    sx = sx_w
-    sy = sx_w if props.mantener_proporcion else sy_h
-
-    # 2) Base escalada (XY en metros, sin anclar)
-    base = [(x * 0.05 * sx, y * 0.05 * sy) for (x, y) in PATRON_DATA_ORIGINAL]
-
-    # BORDES REALES DE LA TELA (EXCLUYENDO CURVA MANGA)
-    # Top = vértices superiores 0 y 45
-    top_fabric_y = max(base[0][1], base[45][1])
-    # Bottom = vértices inferiores 15 y 16
-    bottom_fabric_y = min(base[15][1], base[16][1])
-
-    # 3) Equidistancias opcionales
-    if props.manga_equidistante:
-        pts = [base[i] for i in CURVE_UPPER_LEFT_INDICES]
-        red = redistribute_curve_vertices(pts, True)
-        for k, idx in enumerate(CURVE_UPPER_LEFT_INDICES):
-            base[idx] = red[k]
-    if props.cuello_equidistante:
-        pts = [base[i] for i in CURVE_INTERNAL_RIGHT_INDICES]
-        red = redistribute_curve_vertices(pts, True)
-        for k, idx in enumerate(CURVE_INTERNAL_RIGHT_INDICES):
-            base[idx] = red[k]
-
-    # Vértices de referencia
-    ax, ay = base[16]
-    cx, cy = base[1]
-    x8, y8 = base[8]
-    y14 = base[14][1]
-    neck_cx, neck_cy = base[17]
-
-    # === Factores baseline (MANGA) ===
-    max_x_off = max(abs(base[i][0] - cx) for i in CURVE_UPPER_LEFT_INDICES) or 1e-9
-    target_depth_cm = (props.pattern_width / 2.0) if props.usar_mitad_auto else min(props.curve_upper_depth_cm, props.pattern_width/2.0)
-    x_factor_from_depth = (target_depth_cm * unit) / max_x_off
-    if props.manga_usar_escala_x:
-        manga_factor_x = props.curve_upper_scale_x
-        if props.manga_limitar_x_a_mitad:
-            cap_m = (props.pattern_width / 2.0) * unit
-            manga_factor_x = min(manga_factor_x, cap_m / max_x_off)
-    else:
-        manga_factor_x = x_factor_from_depth
-    cap_m = (props.pattern_width / 2.0) * unit
-    cur_max_y = max(abs(base[i][1] - cy) for i in CURVE_UPPER_LEFT_INDICES) or 1e-9
-    manga_factor_y = min(props.curve_upper_scale_y, cap_m / cur_max_y)
-
-    # === Overrides manuales (MANGA, ancho) ===
-    left_x  = -(props.pattern_width * unit)
-    if props.man_enable_sisa_sisa and props.man_sisa_sisa_cm > 0.0:
-        target_half_m = (props.man_sisa_sisa_cm * unit) / 2.0
-        target_x_anchor = -target_half_m
-        denom = (x8 - cx) or 1e-9
-        manga_factor_x = (target_x_anchor + ax - cx) / denom
-    elif props.man_enable_v8_left and props.man_v8_left_cm >= 0.0:
-        target_left_m = props.man_v8_left_cm * unit
-        target_x_anchor = left_x + target_left_m
-        denom = (x8 - cx) or 1e-9
-        manga_factor_x = (target_x_anchor + ax - cx) / denom
-
-    if props.manga_limitar_x_a_mitad:
-        manga_factor_x = min(manga_factor_x, (props.pattern_width * unit / 2.0) / max_x_off)
-
-    # === MANGA: independencia vertical v8/v14 con preservación de GAP ===
-    y8_no_off  = cy + (y8  - cy) * manga_factor_y
-    y14_no_off = cy + (y14 - cy) * manga_factor_y
-
-    # Usamos SIEMPRE el borde de la tela como referencia para largos verticales
-    bottom_edge_for_manga = bottom_fabric_y
-
-    s_my = 1.0
-    off_my = 0.01 * props.curve_upper_position_y
-
-    L8_enabled  = props.man_enable_v8_bottom
-    L14_enabled = props.man_enable_v14_bottom
-    L8_m  = props.man_v8_bottom_cm  * unit
-    L14_m = props.man_v14_bottom_cm * unit
-
-    if L8_enabled and L14_enabled and not props.lock_manga_lengths:
-        denom = (y8_no_off - y14_no_off)
-        if abs(denom) > 1e-9:
-            s_my = (L8_m - L14_m) / denom
-        else:
-            s_my = 1.0
-        off_my = (bottom_edge_for_manga + L14_m) - (cy + s_my * (y14_no_off - cy))
-    else:
-        s_my = 1.0
-        if L8_enabled:
-            off_my = (bottom_edge_for_manga + L8_m) - y8_no_off
-        elif L14_enabled:
-            off_my = (bottom_edge_for_manga + L14_m) - y14_no_off
-        else:
-            off_my = max(-0.20, min(0.20, off_my))
-
-    # >>> Preservar GAP manga (evitar encimado de v8 y v14)
-    gap_base_m = abs(y8_no_off - y14_no_off)
-    if gap_base_m < 1e-9:
-        gap_base_m = 1e-9
-    s_min_gap = MIN_GAP_M / gap_base_m
-    if s_my < s_min_gap:
-        s_my = s_min_gap
-        if L8_enabled and L14_enabled and not props.lock_manga_lengths:
-            off_my = (bottom_edge_for_manga + L14_m) - (cy + s_my * (y14_no_off - cy))
-        elif L8_enabled:
-            off_my = (bottom_edge_for_manga + L8_m) - (cy + s_my * (y8_no_off - cy))
-        elif L14_enabled:
-            off_my = (bottom_edge_for_manga + L14_m) - (cy + s_my * (y14_no_off - cy))
-
-    # >>> Límites 2 cm para la MANGA (#1, sisa #8 y costura espalda #14)
-    y1_orig   = base[1][1]
-    y1_no_off = cy + (y1_orig - cy) * manga_factor_y
-
-    margin_top    = 0.02  # 2 cm
-    margin_bottom = 0.02  # 2 cm
-
-    # Restrición superior: ninguno de los 3 puede superar top_fabric_y - 2cm
-    off_max1 = top_fabric_y - margin_top - (cy + s_my * (y1_no_off  - cy))
-    off_max2 = top_fabric_y - margin_top - (cy + s_my * (y8_no_off  - cy))
-    off_max3 = top_fabric_y - margin_top - (cy + s_my * (y14_no_off - cy))
-    allowed_off_max = min(off_max1, off_max2, off_max3)
-
-    # Restricción inferior: sisa y costura de espalda no pueden bajar de bottom_fabric_y + 2cm
-    off_min_8  = bottom_fabric_y + margin_bottom - (cy + s_my * (y8_no_off  - cy))
-    off_min_14 = bottom_fabric_y + margin_bottom - (cy + s_my * (y14_no_off - cy))
-    allowed_off_min = max(off_min_8, off_min_14)
-
-    # Clampear off_my dentro del rango permitido
-    if allowed_off_min > allowed_off_max:
-        # Si las restricciones se cruzan, priorizamos que no se salgan por arriba
-        off_my = min(off_my, allowed_off_max)
-    else:
-        if off_my > allowed_off_max:
-            off_my = allowed_off_max
-        if off_my < allowed_off_min:
-            off_my = allowed_off_min
-
-    # === Factores baseline (CUELLO) con CAP absoluto mitad de ancho ===
-    if props.cuello_seguir_patron:
-        def neck_dxdy(idx):
-            bx, by = base[idx]; return (bx - neck_cx, by - neck_cy)
-    else:
-        def neck_dxdy(idx):
-            bx, by = base[idx]; return ((bx - neck_cx)/sx, (by - neck_cy)/sy)
-
-    neck_base_max_x = max(abs(neck_dxdy(i)[0]) for i in CURVE_INTERNAL_RIGHT_INDICES) or 1e-9
-    half_width_m = (props.pattern_width * unit) / 2.0
-    depth_cm_cap = min(props.cuello_profundidad_cm, props.pattern_width / 2.0)
-    depth_mult = (depth_cm_cap * unit / neck_base_max_x) if depth_cm_cap > 0.0 else 1.0
-
-    neck_mult_x_total = props.cuello_scale_x * depth_mult
-    max_sx_half = half_width_m / neck_base_max_x
-    neck_mult_x_total = min(neck_mult_x_total, max_sx_half)
-
-    neck_mult_y_total = props.cuello_scale_y
-    ys_all_tmp = [y for (_, y) in base]
-    top_edge_y_tmp = max(ys_all_tmp); bottom_edge_y_tmp = min(ys_all_tmp)
-    margin = 0.02
-    allowed_gap = (top_edge_y_tmp - margin) - (bottom_edge_y_tmp + margin)
-    dy_vals = [neck_dxdy(i)[1] for i in CURVE_INTERNAL_RIGHT_INDICES]
-    base_h = max(1e-9, max(dy_vals) - min(dy_vals))
-    max_sy = max(0.0, allowed_gap / base_h)
-    neck_mult_y_total = min(neck_mult_y_total, max_sy)
-
-    # === Overrides manuales (CUELLO, base en X) + CAP mitad de ancho ===
-    dx31, _ = neck_dxdy(31)
-    if props.man_enable_base_total and props.man_base_total_cm > 0.0:
-        target_half_m = (props.man_base_total_cm * unit) / 2.0
-        target_x_anchor = -target_half_m
-        denom = dx31 or 1e-9
-        neck_mult_x_total = (target_x_anchor + ax - neck_cx) / denom
-    elif props.man_enable_base and props.man_base_cm >= 0.0:
-        target_m = props.man_base_cm * unit
-        target_x_anchor = -target_m
-        denom = dx31 or 1e-9
-        neck_mult_x_total = (target_x_anchor + ax - neck_cx) / denom
-    neck_mult_x_total = min(neck_mult_x_total, max_sx_half)
-
-    # === Regla frontera sisa para X (si y(17) < y(8)) ===
-    y8_actual_manga = cy + s_my * (y8_no_off - cy) + off_my
-    y17_no_off_y = neck_cy + neck_dxdy(17)[1] * neck_mult_y_total
-    if y17_no_off_y < y8_actual_manga:
-        x8_actual = cx + (x8 - cx) * manga_factor_x
-        if abs(dx31) > 1e-9:
-            sx_frontera = (x8_actual - 0.02 - neck_cx) / dx31
-            if neck_mult_x_total > 1.0 and dx31 > 0.0:
-                neck_mult_x_total = min(neck_mult_x_total, sx_frontera)
-    neck_mult_x_total = min(neck_mult_x_total, max_sx_half)
-
-    # === Aplicar transformaciones base (sin offset de cuello) ===
-    out_xy = []
-    neck_points_no_off = {}
-    for i, (x, y) in enumerate(base):
-        nx, ny = x, y
-        if i in CURVE_UPPER_LEFT_INDICES:
-            nx = cx + (x - cx) * manga_factor_x
-            y_scaled = cy + (y - cy) * manga_factor_y
-            ny = cy + s_my * (y_scaled - cy) + off_my
-        elif i in CURVE_INTERNAL_RIGHT_INDICES:
-            dx, dy = neck_dxdy(i)
-            nx = neck_cx + dx * neck_mult_x_total
-            ny = neck_cy + dy * neck_mult_y_total
-            neck_points_no_off[i] = (nx, ny)
-        out_xy.append((nx, ny))
-
-    # === Offset/escala vertical del cuello con independencia 31/17 + PRESERVACIÓN DE GAP ===
-    if neck_points_no_off:
-        bottom_edge_y_before = min(y for (_, y) in out_xy)
-
-        y31_no_off = neck_points_no_off[31][1]
-        y17_no_off = neck_points_no_off[17][1]
-
-        L31_enabled = props.man_enable_len_base
-        L17_enabled = props.man_enable_len_17
-        L31_m = props.man_len_base_cm * unit
-        L17_m = props.man_len_17_cm * unit
-
-        s_extra = 1.0
-        desired_off_m = props.curve_internal_position_y * unit
-
-        if L31_enabled and L17_enabled and not props.lock_neck_lengths:
-            denom = (y31_no_off - y17_no_off)
-            if abs(denom) > 1e-9:
-                s_extra = (L31_m - L17_m) / denom
-            else:
-                s_extra = 1.0
-            desired_off_m = (bottom_edge_y_before + L17_m) - (neck_cy + s_extra * (y17_no_off - neck_cy))
-
-            ys_all2 = [y for (_, y) in out_xy]
-            top_edge_y = max(ys_all2); bottom_edge_y = min(ys_all2)
-            margin = 0.02
-            neck_y_vals = [p[1] for p in neck_points_no_off.values()]
-            dy_cur_max = max(neck_y_vals) - neck_cy
-            dy_cur_min = min(neck_y_vals) - neck_cy
-            s_top = (top_edge_y - margin - (neck_cy + desired_off_m)) / (dy_cur_max if dy_cur_max != 0 else 1e-9)
-            s_bottom = (bottom_edge_y + margin - (neck_cy + desired_off_m)) / (dy_cur_min if dy_cur_min != 0 else -1e-9)
-            s_allowed = min(s_top if s_top > 0 else 1e9, s_bottom if s_bottom > 0 else 1e9)
-            s_extra = max(0.0, min(s_extra, s_allowed))
-
-            allowed_max_31 = out_xy[0][1] - 0.02
-            y31_after = neck_cy + s_extra * (y31_no_off - neck_cy) + desired_off_m
-            if y31_after > allowed_max_31:
-                desired_off_m = allowed_max_31 - (neck_cy + s_extra * (y31_no_off - neck_cy))
-
-            for i in CURVE_INTERNAL_RIGHT_INDICES:
-                nx, ny = out_xy[i]
-                ny = neck_cy + s_extra * (ny - neck_cy) + desired_off_m
-                out_xy[i] = (nx, ny)
-
-        else:
-            if L31_enabled and not L17_enabled:
-                target_y31 = bottom_edge_y_before + L31_m
-                delta = target_y31 - y31_no_off
-            elif L17_enabled and not L31_enabled:
-                target_y17 = bottom_edge_y_before + L17_m
-                delta = target_y17 - y17_no_off
-            elif props.lock_neck_lengths and (L31_enabled or L17_enabled):
-                if L31_enabled and L17_enabled:
-                    target_y17 = bottom_edge_y_before + L17_m
-                    delta = target_y17 - y17_no_off
-                elif L31_enabled:
-                    target_y31 = bottom_edge_y_before + L31_m
-                    delta = target_y31 - y31_no_off
-                else:
-                    target_y17 = bottom_edge_y_before + L17_m
-                    delta = target_y17 - y17_no_off
-            else:
-                delta = max(-0.15, min(0.15, props.curve_internal_position_y * unit))
-
-            ys_all2 = [y for (_, y) in out_xy]
-            top_edge_y = max(ys_all2); bottom_edge_y = min(ys_all2)
-            margin = 0.02
-
-            neck_y_vals = [p[1] for p in neck_points_no_off.values()]
-            y_min_no_off = min(neck_y_vals)
-            y_max_no_off = max(neck_y_vals)
-
-            delta_max_up   = (top_edge_y - margin)    - y_max_no_off
-            delta_max_down = (bottom_edge_y + margin) - y_min_no_off
-            delta = max(delta_max_down, min(delta, delta_max_up))
-
-            allowed_max_31 = out_xy[0][1] - 0.02
-            if y31_no_off + delta > allowed_max_31:
-                delta = allowed_max_31 - y31_no_off
-
-            for i in CURVE_INTERNAL_RIGHT_INDICES:
-                nx, ny = out_xy[i]
-                ny = ny + delta
-                out_xy[i] = (nx, ny)
-
-    # Contención vertical absoluta con margen 2 cm para el cuello
-    ys_all = [y for (_, y) in out_xy]
-    top_edge_y = max(ys_all)
-    bottom_edge_y = min(ys_all)
-    margin = 0.02
-    allowed_max = top_edge_y - margin
-    allowed_min = bottom_edge_y + margin
-    neck_max = max(out_xy[i][1] for i in CURVE_INTERNAL_RIGHT_INDICES)
-    neck_min = min(out_xy[i][1] for i in CURVE_INTERNAL_RIGHT_INDICES)
-    corr = 0.0
-    if neck_max > allowed_max:
-        corr = allowed_max - neck_max
-    elif neck_min < allowed_min:
-        corr = allowed_min - neck_min
-    if corr != 0.0:
-        for i in CURVE_INTERNAL_RIGHT_INDICES:
-            nx, ny = out_xy[i]
-            out_xy[i] = (nx, ny + corr)
-
-    # 5) Anclar y orientar
-    out_xyz = _apply_orientation_and_anchor(out_xy, anchor_index=16, frontal=props.vista_frontal_xz)
-    return out_xyz
-
 # ===== Construcción de malla y operadores =====
 def _build_mesh_from_coords(coords_xyz):
     mesh = bpy.data.meshes.new('Patron_Profesional')
@@ -600,25 +247,287 @@ def _build_mesh_from_coords(coords_xyz):
     bm.normal_update(); bm.to_mesh(mesh); bm.free()
     return mesh
 
+def _build_mesh_from_edges(coords_xyz, edges):
+    """Malla con las aristas dadas; los vértices compartidos ya vienen soldados (sin remove_doubles)."""
+    mesh = bpy.data.meshes.new('Patron_Profesional')
+    mesh.vertices.add(len(coords_xyz))
+    mesh.edges.add(len(edges))
+    mesh.vertices.foreach_set("co", np.asarray(coords_xyz, dtype=np.float32).ravel())
+    mesh.edges.foreach_set("vertices", np.asarray(edges, dtype=np.int32).ravel())
+    mesh.update()
+    return mesh
+
+def _build_mesh(coords_xyz, edges=None):
+    """edges None: anillo cerrado (media pieza)."""
+    if edges is None:
+        return _build_mesh_from_coords(coords_xyz)
+    return _build_mesh_from_edges(coords_xyz, edges)
+
+# Contador de la actualización in situ (mallas huérfanas evitadas)
+_MESH_UPDATE_STATS = {'in_place': 0, 'rebuilt': 0, 'orphans_avoided': 0}
+
+def _ring_edges(n):
+    idx = np.arange(n, dtype=np.int32)
+    return np.stack([idx, (idx + 1) % n], axis=1).ravel()
+
+def _coords_have_doubles(coords_xyz, dist=0.0001):
+    """True si remove_doubles fusionaría vértices (cambiaría la topología).
+    Barrido ordenado por X: sólo compara pares a menos de `dist` en X.
+    """
+    co = np.asarray(coords_xyz, dtype=np.float64)
+    co = co[np.argsort(co[:, 0], kind="stable")]
+    for k in range(1, len(co)):
+        close = (co[k:, 0] - co[:-k, 0]) <= dist
+        if not close.any():
+            return False
+        d2 = ((co[k:] - co[:-k]) ** 2).sum(axis=1)
+        if (close & (d2 <= dist * dist)).any():
+            return True
+    return False
+
+def _update_mesh_in_place(mesh, coords_xyz, edges=None):
+    """Escribe las coordenadas sobre la malla existente con foreach_set.
+    Devuelve False si la topología no es la esperada (hay que reconstruir):
+    el anillo cerrado, o las aristas dadas si edges no es None.
+    """
+    n = len(coords_xyz)
+    expected = _ring_edges(n) if edges is None else np.asarray(edges, dtype=np.int32).ravel()
+    if (mesh.users > 1 or mesh.is_editmode or len(mesh.polygons)
+            or len(mesh.vertices) != n or 2 * len(mesh.edges) != len(expected)):
+        return False
+    current = np.empty(len(expected), dtype=np.int32)
+    mesh.edges.foreach_get("vertices", current)
+    if not np.array_equal(current, expected):
+        return False
+    if edges is None and _coords_have_doubles(coords_xyz):
+        return False
+    mesh.vertices.foreach_set("co", np.asarray(coords_xyz, dtype=np.float32).ravel())
+    mesh.update()
+    return True
+
 def _apply_object_location_from_props(obj, props):
     unit = 0.01
     obj.location = (props.pattern_position_x*unit,
                     props.pattern_position_y*unit,
                     props.pattern_position_z*unit)
 
+# Plantilla y opciones de malla (fuera de PATRON_SETTINGS_KEYS) con sus valores por defecto
+_MESH_OPTION_DEFAULTS = {"plantilla": "", "curvas_alta_resolucion": False, "manga_puntos": 100,
+                         "cuello_puntos": 200, "curvas_adaptividad": 1.0,
+                         "panel_modo": 'MITAD', "panel_separacion_cm": 5.0}
+
+# Último error al leer una plantilla (se muestra en el panel)
+_TEMPLATE_STATE = {'error': None}
+
+def _crossing_message(crossing):
+    where = f"vértice {crossing[0]}" if len(crossing) == 1 else f"vértices {crossing[0]}–{crossing[-1]}"
+    return f"La manga cruza la línea central ({where}): el espejo se superpondría, se genera la media pieza"
+
+def _pattern_template(path):
+    """PatternTemplate de la ruta (vacía = incluida). Si no se puede leer, la incluida."""
+    if not path:
+        _TEMPLATE_STATE['error'] = None
+        return DEFAULT_TEMPLATE
+    try:
+        template = load_template(bpy.path.abspath(path))
+    except (OSError, TemplateError) as e:
+        _TEMPLATE_STATE['error'] = str(e)
+        return DEFAULT_TEMPLATE
+    _TEMPLATE_STATE['error'] = None
+    return template
+
+def _mesh_geometry(props, options=None):
+    """(coords, edges, crossing) de la malla: contorno con curvas densificadas si
+    corresponde y, según panel_modo, panel completo o par. edges None = anillo
+    cerrado (media pieza).
+    options: dict con las claves de _MESH_OPTION_DEFAULTS (por defecto, las de props).
+    crossing: vértices de la media pieza que cruzan la línea central (vacío si
+    no hay); con alguno el espejo se superpondría y queda la media pieza.
+    """
+    o = options if options is not None else {k: getattr(props, k) for k in _MESH_OPTION_DEFAULTS}
+    template = _pattern_template(o["plantilla"])
+    coords = solve_pattern(props, template)
+    index = None
+    if o["curvas_alta_resolucion"]:
+        coords, index = densify_outline_indexed(coords, o["manga_puntos"], o["cuello_puntos"],
+                                                o["curvas_adaptividad"], frontal=props.vista_frontal_xz,
+                                                template=template)
+        coords = tuple(coords)
+    if o["panel_modo"] == 'MITAD':
+        return coords, None, ()
+    centre = centre_indices(template)
+    if index is not None:
+        centre = [index[i] for i in centre]
+    crossing = crossing_indices(coords, centre)
+    if crossing:
+        return coords, None, crossing
+    verts, edges = mirror_panel(coords, centre)
+    if o["panel_modo"] == 'PAR':
+        verts, edges = panel_pair(verts, edges, o["panel_separacion_cm"] * 0.01)
+    return tuple(verts), tuple(edges), ()
+
+def _write_mesh_coords(obj, coords, edges=None):
+    """Escribe coords en la malla de obj: in situ si la topología no cambió."""
+    if _update_mesh_in_place(obj.data, coords, edges):
+        _MESH_UPDATE_STATS['in_place'] += 1
+        _MESH_UPDATE_STATS['orphans_avoided'] += 1
+        return
+    # Cambio de topología: reconstruir y liberar la malla anterior si quedó huérfana
+    old_mesh = obj.data
+    obj.data = _build_mesh(coords, edges)
+    _MESH_UPDATE_STATS['rebuilt'] += 1
+    if old_mesh.users == 0:
+        bpy.data.meshes.remove(old_mesh)
+        _MESH_UPDATE_STATS['orphans_avoided'] += 1
+
+def _apply_pattern_to_object(obj, props, skip_unchanged=False):
+    """Escribe el patrón resuelto en obj y guarda en el objeto la copia de los parámetros.
+    Con skip_unchanged, no toca la malla si las coordenadas ya aplicadas son las mismas.
+    Devuelve (coords, crossing) como _mesh_geometry.
+    """
+    coords, edges, crossing = _mesh_geometry(props)
+    geometry = (coords, edges)
+    state = _AUTO_UPDATE_STATE
+    key = (obj.name, obj.data.name)
+    last = state['last_applied']
+    if skip_unchanged and last and last[0] == key and last[1] == geometry:
+        state['skipped'] += 1
+    else:
+        _write_mesh_coords(obj, *geometry)
+    state['last_applied'] = ((obj.name, obj.data.name), geometry)
+    state['applied'] += 1
+    _apply_object_location_from_props(obj, props)
+    _store_snapshot(obj, _pattern_snapshot(props))
+    return coords, crossing
+
+# ====== ESCENA CON VARIOS PATRONES ======
+# Cada objeto generado guarda su copia de los parámetros (JSON en la
+# propiedad personalizada "patron_settings") y la clave de lo último que
+# se escribió en su malla ("patron_applied"). "Regenerar todos" resuelve
+# sólo los objetos cuya copia cambió; los talles repetidos se resuelven
+# una vez (la posición no entra en la clave de la forma).
+_SNAPSHOT_PROP = "patron_settings"
+_APPLIED_PROP = "patron_applied"
+_POSITION_KEYS = ("pattern_position_x", "pattern_position_y", "pattern_position_z")
+
+def _pattern_snapshot(props):
+    """Parámetros del patrón y opciones de malla como dict serializable."""
+    data = params_to_dict(props)
+    data.update({k: getattr(props, k) for k in _MESH_OPTION_DEFAULTS})
+    return data
+
+def _snapshot_key(data):
+    """Huella de lo que determina la malla y la ubicación del objeto (incluye el contenido de la plantilla)."""
+    template = _pattern_template(data.get("plantilla", ""))
+    text = json.dumps([bl_info["version"], template.fingerprint, data], sort_keys=True)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+def _store_snapshot(obj, data):
+    obj[_SNAPSHOT_PROP] = json.dumps(data, sort_keys=True)
+    obj[_APPLIED_PROP] = _snapshot_key(data)
+
+def _read_snapshot(obj):
+    """dict guardado en obj, o None si el objeto no es un patrón (o la copia no se puede leer)."""
+    text = obj.get(_SNAPSHOT_PROP) if obj.type == 'MESH' else None
+    if not isinstance(text, str):
+        return None
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+def regenerate_patterns(objects, force=False):
+    """Regenera los patrones de objects a partir de su copia de parámetros.
+
+    Devuelve (regenerados, sin cambios, formas resueltas, regenerados como
+    media pieza porque el panel espejado se superponía). Las formas se
+    agrupan por parámetros sin la posición, y solve_pattern comparte
+    SOLVER_CACHE con el resto del addon.
+    """
+    shapes = {}
+    updated = unchanged = halves = 0
+    for obj in objects:
+        data = _read_snapshot(obj)
+        if data is None:
+            continue
+        key = _snapshot_key(data)
+        if not force and obj.get(_APPLIED_PROP) == key:
+            unchanged += 1
+            continue
+        params = as_params(data)
+        options = {k: data.get(k, d) for k, d in _MESH_OPTION_DEFAULTS.items()}
+        shape = dict(params_to_dict(params), **options)
+        shape.update(dict.fromkeys(_POSITION_KEYS, 0.0))
+        shape_key = json.dumps(shape, sort_keys=True)
+        geometry = shapes.get(shape_key)
+        if geometry is None:
+            geometry = shapes[shape_key] = _mesh_geometry(as_params(shape), options)
+        coords, edges, crossing = geometry
+        halves += bool(crossing)
+        _write_mesh_coords(obj, coords, edges)
+        _apply_object_location_from_props(obj, params)
+        obj[_APPLIED_PROP] = key
+        updated += 1
+    return updated, unchanged, len(shapes), halves
+
+class PATRON_OT_regenerate_all(Operator):
+    """Regenerar los patrones de la escena con los parámetros guardados en cada objeto"""
+    bl_idname = "patron.regenerate_all"
+    bl_label = "Regenerar todos"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    only_selected: BoolProperty(name="Sólo seleccionados", default=False)
+    force: BoolProperty(name="Forzar", description="Regenerar también los patrones que no cambiaron", default=False)
+
+    def execute(self, context):
+        objects = context.selected_objects if self.only_selected else context.scene.objects
+        updated, unchanged, solved, halves = regenerate_patterns(objects, force=self.force)
+        if updated + unchanged == 0:
+            self.report({'WARNING'}, 'No hay patrones con parámetros guardados')
+            return {'CANCELLED'}
+        # La vista previa compara contra la última malla aplicada: invalidarla
+        _AUTO_UPDATE_STATE['last_applied'] = None
+        self.report({'INFO'}, f"{updated} patrones regenerados ({solved} formas resueltas), {unchanged} sin cambios")
+        if halves:
+            self.report({'WARNING'}, f"{halves} patrones quedaron como media pieza: la manga cruza la línea central")
+        return {'FINISHED'}
+
+class PATRON_OT_load_from_object(Operator):
+    """Copiar a los controles los parámetros guardados en el patrón activo"""
+    bl_idname = "patron.load_from_object"
+    bl_label = "Parámetros del objeto"
+
+    def execute(self, context):
+        p = context.scene.patron_props
+        obj = _active_mesh(context)
+        data = _read_snapshot(obj) if obj else None
+        if data is None:
+            self.report({'WARNING'}, 'El objeto activo no tiene parámetros de patrón guardados')
+            return {'CANCELLED'}
+        for key in _MESH_OPTION_DEFAULTS:
+            if key in data:
+                setattr(p, key, data[key])
+        _apply_settings_dict(context, p, data)
+        self.report({'INFO'}, f"Parámetros de '{obj.name}' cargados")
+        return {'FINISHED'}
+
 class MESH_OT_add_patron_shape(Operator):
     bl_idname = "mesh.add_patron_shape"
     bl_label = "Crear Patrón"
     bl_options = {'REGISTER', 'UNDO'}
     def execute(self, context):
         p = context.scene.patron_props
-        coords = transform_pattern_coordinates(p)
-        mesh = _build_mesh_from_coords(coords)
+        coords, edges, crossing = _mesh_geometry(p)
+        mesh = _build_mesh(coords, edges)
         obj = bpy.data.objects.new(f'Patron_{p.pattern_width:.1f}x{p.pattern_height:.1f}cm', mesh)
         context.collection.objects.link(obj)
         bpy.context.view_layer.objects.active = obj; obj.select_set(True)
         _apply_object_location_from_props(obj, p)
+        _store_snapshot(obj, _pattern_snapshot(p))
         self.report({'INFO'}, 'Patrón creado (origen en corner inferior derecho)')
+        if crossing:
+            self.report({'WARNING'}, _crossing_message(crossing))
         return {'FINISHED'}
 
 class MESH_OT_update_patron(Operator):
@@ -631,11 +540,96 @@ class MESH_OT_update_patron(Operator):
         if not obj or obj.type != 'MESH':
             self.report({'WARNING'}, 'Seleccioná un objeto mesh para actualizar')
             return {'CANCELLED'}
-        coords = transform_pattern_coordinates(p)
-        mesh = _build_mesh_from_coords(coords)
-        obj.data = mesh
-        _apply_object_location_from_props(obj, p)
-        self.report({'INFO'}, 'Patrón actualizado')
+        _coords, crossing = _apply_pattern_to_object(obj, p)
+        self.report({'INFO'}, f"Patrón actualizado ({_MESH_UPDATE_STATS['orphans_avoided']} mallas huérfanas evitadas)")
+        if crossing:
+            self.report({'WARNING'}, _crossing_message(crossing))
+        return {'FINISHED'}
+
+# ====== MAPA DE FACTIBILIDAD ======
+# Tabla precalculada para avisar sin resolver si una medida manual se
+# recortará: la que recalculó el operador (en la configuración del usuario,
+# con su base) o, si no hay, la incluida junto al addon.
+_FEASIBILITY_NAME = "patronaje_feasibility.npz"
+_FEASIBILITY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), _FEASIBILITY_NAME)
+_FEASIBILITY_STATE = {'table': None}
+
+def _user_feasibility_file(create=False):
+    return os.path.join(bpy.utils.user_resource('CONFIG', path="patronaje", create=create), _FEASIBILITY_NAME)
+
+def _load_feasibility_file():
+    _FEASIBILITY_STATE['table'] = None
+    for path in (_user_feasibility_file(), _FEASIBILITY_FILE):
+        if not os.path.exists(path):
+            continue
+        try:
+            _FEASIBILITY_STATE['table'] = FeasibilityTable.load(path)
+            return
+        except Exception:
+            # Archivo dañado o de otra versión: se prueba el siguiente; el panel ofrece recalcularlo
+            continue
+
+def _draw_feasibility_hint(layout, p, key, enable_key):
+    table = _FEASIBILITY_STATE['table']
+    if table is None or not getattr(p, enable_key) or key not in table.masks:
+        return
+    # El mapa se calcula sobre la plantilla incluida
+    if _pattern_template(p.plantilla) is not DEFAULT_TEMPLATE:
+        return
+    ok, reasons = table.check(p, key)
+    if not ok:
+        text = ", ".join(CLAMP_LABELS[r] for r in reasons) or "medida no alcanzable"
+        layout.label(text=f"Se ajustará: {text}", icon='ERROR')
+
+class PATRON_OT_build_feasibility(Operator):
+    """Precalcula qué medidas manuales respetará el solver, con los valores actuales como base"""
+    bl_idname = "patron.build_feasibility"
+    bl_label = "Precalcular factibilidad"
+    def execute(self, context):
+        p = context.scene.patron_props
+        t0 = time.perf_counter()
+        table = _FEASIBILITY_STATE['table'] = build_feasibility_table(p)
+        elapsed = time.perf_counter() - t0
+        try:
+            table.save(_user_feasibility_file(create=True))
+        except OSError as e:
+            self.report({'WARNING'}, f"Mapa de factibilidad listo ({elapsed:.1f} s), sólo para esta sesión: {e}")
+            return {'FINISHED'}
+        self.report({'INFO'}, f"Mapa de factibilidad listo y guardado ({elapsed:.1f} s)")
+        return {'FINISHED'}
+
+# ====== TRAZA DEL SOLVER ======
+# Sólo se calcula con el panel de diagnóstico abierto, una vez por estado.
+_TRACE_STATE = {'key': None, 'trace': None}
+
+def _current_trace(p):
+    template = _pattern_template(p.plantilla)
+    key = _settings_key(p) + (template.fingerprint,)
+    if _TRACE_STATE['key'] != key:
+        _TRACE_STATE['trace'] = solve_traced(p, template)[1]
+        _TRACE_STATE['key'] = key
+    return _TRACE_STATE['trace']
+
+class PATRON_OT_export_trace(Operator, ExportHelper):
+    """Guardar la traza del solver (ramas, límites y tiempos) junto con las medidas en JSON"""
+    bl_idname = "patron.export_trace"
+    bl_label = "Exportar traza..."
+    filename_ext = ".json"
+
+    filter_glob: StringProperty(
+        default="*.json",
+        options={'HIDDEN'},
+        maxlen=255,
+    )
+
+    def execute(self, context):
+        p = context.scene.patron_props
+        try:
+            solve_traced(p, _pattern_template(p.plantilla))[1].dump(self.filepath, settings=p)
+        except Exception as e:
+            self.report({'ERROR'}, f"No se pudo guardar la traza: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Traza guardada en {self.filepath}")
         return {'FINISHED'}
 
 # ====== GUARDAR / CARGAR MEDIDAS ======
@@ -658,6 +652,8 @@ class PATRON_OT_save_settings(Operator, ExportHelper):
         for key in PATRON_SETTINGS_KEYS:
             if hasattr(p, key):
                 data[key] = getattr(p, key)
+        # Sólo informativo: "Cargar medidas" ignora esta clave
+        data["measurements"] = pattern_measurements(p, _pattern_template(p.plantilla)).rounded(2).as_dict()
         try:
             with open(self.filepath, "w", encoding="utf-8") as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
@@ -688,26 +684,123 @@ class PATRON_OT_load_settings(Operator, ImportHelper):
             self.report({'ERROR'}, f"No se pudo leer el archivo: {e}")
             return {'CANCELLED'}
 
-        # Evitamos loops excesivos: desactivamos auto_update mientras cargamos
-        auto_prev = p.auto_update
-        p.auto_update = False
         try:
-            for key, value in data.items():
-                if key in PATRON_SETTINGS_KEYS and hasattr(p, key):
-                    setattr(p, key, value)
+            _apply_settings_dict(context, p, data)
         except Exception as e:
             self.report({'ERROR'}, f"Error aplicando medidas: {e}")
-            p.auto_update = auto_prev
             return {'CANCELLED'}
 
-        p.auto_update = auto_prev
-        # Forzamos una actualización del mesh si hay uno activo
-        if _active_mesh(context):
-            bpy.ops.mesh.update_patron()
-
         self.report({'INFO'}, f"Medidas cargadas desde {self.filepath}")
         return {'FINISHED'}
 
+def _apply_settings_dict(context, p, data):
+    # Cada setattr sólo marca el patrón como pendiente; el planificador
+    # aplica una única actualización con el estado final.
+    for key, value in data.items():
+        if key in PATRON_SETTINGS_KEYS and hasattr(p, key):
+            setattr(p, key, value)
+
+    # Forzamos una actualización del mesh si hay uno activo
+    if _active_mesh(context):
+        _schedule_patron_update(force=True)
+
+class PATRON_OT_replay_changes(Operator, ImportHelper):
+    """Aplicar un registro de cambios (.jsonl) sobre las medidas actuales"""
+    bl_idname = "patron.replay_changes"
+    bl_label = "Aplicar cambios..."
+    filename_ext = ".jsonl"
+
+    filter_glob: StringProperty(
+        default="*.jsonl",
+        options={'HIDDEN'},
+        maxlen=255,
+    )
+
+    def execute(self, context):
+        p = context.scene.patron_props
+        try:
+            changes = read_changes(self.filepath)
+        except (OSError, ValueError) as e:
+            self.report({'ERROR'}, f"No se pudo leer el registro: {e}")
+            return {'CANCELLED'}
+        settings, conflicts = replay(p, changes)
+        # Los cambios ajenos no se vuelven a anotar en el registro propio
+        _CHANGELOG_STATE['paused'] = True
+        try:
+            _apply_settings_dict(context, p, settings)
+        except Exception as e:
+            self.report({'ERROR'}, f"Error aplicando cambios: {e}")
+            return {'CANCELLED'}
+        finally:
+            _CHANGELOG_STATE['paused'] = False
+            if _CHANGELOG_STATE['log'] is not None:
+                _CHANGELOG_STATE['last'] = params_to_dict(p)
+        level = {'WARNING'} if conflicts else {'INFO'}
+        self.report(level, f"{len(changes)} cambios aplicados ({len(conflicts)} conflictos)")
+        return {'FINISHED'}
+
+# ====== BIBLIOTECA DE PERFILES ======
+def _profile_store(p):
+    return ProfileStore(bpy.path.abspath(p.perfiles_db))
+
+class PATRON_OT_profile_save(Operator):
+    """Guardar las medidas actuales como un perfil nuevo en la biblioteca"""
+    bl_idname = "patron.profile_save"
+    bl_label = "Guardar en biblioteca"
+    def execute(self, context):
+        p = context.scene.patron_props
+        name = p.perfil_nombre.strip() or f"Perfil {p.pattern_width:.1f}x{p.pattern_height:.1f}"
+        try:
+            with _profile_store(p) as store:
+                p.perfil_id = store.add(p, name)
+        except Exception as e:
+            self.report({'ERROR'}, f"No se pudo guardar el perfil: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"Perfil '{name}' guardado con id {p.perfil_id}")
+        return {'FINISHED'}
+
+class PATRON_OT_profile_load(Operator):
+    """Cargar el perfil con el id indicado desde la biblioteca"""
+    bl_idname = "patron.profile_load"
+    bl_label = "Cargar perfil"
+    def execute(self, context):
+        p = context.scene.patron_props
+        try:
+            with _profile_store(p) as store:
+                data = store.get(p.perfil_id)
+        except Exception as e:
+            self.report({'ERROR'}, f"No se pudo leer la biblioteca: {e}")
+            return {'CANCELLED'}
+        if data is None:
+            self.report({'WARNING'}, f"No existe el perfil {p.perfil_id}")
+            return {'CANCELLED'}
+        _apply_settings_dict(context, p, data)
+        self.report({'INFO'}, f"Perfil {p.perfil_id} cargado")
+        return {'FINISHED'}
+
+class PATRON_OT_profile_import(Operator):
+    """Importar a la biblioteca todos los .json de medidas de una carpeta (incluye subcarpetas)"""
+    bl_idname = "patron.profile_import"
+    bl_label = "Importar carpeta de .json..."
+
+    directory: StringProperty(subtype='DIR_PATH')
+
+    def invoke(self, context, event):
+        context.window_manager.fileselect_add(self)
+        return {'RUNNING_MODAL'}
+
+    def execute(self, context):
+        p = context.scene.patron_props
+        try:
+            with _profile_store(p) as store:
+                ok, skipped = store.import_json_files(self.directory)
+                total = store.count()
+        except Exception as e:
+            self.report({'ERROR'}, f"No se pudo importar: {e}")
+            return {'CANCELLED'}
+        self.report({'INFO'}, f"{ok} perfiles importados, {skipped} omitidos ({total} en la biblioteca)")
+        return {'FINISHED'}
+
 # ===== Paneles =====
 class VIEW3D_PT_patron_main_panel(Panel):
     bl_label = "🧵 Patronaje: Remera de diseño de residuo cero - Zero Waste T-shirt"
@@ -724,16 +817,36 @@ class VIEW3D_PT_patron_main_panel(Panel):
         r = box.row()
         r.operator("mesh.update_patron", icon='FILE_REFRESH', text="Actualizar Patrón")
         r.prop(p, "auto_update", text="", icon='AUTO')
+        r = box.row(); r.enabled = p.auto_update
+        r.prop(p, "auto_update_hz")
+        r = box.row(align=True)
+        r.operator("patron.regenerate_all", icon='FILE_REFRESH')
+        r.operator("patron.load_from_object", icon='IMPORT')
 
         box = layout.box()
         box.label(text="📏 Dimensiones", icon='FULLSCREEN_ENTER')
         col = box.column(align=True)
+        col.prop(p, "plantilla")
+        template = _pattern_template(p.plantilla)
+        if _TEMPLATE_STATE['error']:
+            col.label(text=f"Plantilla inválida, se usa la incluida: {_TEMPLATE_STATE['error']}", icon='ERROR')
         row = col.row(align=True); row.prop(p, "pattern_width", text="Ancho")
         row2 = col.row(align=True); row2.enabled = not p.mantener_proporcion
         row2.prop(p, "pattern_height", text="Alto")
         col.prop(p, "mantener_proporcion")
         col.separator()
         col.prop(p, "vista_frontal_xz", text="Generar en vista frontal (XZ)")
+        col.prop(p, "panel_modo")
+        if p.panel_modo == 'PAR':
+            col.prop(p, "panel_separacion_cm")
+        if p.panel_modo != 'MITAD':
+            crossing = crossing_indices(solve_pattern(p, template), centre_indices(template))
+            if crossing:
+                col.label(text=_crossing_message(crossing), icon='ERROR')
+        m = pattern_measurements(p, template)
+        col.label(text=f"Perímetro de corte: {m.perimeter:.1f} cm · Área: {m.area:.0f} cm²")
+        w = waste_metrics(solve_pattern(p, template), template).row(0)
+        col.label(text=f"Aprovechamiento: {w['utilization'] * 100.0:.2f} % · Residuo: {w['waste_area']:.1f} cm²")
 
         # NUEVA SECCIÓN: Guardar / Cargar medidas
         box2 = layout.box()
@@ -742,6 +855,29 @@ class VIEW3D_PT_patron_main_panel(Panel):
         row.operator("patron.save_settings", icon='FILE_TICK', text="Guardar medidas...")
         row.operator("patron.load_settings", icon='FILE_FOLDER', text="Cargar medidas...")
 
+        lib = box2.box()
+        lib.label(text="📚 Biblioteca de perfiles")
+        col = lib.column(align=True)
+        col.prop(p, "perfiles_db", text="")
+        row = col.row(align=True)
+        row.prop(p, "perfil_nombre", text="")
+        row.operator("patron.profile_save", icon='ADD', text="Guardar")
+        row = col.row(align=True)
+        row.prop(p, "perfil_id")
+        row.operator("patron.profile_load", icon='IMPORT', text="Cargar")
+        col.operator("patron.profile_import", icon='FILE_FOLDER')
+
+        log = box2.box()
+        log.label(text="📝 Registro de cambios")
+        col = log.column(align=True)
+        row = col.row(align=True)
+        row.prop(p, "registrar_cambios", text="", icon='REC')
+        sub = row.row(align=True); sub.enabled = not p.registrar_cambios
+        sub.prop(p, "registro_cambios", text="")
+        if _CHANGELOG_STATE['log'] is not None:
+            col.label(text=f"{_CHANGELOG_STATE['log'].written} cambios anotados en esta sesión")
+        col.operator("patron.replay_changes", icon='IMPORT')
+
 class VIEW3D_PT_patron_curves_panel(Panel):
     bl_label = "🔄 Control de Formas"
     bl_idname = "VIEW3D_PT_PAT_CURVES"
@@ -752,31 +888,39 @@ class VIEW3D_PT_patron_curves_panel(Panel):
     def draw(self, context):
         layout = self.layout; p = context.scene.patron_props
 
-        coords = transform_pattern_coordinates(p)
+        m = pattern_measurements(p, _pattern_template(p.plantilla)).rounded(1)
+
+        row = layout.row(align=True)
+        if _pattern_template(p.plantilla) is not DEFAULT_TEMPLATE:
+            row.label(text="Mapa de factibilidad: sólo para la plantilla incluida")
+        elif _FEASIBILITY_STATE['table'] is None:
+            row.label(text="Mapa de factibilidad: no calculado")
+        else:
+            row.label(text="Mapa de factibilidad: activo")
+        row.operator("patron.build_feasibility", icon='FILE_REFRESH', text="")
 
         # ========== MANGA ==========
         b = layout.box(); b.label(text="👔 Manga", icon='CURVE_BEZCURVE')
         mbox = b.box(); mbox.label(text="📐 Medidas clave (en cm)")
 
-        dx8_left_cm, dy8_bottom_cm = _measure_cm(p, coords, 8, lateral_edge='LEFT', decimals=1)
-        dx8_right_cm, _            = _measure_cm(p, coords, 8, lateral_edge='RIGHT', decimals=1)
-        sisa_sisa = round(dx8_right_cm * 2.0, 1)
-        _dx14_left_cm, dy14_bottom_cm = _measure_cm(p, coords, 14, lateral_edge='LEFT', decimals=1)
-
         col = mbox.column(align=True)
-        row = col.row(align=True); row.label(text=f"Distancia desde borde lateral a sisa: {dx8_left_cm:.1f}")
+        row = col.row(align=True); row.label(text=f"Distancia desde borde lateral a sisa: {m.v8_left:.1f}")
         sub = row.row(align=True); sub.prop(p, "man_enable_v8_left", text=""); sub.prop(p, "man_v8_left_cm", text="cm")
+        _draw_feasibility_hint(col, p, "man_v8_left_cm", "man_enable_v8_left")
 
-        row = col.row(align=True); row.label(text=f"Distancia desde borde inferior a sisa: {dy8_bottom_cm:.1f}")
+        row = col.row(align=True); row.label(text=f"Distancia desde borde inferior a sisa: {m.v8_bottom:.1f}")
         sub = row.row(align=True); sub.prop(p, "man_enable_v8_bottom", text=""); sub.prop(p, "man_v8_bottom_cm", text="cm")
+        _draw_feasibility_hint(col, p, "man_v8_bottom_cm", "man_enable_v8_bottom")
 
-        row = col.row(align=True); row.label(text=f"Costura de espalda desde el borde inferior de la tela: {dy14_bottom_cm:.1f}")
+        row = col.row(align=True); row.label(text=f"Costura de espalda desde el borde inferior de la tela: {m.v14_bottom:.1f}")
         sub = row.row(align=True); sub.prop(p, "man_enable_v14_bottom", text=""); sub.prop(p, "man_v14_bottom_cm", text="cm")
+        _draw_feasibility_hint(col, p, "man_v14_bottom_cm", "man_enable_v14_bottom")
 
         row = col.row(align=True); row.prop(p, "lock_manga_lengths", text="Bloquear la relación entre la sisa y la costura de la espalda")
 
-        row = col.row(align=True); row.label(text=f"Distancia de sisa a sisa: {sisa_sisa:.1f}")
+        row = col.row(align=True); row.label(text=f"Distancia de sisa a sisa: {m.sisa_sisa:.1f}")
         sub = row.row(align=True); sub.prop(p, "man_enable_sisa_sisa", text=""); sub.prop(p, "man_sisa_sisa_cm", text="cm")
+        _draw_feasibility_hint(col, p, "man_sisa_sisa_cm", "man_enable_sisa_sisa")
 
         c = b.column(align=True)
         c.prop(p, "manga_usar_escala_x")
@@ -797,22 +941,22 @@ class VIEW3D_PT_patron_curves_panel(Panel):
         b2 = layout.box(); b2.label(text="👕 Cuello", icon='CURVE_BEZCIRCLE')
         mbox2 = b2.box(); mbox2.label(text="📐 Medidas clave (en cm)")
 
-        dx31_right_cm, dy31_bottom_cm = _measure_cm(p, coords, 31, lateral_edge='RIGHT', decimals=1)
-        _dx17_right_cm, dy17_bottom_cm = _measure_cm(p, coords, 17, lateral_edge='RIGHT', decimals=1)
-        base_total = round(dx31_right_cm * 2.0, 1)
-
         col2 = mbox2.column(align=True)
-        row = col2.row(align=True); row.label(text=f"Base del cuello: {dx31_right_cm:.1f}")
+        row = col2.row(align=True); row.label(text=f"Base del cuello: {m.base:.1f}")
         sub = row.row(align=True); sub.prop(p, "man_enable_base", text=""); sub.prop(p, "man_base_cm", text="cm")
+        _draw_feasibility_hint(col2, p, "man_base_cm", "man_enable_base")
 
-        row = col2.row(align=True); row.label(text=f"Largo, distancia desde el borde inferior hasta la base del cuello: {dy31_bottom_cm:.1f}")
+        row = col2.row(align=True); row.label(text=f"Largo, distancia desde el borde inferior hasta la base del cuello: {m.len_base:.1f}")
         sub = row.row(align=True); sub.prop(p, "man_enable_len_base", text=""); sub.prop(p, "man_len_base_cm", text="cm")
+        _draw_feasibility_hint(col2, p, "man_len_base_cm", "man_enable_len_base")
 
-        row = col2.row(align=True); row.label(text=f"Distancia desde el borde inferior hasta el cuello: {dy17_bottom_cm:.1f}")
+        row = col2.row(align=True); row.label(text=f"Distancia desde el borde inferior hasta el cuello: {m.len_17:.1f}")
         sub = row.row(align=True); sub.prop(p, "man_enable_len_17", text=""); sub.prop(p, "man_len_17_cm", text="cm")
+        _draw_feasibility_hint(col2, p, "man_len_17_cm", "man_enable_len_17")
 
-        row = col2.row(align=True); row.label(text=f"Base del cuello total: {base_total:.1f}")
+        row = col2.row(align=True); row.label(text=f"Base del cuello total: {m.base_total:.1f}")
         sub = row.row(align=True); sub.prop(p, "man_enable_base_total", text=""); sub.prop(p, "man_base_total_cm", text="cm")
+        _draw_feasibility_hint(col2, p, "man_base_total_cm", "man_enable_base_total")
 
         c2 = b2.column(align=True)
         c2.prop(p, "cuello_scale_x", slider=True)
@@ -822,6 +966,46 @@ class VIEW3D_PT_patron_curves_panel(Panel):
         c2.prop(p, "lock_neck_lengths", text="Bloquear la relación entre las medidas del cuello")
         c2.prop(p, "cuello_equidistante", text="Vértices Equidistantes")
 
+        # ========== RESOLUCIÓN DE CURVAS ==========
+        b3 = layout.box(); b3.label(text="〰️ Resolución de curvas", icon='CURVE_NCURVE')
+        c3 = b3.column(align=True)
+        c3.prop(p, "curvas_alta_resolucion")
+        sub = c3.column(align=True); sub.enabled = p.curvas_alta_resolucion
+        sub.prop(p, "manga_puntos")
+        sub.prop(p, "cuello_puntos")
+        sub.prop(p, "curvas_adaptividad", slider=True)
+
+class VIEW3D_PT_patron_trace_panel(Panel):
+    bl_label = "🔍 Diagnóstico del solver"
+    bl_idname = "VIEW3D_PT_PAT_TRACE"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Remera de Diseño de Residuo Cero"
+    bl_parent_id = "VIEW3D_PT_PAT_MAIN"
+    bl_options = {'DEFAULT_CLOSED'}
+    def draw(self, context):
+        layout = self.layout; p = context.scene.patron_props
+        trace = _current_trace(p)
+
+        b = layout.box(); b.label(text="Ramas", icon='OUTLINER')
+        col = b.column(align=True)
+        for stage, decision, _ in trace.branches:
+            col.label(text=f"{stage}: {decision}")
+
+        b = layout.box(); b.label(text="Límites aplicados", icon='ERROR')
+        col = b.column(align=True)
+        active = trace.active_clamps
+        if not active:
+            col.label(text="Ningún valor recortado")
+        for name, before, after in active:
+            col.label(text=f"{name}: {before:.4f} → {after:.4f}")
+
+        b = layout.box(); b.label(text=f"Tiempos ({trace.total_time * 1000.0:.3f} ms)", icon='TIME')
+        col = b.column(align=True)
+        for stage, secs in trace.timings.items():
+            col.label(text=f"{stage}: {secs * 1e6:.1f} µs")
+        layout.operator("patron.export_trace", icon='EXPORT')
+
 class VIEW3D_PT_patron_position_panel(Panel):
     bl_label = "🎯 Posición en Escena"
     bl_idname = "VIEW3D_PT_PAT_POS"
@@ -845,25 +1029,53 @@ def register():
     bpy.utils.register_class(PatronShapeProperties)
     bpy.utils.register_class(MESH_OT_add_patron_shape)
     bpy.utils.register_class(MESH_OT_update_patron)
+    bpy.utils.register_class(PATRON_OT_regenerate_all)
+    bpy.utils.register_class(PATRON_OT_load_from_object)
     bpy.utils.register_class(PATRON_OT_save_settings)
     bpy.utils.register_class(PATRON_OT_load_settings)
+    bpy.utils.register_class(PATRON_OT_replay_changes)
+    bpy.utils.register_class(PATRON_OT_build_feasibility)
+    bpy.utils.register_class(PATRON_OT_export_trace)
+    bpy.utils.register_class(PATRON_OT_profile_save)
+    bpy.utils.register_class(PATRON_OT_profile_load)
+    bpy.utils.register_class(PATRON_OT_profile_import)
     bpy.utils.register_class(VIEW3D_PT_patron_main_panel)
     bpy.utils.register_class(VIEW3D_PT_patron_curves_panel)
     bpy.utils.register_class(VIEW3D_PT_patron_position_panel)
+    bpy.utils.register_class(VIEW3D_PT_patron_trace_panel)
     bpy.types.Scene.patron_props = PointerProperty(type=PatronShapeProperties)
     bpy.types.VIEW3D_MT_mesh_add.append(menu_func)
+    bpy.app.handlers.load_post.append(_changelog_load_post)
+    _load_feasibility_file()
 
 def unregister():
+    if bpy.app.timers.is_registered(_auto_update_tick):
+        bpy.app.timers.unregister(_auto_update_tick)
+    if _changelog_load_post in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(_changelog_load_post)
     bpy.types.VIEW3D_MT_mesh_add.remove(menu_func)
     del bpy.types.Scene.patron_props
+    bpy.utils.unregister_class(VIEW3D_PT_patron_trace_panel)
     bpy.utils.unregister_class(VIEW3D_PT_patron_position_panel)
     bpy.utils.unregister_class(VIEW3D_PT_patron_curves_panel)
     bpy.utils.unregister_class(VIEW3D_PT_patron_main_panel)
+    bpy.utils.unregister_class(PATRON_OT_profile_import)
+    bpy.utils.unregister_class(PATRON_OT_profile_load)
+    bpy.utils.unregister_class(PATRON_OT_profile_save)
+    bpy.utils.unregister_class(PATRON_OT_export_trace)
+    bpy.utils.unregister_class(PATRON_OT_build_feasibility)
+    bpy.utils.unregister_class(PATRON_OT_replay_changes)
     bpy.utils.unregister_class(PATRON_OT_load_settings)
     bpy.utils.unregister_class(PATRON_OT_save_settings)
+    bpy.utils.unregister_class(PATRON_OT_load_from_object)
+    bpy.utils.unregister_class(PATRON_OT_regenerate_all)
     bpy.utils.unregister_class(MESH_OT_update_patron)
     bpy.utils.unregister_class(MESH_OT_add_patron_shape)
     bpy.utils.unregister_class(PatronShapeProperties)
+    SOLVER_CACHE.clear()
+    _close_changelog()
+    _FEASIBILITY_STATE['table'] = None
+    _TRACE_STATE['key'] = _TRACE_STATE['trace'] = None
 
 if __name__ == "__main__":
     register()
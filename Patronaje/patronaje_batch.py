@@ -0,0 +1,237 @@
+"""Generador de patrones por lotes desde la línea de comandos (sin Blender).
+
+Lee un CSV o JSONL de medidas de clientes (columnas = claves de
+PATRON_SETTINGS_KEYS, más un identificador de pedido), resuelve cada fila
+con el núcleo de Patronaje en un pool de procesos y escribe por pedido:
+
+    <id>.coords.json    coordenadas ancladas (metros) y PatternMeasurements (cm)
+    <id>.settings.json  medidas compatibles con "Cargar medidas..."
+    <id>.svg            contorno del patrón (cm)
+
+Las salidas y el índice manifest.jsonl se escriben en el orden de entrada.
+Con --feasibility (ver patronaje_feasibility.py) los pedidos cuyas medidas
+manuales el solver no respetaría se rechazan sin generarse: se confirma
+resolviendo cada tanda en lote, con las medidas del pedido combinadas.
+La lectura es en streaming y la cantidad de trabajos en vuelo está acotada,
+así que la memoria no crece con el tamaño del archivo.
+
+Uso:
+    python patronaje_batch.py medidas.csv --out pedidos/ --workers 8
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from patronaje_core import (
+    PATRON_SETTINGS_KEYS, PATRON_DEFAULTS, MANUAL_ENABLE_KEYS,
+    as_params, params_to_dict, transform_pattern_coordinates, measure_pattern,
+)
+from patronaje_feasibility import check_orders
+
+ID_FIELDS = ("id", "order_id", "pedido")
+_TRUE = {"1", "true", "t", "yes", "y", "si", "sí", "s", "on"}
+_FALSE = {"0", "false", "f", "no", "n", "off", ""}
+
+# ===== Lectura en streaming =====
+def _parse_value(key, raw):
+    default = PATRON_DEFAULTS[key]
+    if isinstance(default, bool):
+        if isinstance(raw, bool):
+            return raw
+        text = str(raw).strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+        raise ValueError(f"{key}: valor booleano inválido {raw!r}")
+    return float(raw)
+
+def row_to_settings(row):
+    """Fila cruda -> dict de medidas. Celdas vacías se ignoran; una medida
+    man_*_cm presente habilita su interruptor salvo que la fila lo indique.
+    """
+    settings = {}
+    for key in PATRON_SETTINGS_KEYS:
+        raw = row.get(key)
+        if raw is None or (isinstance(raw, str) and not raw.strip()):
+            continue
+        settings[key] = _parse_value(key, raw)
+    for value_key, enable_key in MANUAL_ENABLE_KEYS.items():
+        if value_key in settings and enable_key not in settings:
+            settings[enable_key] = True
+    return settings
+
+def _row_id(row, lineno):
+    for field in ID_FIELDS:
+        value = row.get(field)
+        if value not in (None, ""):
+            return str(value)
+    return f"{lineno:06d}"
+
+def iter_rows(path, fmt=None):
+    """Genera (id, fila) leyendo el archivo de a una línea.
+
+    Una línea JSONL ilegible o que no es un objeto da (número de línea,
+    ValueError): queda como error en el manifiesto y el lote sigue.
+    """
+    fmt = fmt or ("jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv")
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            for lineno, row in enumerate(csv.DictReader(f), start=1):
+                yield _row_id(row, lineno), row
+        else:
+            for lineno, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield f"{lineno:06d}", ValueError(f"línea {lineno}: JSON inválido ({e})")
+                    continue
+                if not isinstance(row, dict):
+                    yield f"{lineno:06d}", ValueError(f"línea {lineno}: se esperaba un objeto JSON")
+                    continue
+                yield _row_id(row, lineno), row
+
+# ===== Salidas =====
+def outline_svg(coords, frontal=True, margin_cm=1.5):
+    """Contorno cerrado del patrón como SVG en cm (eje vertical invertido)."""
+    v = 2 if frontal else 1
+    pts = [(c[0] * 100.0, c[v] * 100.0) for c in coords]
+    min_x = min(p[0] for p in pts); max_x = max(p[0] for p in pts)
+    min_y = min(p[1] for p in pts); max_y = max(p[1] for p in pts)
+    w = (max_x - min_x) + margin_cm * 2.0
+    h = (max_y - min_y) + margin_cm * 2.0
+    path = " ".join(f"{x - min_x + margin_cm:.4f},{h - (y - min_y + margin_cm):.4f}" for x, y in pts)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{w:.3f}cm" height="{h:.3f}cm" viewBox="0 0 {w:.3f} {h:.3f}">\n'
+        f'<g id="capa-trazo-patron">\n'
+        f'  <polygon points="{path}" fill="none" stroke="#000000" stroke-width="0.04" stroke-linejoin="round"/>\n'
+        f'</g>\n</svg>\n'
+    )
+
+def _safe_name(order_id):
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", order_id) or "pedido"
+
+def _unique_name(out_dir, order_id, index, since):
+    """Nombre de archivo libre para order_id en out_dir: con -<n.º de pedido> si
+    esta corrida ya escribió uno igual (ids repetidos, o distintos que dan el
+    mismo nombre; en Windows y macOS el disco no distingue mayúsculas). Se mira
+    el disco y no un conjunto de nombres, así la memoria no crece con la entrada.
+    Los archivos de corridas anteriores (modificados antes de since) se pisan.
+    """
+    base = name = _safe_name(order_id)
+    while True:
+        try:
+            if os.stat(os.path.join(out_dir, f"{name}.coords.json")).st_mtime < since:
+                return name
+        except OSError:
+            return name
+        name = f"{base}-{index:06d}"
+        index += 1
+
+# ===== Trabajo por fila (se ejecuta en los procesos del pool) =====
+def _solve_row(order_id, settings, rejected=None):
+    if rejected:
+        detail = "; ".join(f"{key} ({', '.join(reasons) or 'medida no alcanzable'})"
+                           for key, reasons in rejected.items())
+        return order_id, None, f"Medidas no factibles: {detail}"
+    try:
+        coords = transform_pattern_coordinates(settings)
+    except Exception as e:
+        return order_id, None, f"{type(e).__name__}: {e}"
+    frontal = settings["vista_frontal_xz"]
+    files = {
+        "coords.json": json.dumps({"id": order_id, "units": "m", "plane": "XZ" if frontal else "XY",
+                                   "coords": [list(c) for c in coords],
+                                   "measurements": measure_pattern(settings, coords).as_dict()}),
+        "settings.json": json.dumps(settings, indent=2, ensure_ascii=False),
+        "svg": outline_svg(coords, frontal=frontal),
+    }
+    return order_id, files, None
+
+def _solve_chunk(chunk, feasibility=False):
+    parsed = []
+    for order_id, row in chunk:
+        try:
+            if isinstance(row, Exception):
+                raise row
+            parsed.append((order_id, params_to_dict(as_params(row_to_settings(row))), None))
+        except Exception as e:
+            parsed.append((order_id, None, f"{type(e).__name__}: {e}"))
+    valid = [settings for _, settings, error in parsed if error is None]
+    rejected = iter(check_orders(valid) if feasibility else [None] * len(valid))
+    return [(order_id, None, error) if error else _solve_row(order_id, settings, next(rejected))
+            for order_id, settings, error in parsed]
+
+def _chunks(iterable, size):
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def run_batch(input_path, out_dir, workers=None, chunk_size=64, fmt=None, feasibility=False):
+    """Procesa el archivo completo; devuelve (ok, errores). feasibility: rechaza pedidos no factibles."""
+    os.makedirs(out_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 4
+    ok = failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(os.path.join(out_dir, "manifest.jsonl"), "w", encoding="utf-8") as manifest:
+        pending = deque()
+        # con la resolución del reloj del disco: lo escrito antes es de otra corrida
+        since = math.floor(time.time()) - 1.0
+
+        def drain_one():
+            nonlocal ok, failed
+            for order_id, files, error in pending.popleft().result():
+                entry = {"id": order_id}
+                if error:
+                    failed += 1
+                    entry["error"] = error
+                else:
+                    ok += 1
+                    name = _unique_name(out_dir, order_id, ok + failed, since)
+                    for suffix, text in files.items():
+                        with open(os.path.join(out_dir, f"{name}.{suffix}"), "w", encoding="utf-8") as f:
+                            f.write(text)
+                    entry["files"] = [f"{name}.{suffix}" for suffix in files]
+                manifest.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+        for chunk in _chunks(iter_rows(input_path, fmt), chunk_size):
+            pending.append(pool.submit(_solve_chunk, chunk, feasibility))
+            if len(pending) >= max_in_flight:
+                drain_one()
+        while pending:
+            drain_one()
+    return ok, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera patrones Patronaje por lotes desde CSV/JSONL de medidas.")
+    parser.add_argument("input", help="Archivo .csv o .jsonl con una fila por pedido")
+    parser.add_argument("--out", required=True, help="Carpeta de salida")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto: núcleos disponibles)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Filas por tarea enviada al pool")
+    parser.add_argument("--format", choices=("csv", "jsonl"), default=None, help="Forzar formato de entrada")
+    parser.add_argument("--feasibility", action="store_true",
+                        help="Rechaza pedidos cuyas medidas manuales el solver no respetaría")
+    args = parser.parse_args(argv)
+    ok, failed = run_batch(args.input, args.out, workers=args.workers,
+                           chunk_size=max(1, args.chunk_size), fmt=args.format,
+                           feasibility=args.feasibility)
+    print(f"{ok} patrones generados, {failed} con error -> {args.out}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""Benchmark y salidas de referencia (golden) del solver de Patronaje.
+
+Barre un caso por cada combinación de entradas manuales y bloqueos
+(MANUAL_ENABLE_KEYS × lock_manga_lengths × lock_neck_lengths = 1024), con
+el resto de los parámetros sorteados con semilla fija, y:
+
+* compara las coordenadas de transform_pattern_coordinates contra
+  patronaje_golden.json.gz dentro de una tolerancia;
+* mide resoluciones individuales, con caché, en lote
+  (solve_pattern_batch, si hay NumPy) y la construcción de malla
+  (_build_mesh_from_coords, sólo dentro de Blender);
+* escribe el resultado como JSON y, con --compare, marca las
+  regresiones de rendimiento contra una corrida anterior.
+
+Uso:
+    python patronaje_bench.py --out bench.json [--compare bench_anterior.json]
+    blender --background --python patronaje_bench.py -- --out bench.json
+    python patronaje_bench.py --update-golden
+"""
+
+import argparse
+import ast
+import gzip
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import time
+from itertools import product
+
+from patronaje_core import (
+    PATRON_DEFAULTS, MANUAL_ENABLE_KEYS,
+    params_to_dict, transform_pattern_coordinates, measure_pattern, solve_pattern, SolverCache,
+)
+import patronaje_core
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GOLDEN_PATH = os.path.join(HERE, "patronaje_golden.json.gz")
+ADDON_PATH = os.path.join(HERE, "patronaje-v310-alpha.py")
+GOLDEN_FORMAT = 1
+GOLDEN_DECIMALS = 9          # coordenadas guardadas al nanómetro
+DEFAULT_TOLERANCE_M = 1e-8
+LOCK_KEYS = ("lock_manga_lengths", "lock_neck_lengths")
+_FREE_TOGGLES = ("mantener_proporcion", "usar_mitad_auto", "manga_usar_escala_x", "manga_limitar_x_a_mitad",
+                 "cuello_seguir_patron", "cuello_limitar_altura", "manga_equidistante", "cuello_equidistante",
+                 "vista_frontal_xz")
+
+# ===== Casos =====
+def _case_settings(enabled, locks, rng):
+    s = dict(PATRON_DEFAULTS)
+    w = s["pattern_width"] = round(rng.uniform(40.0, 120.0), 1)
+    h = s["pattern_height"] = round(rng.uniform(50.0, 120.0), 1)
+    for key in _FREE_TOGGLES:
+        s[key] = rng.random() < 0.5
+    s["curve_upper_scale_x"] = round(rng.uniform(0.3, 2.0), 2)
+    s["curve_upper_scale_y"] = round(rng.uniform(0.3, 2.0), 2)
+    s["curve_upper_depth_cm"] = round(rng.uniform(5.0, w / 2.0), 1)
+    s["curve_upper_position_y"] = round(rng.uniform(-25.0, 25.0), 1)
+    s["cuello_scale_x"] = round(rng.uniform(0.3, 2.0), 2)
+    s["cuello_scale_y"] = round(rng.uniform(0.3, 2.0), 2)
+    s["cuello_profundidad_cm"] = round(rng.uniform(0.0, w / 3.0), 1)
+    s["curve_internal_position_y"] = round(rng.uniform(-20.0, 20.0), 1)
+    # Valores manuales dentro de rangos razonables para la tela sorteada
+    lateral = {"man_v8_left_cm": w * 0.6, "man_sisa_sisa_cm": w * 1.2,
+               "man_base_cm": w * 0.3, "man_base_total_cm": w * 0.6}
+    for key, enable in MANUAL_ENABLE_KEYS.items():
+        s[enable] = enable in enabled
+        top = lateral.get(key, h * 0.95)
+        s[key] = round(rng.uniform(0.0, top), 1)
+    for key in LOCK_KEYS:
+        s[key] = key in locks
+    return s
+
+def generate_cases(seed=310):
+    """Un caso por combinación de entradas manuales y bloqueos, reproducible por semilla."""
+    enables = list(MANUAL_ENABLE_KEYS.values())
+    cases = []
+    for bits in product((False, True), repeat=len(enables) + len(LOCK_KEYS)):
+        enabled = {k for k, b in zip(enables, bits) if b}
+        locks = {k for k, b in zip(LOCK_KEYS, bits[len(enables):]) if b}
+        idx = len(cases)
+        rng = random.Random(seed * 100003 + idx)
+        cid = "".join("1" if b else "0" for b in bits)
+        cases.append({"id": cid, "settings": _case_settings(enabled, locks, rng)})
+    return cases
+
+def _plane_coords(settings, coords):
+    v = 2 if settings["vista_frontal_xz"] else 1
+    return [[round(c[0], GOLDEN_DECIMALS), round(c[v], GOLDEN_DECIMALS)] for c in coords]
+
+# ===== Golden =====
+def _addon_version():
+    """bl_info["version"] leído sin importar bpy."""
+    try:
+        with open(ADDON_PATH, encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+        for node in tree.body:
+            if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "bl_info" for t in node.targets):
+                return list(ast.literal_eval(node.value)["version"])
+    except (OSError, SyntaxError, ValueError, KeyError):
+        pass
+    return None
+
+def write_golden(path=GOLDEN_PATH, seed=310):
+    cases = generate_cases(seed)
+    for case in cases:
+        case["coords"] = _plane_coords(case["settings"], transform_pattern_coordinates(case["settings"]))
+    data = {"format": GOLDEN_FORMAT, "addon_version": _addon_version(), "seed": seed,
+            "decimals": GOLDEN_DECIMALS, "cases": cases}
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    return len(cases)
+
+def load_golden(path=GOLDEN_PATH):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("format") != GOLDEN_FORMAT:
+        raise ValueError(f"Formato de golden no soportado: {data.get('format')}")
+    return data
+
+def _compare_cases(cases, solved, tolerance):
+    failures = []
+    max_err = 0.0
+    for case, (settings, coords) in zip(cases, solved):
+        got = _plane_coords(settings, coords)
+        if len(got) != len(case["coords"]):
+            err = float("inf")
+        else:
+            err = max(abs(a - b) for p, q in zip(got, case["coords"]) for a, b in zip(p, q))
+        max_err = max(max_err, err)
+        if err > tolerance:
+            failures.append({"id": case["id"], "max_abs_err_m": err})
+    return {"checked": len(cases), "failed": len(failures), "tolerance_m": tolerance,
+            "max_abs_err_m": max_err, "failures": failures[:20]}
+
+def check_golden(golden, tolerance=DEFAULT_TOLERANCE_M):
+    """Compara cada caso contra el golden; devuelve el resumen (máx. error, fallas).
+
+    El solver en lote se verifica contra los mismos casos cuando hay NumPy.
+    """
+    cases = golden["cases"]
+    settings_list = [params_to_dict(c["settings"]) for c in cases]
+    result = _compare_cases(cases, [(s, transform_pattern_coordinates(s)) for s in settings_list], tolerance)
+    try:
+        from patronaje_grading import solve_pattern_batch
+    except ImportError as e:
+        result["batch"] = {"skipped": f"NumPy no disponible ({e})"}
+    else:
+        coords = solve_pattern_batch(settings_list).tolist()
+        result["batch"] = _compare_cases(cases, list(zip(settings_list, coords)), tolerance)
+    return result
+
+# ===== Benchmarks =====
+def _stats(samples, ops_per_sample=1):
+    samples = sorted(samples)
+    n = len(samples)
+    total = sum(samples)
+    return {
+        "samples": n, "total_s": total,
+        "mean_us": total / n / ops_per_sample * 1e6,
+        "p50_us": samples[n // 2] / ops_per_sample * 1e6,
+        "p95_us": samples[min(n - 1, int(n * 0.95))] / ops_per_sample * 1e6,
+        "ops_per_s": n * ops_per_sample / total if total > 0 else None,
+    }
+
+def _time_each(fn, items, repeat):
+    samples = []
+    for _ in range(repeat):
+        for item in items:
+            t0 = time.perf_counter()
+            fn(item)
+            samples.append(time.perf_counter() - t0)
+    return samples
+
+def bench_single(settings_list, repeat):
+    return _stats(_time_each(transform_pattern_coordinates, settings_list, repeat))
+
+def bench_measure(settings_list, repeat):
+    solved = [(s, transform_pattern_coordinates(s)) for s in settings_list]
+    return _stats(_time_each(lambda sc: measure_pattern(*sc), solved, repeat))
+
+def bench_cached(settings_list, repeat):
+    # Caché propia para no tocar SOLVER_CACHE; primero se llena, después se miden aciertos
+    saved = patronaje_core.SOLVER_CACHE
+    patronaje_core.SOLVER_CACHE = SolverCache(maxsize=len(settings_list))
+    try:
+        for s in settings_list:
+            solve_pattern(s)
+        return _stats(_time_each(solve_pattern, settings_list, repeat))
+    finally:
+        patronaje_core.SOLVER_CACHE = saved
+
+def bench_batch(settings_list, repeat):
+    try:
+        from patronaje_grading import solve_pattern_batch
+    except ImportError as e:
+        return {"skipped": f"NumPy no disponible ({e})"}
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        solve_pattern_batch(settings_list)
+        samples.append(time.perf_counter() - t0)
+    result = _stats(samples, ops_per_sample=len(settings_list))
+    result["rows"] = len(settings_list)
+    return result
+
+def bench_mesh(settings_list, repeat):
+    """_build_mesh_from_coords del addon; sólo con bpy disponible (blender --background)."""
+    try:
+        import bpy
+    except ImportError:
+        return {"skipped": "bpy no disponible (correr con blender --background)"}
+    spec = importlib.util.spec_from_file_location("patronaje_addon_bench", ADDON_PATH)
+    addon = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(addon)
+    coords = [transform_pattern_coordinates(s) for s in settings_list]
+    samples = []
+    for _ in range(repeat):
+        for c in coords:
+            t0 = time.perf_counter()
+            mesh = addon._build_mesh_from_coords(c)
+            samples.append(time.perf_counter() - t0)
+            bpy.data.meshes.remove(mesh)
+    return _stats(samples)
+
+BENCHMARKS = {
+    "solve_single": bench_single,
+    "solve_cached": bench_cached,
+    "measure": bench_measure,
+    "solve_batch": bench_batch,
+    "mesh_build": bench_mesh,
+}
+
+def compare_results(current, previous, max_regression):
+    """Benchmarks cuyo ops_per_s cayó más que max_regression (fracción) respecto de previous."""
+    regressions = []
+    for name, cur in current["benchmarks"].items():
+        prev = previous.get("benchmarks", {}).get(name, {})
+        if cur.get("ops_per_s") and prev.get("ops_per_s"):
+            ratio = cur["ops_per_s"] / prev["ops_per_s"]
+            if ratio < 1.0 - max_regression:
+                regressions.append({"benchmark": name, "ratio": ratio,
+                                    "ops_per_s": cur["ops_per_s"], "previous_ops_per_s": prev["ops_per_s"]})
+    return regressions
+
+def run(repeat=3, tolerance=DEFAULT_TOLERANCE_M, only=None):
+    golden = load_golden()
+    settings_list = [params_to_dict(c["settings"]) for c in golden["cases"]]
+    result = {
+        "addon_version": _addon_version(),
+        "golden_addon_version": golden.get("addon_version"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cases": len(settings_list),
+        "golden": check_golden(golden, tolerance),
+        "benchmarks": {},
+    }
+    for name, fn in BENCHMARKS.items():
+        if only and name not in only:
+            continue
+        result["benchmarks"][name] = fn(settings_list, repeat)
+    return result
+
+def _script_argv(argv):
+    # Dentro de Blender los argumentos propios van después de "--"
+    if argv is None:
+        argv = sys.argv[1:]
+        if "--" in argv:
+            argv = argv[argv.index("--") + 1:]
+    return argv
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark y golden del solver de Patronaje.")
+    parser.add_argument("--out", default=None, help="Archivo JSON de resultados (por defecto, stdout)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE_M, help="Tolerancia del golden (m)")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), default=None)
+    parser.add_argument("--compare", default=None, help="Resultados anteriores para detectar regresiones")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Caída de ops/s tolerada (fracción)")
+    parser.add_argument("--update-golden", action="store_true", help="Regenerar patronaje_golden.json.gz")
+    args = parser.parse_args(_script_argv(argv))
+
+    if args.update_golden:
+        n = write_golden()
+        print(f"{n} casos golden -> {GOLDEN_PATH}")
+        return 0
+
+    result = run(repeat=max(1, args.repeat), tolerance=args.tolerance, only=args.only)
+    golden = result["golden"]
+    status = 0 if golden["failed"] == 0 and golden["batch"].get("failed", 0) == 0 else 1
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            result["regressions"] = compare_results(result, json.load(f), args.max_regression)
+        if result["regressions"]:
+            status = status or 2
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
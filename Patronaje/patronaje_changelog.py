@@ -0,0 +1,141 @@
+"""Registro de cambios de parámetros de Patronaje (JSON Lines, sin Blender).
+
+En lugar de intercambiar archivos de medidas completos, cada sesión anexa
+una línea por cambio de una clave de PATRON_SETTINGS_KEYS:
+
+    {"key": "pattern_width", "old": 67.5, "new": 70.0, "t": 1760000000.0}
+
+Al abrir el registro se anexa una línea de sesión ({"format": 1, ...}). La
+escritura es sólo anexar y con buffer de línea: cada cambio cuesta una
+línea, sin reescribir el archivo. replay aplica los cambios en orden sobre
+una base e informa los que partían de un valor distinto al de la base
+(conflictos; gana el último cambio).
+
+Uso:
+    python patronaje_changelog.py base.json cambios.jsonl --out resultado.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+
+from patronaje_core import PATRON_SETTINGS_KEYS, params_to_dict
+
+CHANGELOG_FORMAT = 1
+_SETTINGS_KEYS = frozenset(PATRON_SETTINGS_KEYS)
+
+@dataclass(frozen=True)
+class Change:
+    """Un cambio de una clave: valor anterior, valor nuevo y momento (epoch, s)."""
+    key: str
+    old: object
+    new: object
+    t: float
+
+class ChangeLog:
+    """Registro de cambios abierto para anexar (se crea si no existe)."""
+
+    def __init__(self, path, session=None):
+        self.path = path
+        self.written = 0
+        # buffering=1: cada línea llega al archivo al terminarla
+        self._file = open(path, "a", encoding="utf-8", buffering=1)
+        self._write({"format": CHANGELOG_FORMAT, "session": session, "t": time.time()})
+
+    def _write(self, obj):
+        self._file.write(json.dumps(obj, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def record(self, key, old, new, t=None):
+        self._write({"key": key, "old": old, "new": new, "t": time.time() if t is None else t})
+        self.written += 1
+
+    def record_diff(self, before, after, t=None):
+        """Anexa un cambio por cada clave cuyo valor difiere entre los dicts before y after."""
+        t = time.time() if t is None else t
+        n = 0
+        for key, new in after.items():
+            old = before.get(key)
+            if old != new:
+                self.record(key, old, new, t)
+                n += 1
+        return n
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def read_changes(path):
+    """Cambios del registro en orden. Omite claves ajenas a PATRON_SETTINGS_KEYS.
+
+    Una última línea incompleta (sesión cortada a mitad de escritura) se ignora.
+    """
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().split("\n")
+    changes = []
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            if n == len(lines):
+                break
+            raise ValueError(f"{os.path.basename(path)}:{n}: línea inválida") from None
+        if "format" in obj:
+            if obj["format"] != CHANGELOG_FORMAT:
+                raise ValueError(f"{os.path.basename(path)}:{n}: formato no soportado {obj['format']!r}")
+            continue
+        if obj.get("key") in _SETTINGS_KEYS:
+            changes.append(Change(obj["key"], obj.get("old"), obj.get("new"), float(obj.get("t", 0.0))))
+    return changes
+
+def replay(base, changes):
+    """Aplica changes en orden sobre base. Devuelve (settings, conflictos).
+
+    Un conflicto es un cambio cuyo valor anterior no coincide con el valor
+    actual (la base ya difería o la editó otro); igual se aplica.
+    """
+    settings = params_to_dict(base)
+    conflicts = []
+    for change in changes:
+        if settings[change.key] != change.old:
+            conflicts.append(change)
+        settings[change.key] = change.new
+    return settings, conflicts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aplica un registro de cambios sobre medidas base.")
+    parser.add_argument("base", help="Medidas base (.json de \"Guardar medidas\")")
+    parser.add_argument("changes", nargs="+", help="Registros .jsonl, en orden")
+    parser.add_argument("--out", required=True, help="Archivo .json de salida")
+    args = parser.parse_args(argv)
+    with open(args.base, encoding="utf-8") as f:
+        settings = json.load(f)
+    conflicts = []
+    total = 0
+    for path in args.changes:
+        changes = read_changes(path)
+        settings, c = replay(settings, changes)
+        conflicts.extend(c)
+        total += len(changes)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2, ensure_ascii=False)
+    for c in conflicts:
+        print(f"conflicto: {c.key} esperaba {c.old!r}, se aplicó {c.new!r}", file=sys.stderr)
+    print(f"{total} cambios aplicados ({len(conflicts)} conflictos) -> {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1010 @@
+"""Núcleo geométrico de Patronaje, sin dependencias de Blender.
+
+Contiene la plantilla base (y el cargador de plantillas .json), el solver
+de restricciones (transform_pattern_coordinates), la redistribución de
+curvas, el anclaje y la medición. Acepta un PatronParams, un dict con las claves de
+PATRON_SETTINGS_KEYS o cualquier objeto con esos atributos (por ejemplo
+el PropertyGroup del addon), así que puede importarse desde CPython puro.
+"""
+
+import hashlib
+import json
+import math
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Mapping
+from dataclasses import dataclass, asdict
+
+# === Geometría base (no tocar) ===
+PATRON_DATA_ORIGINAL = [
+    (-89.4295674999999, 108.368099999),  # 0 sup izq
+    # Curva superior izquierda (manga)
+    (-89.4295674999999, 46.210293973832),  # 1 inicio manga
+    (-85.4717625, 45.924545373832),
+    (-79.56484300000002, 45.106066473832),
+    (-70.62415600000001, 43.590944473832),
+    (-60.612256, 41.706009473832),
+    (-50.739038, 39.683699973832),
+    (-45.912316, 38.499673973832),
+    (-45.912316, 38.40),  # 8 (sisa)
+    (-50.739038, 39.60),
+    (-60.612256, 41.60),
+    (-70.62415600000001, 43.50),
+    (-79.56484300000002, 45.00),
+    (-85.4717625, 45.80),
+    (-89.4295674999999, 46.10),   # 14 (costura espalda)
+    (-89.4295674999999, 0.0),     # 15 inf izq
+    (0.0, 0.0),                    # 16 inf der (ORIGEN deseado)
+    # Curva interna derecha (cuello)
+    (0.0, 48.81875597), # 17
+    (-1.61574627, 48.94363393),
+    (-3.22292108, 49.25368203),
+    (-5.19177542, 50.00156821),
+    (-7.36759500, 51.29351360),
+    (-9.19916964, 52.97313001),
+    (-10.69661122, 54.96572999),
+    (-11.87160416, 57.19749147),
+    (-12.73489788, 59.59486630),
+    (-13.30018230, 62.08450426),
+    (-13.57806829, 64.59372045),
+    (-13.52570075, 67.38230419),
+    (-13.04997109, 70.42167816),
+    (-12.40017228, 72.64027494),
+    (-12.32340131, 72.65777902),  # 31 base cuello
+    (-12.97174391, 70.44492978),
+    (-13.44602725, 67.41508375),
+    (-13.49814071, 64.63712349),
+    (-13.22129670, 62.13781068),
+    (-12.65811112, 59.65731164),
+    (-11.79838684, 57.26972847),
+    (-10.62900278, 55.04849795),
+    (-9.13989736, 53.06685893),
+    (-7.31994600, 51.39777534),
+    (-5.15645058, 50.11334673),
+    (-3.20022792, 49.37039591),
+    (-1.60529273, 49.06294801),
+    (0.0, 48.94875597), # 44
+    (0.0, 108.368099999),  # 45 sup der
+]
+
+CURVE_UPPER_LEFT_INDICES = list(range(1, 15))   # Manga
+CURVE_INTERNAL_RIGHT_INDICES = list(range(17, 45))  # Cuello
+
+def get_bounds(data):
+    xs = [p[0] for p in data]; ys = [p[1] for p in data]
+    return {'width': max(xs) - min(xs), 'height': max(ys) - min(ys)}
+
+ORIGINAL_BOUNDS = get_bounds(PATRON_DATA_ORIGINAL)
+
+def redistribute_curve_vertices(curve_points, equidistant=True):
+    if not equidistant or len(curve_points) < 3:
+        return curve_points
+    dists = [0.0]
+    for i in range(1, len(curve_points)):
+        x0, y0 = curve_points[i-1]; x1, y1 = curve_points[i]
+        dists.append(dists[-1] + math.hypot(x1-x0, y1-y0))
+    total = dists[-1]
+    if total == 0.0:
+        return curve_points
+    seg = total / (len(curve_points)-1)
+    out = [curve_points[0]]
+    j = 1
+    for k in range(1, len(curve_points)-1):
+        target = k * seg
+        while j < len(curve_points) and dists[j] < target:
+            j += 1
+        j = min(j, len(curve_points)-1)
+        x0,y0 = curve_points[j-1]; x1,y1 = curve_points[j]
+        t = 0.0 if dists[j] == dists[j-1] else (target - dists[j-1])/(dists[j]-dists[j-1])
+        out.append((x0 + t*(x1-x0), y0 + t*(y1-y0)))
+    out.append(curve_points[-1])
+    return out
+
+# ===== Plantillas =====
+# Una plantilla declara sus puntos (en unidades de plantilla), los hitos que
+# usa el solver y las curvas de manga y cuello como rangos de índices. Los
+# datos derivados (extensión, puntos extremos de cada curva) se calculan una
+# vez al crearla; el solver sólo los escala.
+TEMPLATE_FORMAT = 1
+TEMPLATE_LANDMARKS = ("sup_izq", "sisa", "costura_espalda", "inf_izq", "origen", "base_cuello", "sup_der")
+TEMPLATE_CURVES = ("manga", "cuello")
+
+class TemplateError(ValueError):
+    """Plantilla con formato, puntos o índices inválidos."""
+
+# Los extremos son índices (el primero en caso de empate): sólo dependen del
+# orden de los valores, que una escala positiva no cambia.
+def _manga_extremes(points, manga):
+    mx, my = points[manga[0]]
+    return {"manga_x": max(manga, key=lambda i: abs(points[i][0] - mx)),
+            "manga_y": max(manga, key=lambda i: abs(points[i][1] - my))}
+
+def _cuello_extremes(points, cuello):
+    nx = points[cuello[0]][0]
+    return {"cuello_x": max(cuello, key=lambda i: abs(points[i][0] - nx)),
+            "cuello_top": max(cuello, key=lambda i: points[i][1]),
+            "cuello_bottom": min(cuello, key=lambda i: points[i][1])}
+
+def _outline_extremes(points):
+    every = range(len(points))
+    return {"top": max(every, key=lambda i: points[i][1]),
+            "bottom": min(every, key=lambda i: points[i][1])}
+
+def _template_extremes(points, manga, cuello):
+    """Índices de los puntos extremos que usa el solver."""
+    ext = _manga_extremes(points, manga)
+    ext.update(_cuello_extremes(points, cuello))
+    ext.update(_outline_extremes(points))
+    return ext
+
+class PatternTemplate:
+    """Plantilla base validada, con sus datos derivados precalculados.
+
+    points: [(x, y), ...] en unidades de plantilla (unit_m metros por unidad
+    antes de escalar a la tela). landmarks: {hito: índice} para cada nombre
+    de TEMPLATE_LANDMARKS. curves: {"manga": (primero, último), "cuello": ...}
+    inclusive; el primer punto de cada curva es su pivote de escala.
+    """
+
+    def __init__(self, points, landmarks, curves, name="", unit_m=0.05):
+        try:
+            pts = tuple((float(x), float(y)) for x, y in points)
+        except (TypeError, ValueError) as e:
+            raise TemplateError(f"Puntos inválidos: {e}") from None
+        n = len(pts)
+        if n < 8:
+            raise TemplateError(f"La plantilla necesita al menos 8 puntos (tiene {n})")
+        if not all(math.isfinite(v) for pt in pts for v in pt):
+            raise TemplateError("Hay coordenadas no finitas")
+        if not (isinstance(unit_m, (int, float)) and unit_m > 0.0):
+            raise TemplateError(f"unit_m debe ser positivo (es {unit_m!r})")
+
+        def index(label, value):
+            if isinstance(value, bool) or not isinstance(value, int) or not 0 <= value < n:
+                raise TemplateError(f"{label}: índice fuera de rango ({value!r})")
+            return value
+
+        lm = {}
+        for key in TEMPLATE_LANDMARKS:
+            if key not in landmarks:
+                raise TemplateError(f"Falta el hito '{key}'")
+            lm[key] = index(f"Hito '{key}'", landmarks[key])
+        ranges = {}
+        for key in TEMPLATE_CURVES:
+            try:
+                first, last = curves[key]
+            except (KeyError, TypeError, ValueError):
+                raise TemplateError(f"La curva '{key}' debe ser [primero, último]") from None
+            first = index(f"Curva '{key}'", first); last = index(f"Curva '{key}'", last)
+            if last - first < 2:
+                raise TemplateError(f"La curva '{key}' necesita al menos 3 puntos")
+            ranges[key] = range(first, last + 1)
+        manga, cuello = ranges["manga"], ranges["cuello"]
+        if manga[-1] >= cuello[0] and cuello[-1] >= manga[0]:
+            raise TemplateError("Las curvas de manga y cuello se superponen")
+        if not manga[0] < lm["sisa"] < manga[-1]:
+            raise TemplateError("La sisa debe estar dentro de la curva de manga")
+        if lm["costura_espalda"] not in manga:
+            raise TemplateError("La costura de espalda debe estar en la curva de manga")
+        if not cuello[0] < lm["base_cuello"] < cuello[-1]:
+            raise TemplateError("La base del cuello debe estar dentro de la curva de cuello")
+        for key in ("sup_izq", "inf_izq", "origen", "sup_der"):
+            if lm[key] in manga or lm[key] in cuello:
+                raise TemplateError(f"El hito '{key}' no puede ser parte de una curva")
+        bounds = get_bounds(pts)
+        if bounds['width'] <= 0.0 or bounds['height'] <= 0.0:
+            raise TemplateError("La plantilla no tiene ancho o alto")
+
+        self.name = str(name)
+        self.unit_m = float(unit_m)
+        self.points = pts
+        self.landmarks = lm
+        self.curves = {key: (r[0], r[-1]) for key, r in ranges.items()}
+        self.manga = manga
+        self.cuello = cuello
+        self.bounds = bounds
+        self.extremes = _template_extremes(pts, manga, cuello)
+        # Puntos ya multiplicados por unit_m: el solver sólo escala por sx, sy
+        self.norm_points = tuple((x * self.unit_m, y * self.unit_m) for x, y in pts)
+        # Índices que usa el solver, en el orden en que los desempaqueta
+        self.solver_indices = (lm["sup_izq"], lm["sup_der"], lm["inf_izq"], lm["origen"],
+                               manga[0], lm["sisa"], lm["costura_espalda"], cuello[0], lm["base_cuello"])
+        # Si el borde superior o inferior es un punto interno de una curva, la
+        # redistribución equidistante puede moverlo y hay que recalcularlo
+        interior = set(manga[1:-1]) | set(cuello[1:-1])
+        self.outline_extremes_on_curves = bool({self.extremes["top"], self.extremes["bottom"]} & interior)
+        text = json.dumps(self.as_dict(), sort_keys=True)
+        self.fingerprint = hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+    def __len__(self):
+        return len(self.points)
+
+    def __repr__(self):
+        return f"PatternTemplate({self.name!r}, {len(self.points)} puntos)"
+
+    def curve_spans(self):
+        """Tramos de curva entre hitos (inclusive): la sisa y la base del cuello parten cada curva."""
+        m, k = self.curves["manga"], self.curves["cuello"]
+        return {"manga": ((m[0], self.landmarks["sisa"]), (self.landmarks["sisa"], m[1])),
+                "cuello": ((k[0], self.landmarks["base_cuello"]), (self.landmarks["base_cuello"], k[1]))}
+
+    def as_dict(self):
+        """Formato .json de plantilla (inversa de template_from_dict)."""
+        return {"format": TEMPLATE_FORMAT, "name": self.name, "unit_m": self.unit_m,
+                "points": [list(pt) for pt in self.points], "landmarks": dict(self.landmarks),
+                "curves": {key: list(r) for key, r in self.curves.items()}}
+
+def template_from_dict(data):
+    """PatternTemplate a partir del contenido de un .json de plantilla."""
+    if not isinstance(data, Mapping):
+        raise TemplateError("La plantilla debe ser un objeto JSON")
+    if data.get("format") != TEMPLATE_FORMAT:
+        raise TemplateError(f"Formato de plantilla no soportado: {data.get('format')!r}")
+    for key in ("points", "landmarks", "curves"):
+        if key not in data:
+            raise TemplateError(f"Falta la clave '{key}'")
+    if not isinstance(data["landmarks"], Mapping) or not isinstance(data["curves"], Mapping):
+        raise TemplateError("'landmarks' y 'curves' deben ser objetos")
+    return PatternTemplate(data["points"], data["landmarks"], data["curves"],
+                           name=data.get("name", ""), unit_m=data.get("unit_m", 0.05))
+
+_TEMPLATE_FILES = {}
+
+def load_template(path):
+    """PatternTemplate desde un .json; se reutiliza mientras el archivo no cambie."""
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    cached = _TEMPLATE_FILES.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+        except ValueError as e:
+            raise TemplateError(f"JSON inválido: {e}") from None
+    template = template_from_dict(data)
+    _TEMPLATE_FILES[path] = (mtime, template)
+    return template
+
+DEFAULT_TEMPLATE = PatternTemplate(
+    PATRON_DATA_ORIGINAL,
+    {"sup_izq": 0, "sisa": 8, "costura_espalda": 14, "inf_izq": 15, "origen": 16,
+     "base_cuello": 31, "sup_der": 45},
+    {"manga": (CURVE_UPPER_LEFT_INDICES[0], CURVE_UPPER_LEFT_INDICES[-1]),
+     "cuello": (CURVE_INTERNAL_RIGHT_INDICES[0], CURVE_INTERNAL_RIGHT_INDICES[-1])},
+    name="remera_base",
+)
+
+# === Lista de propiedades a guardar/cargar ===
+PATRON_SETTINGS_KEYS = [
+    # Dimensiones
+    "pattern_width", "pattern_height", "mantener_proporcion",
+    # Manga
+    "usar_mitad_auto", "curve_upper_depth_cm",
+    "manga_usar_escala_x", "manga_limitar_x_a_mitad",
+    "curve_upper_scale_x", "curve_upper_scale_y",
+    "curve_upper_position_y", "manga_equidistante",
+    "lock_manga_lengths",
+    # Cuello
+    "cuello_seguir_patron", "cuello_scale_x", "cuello_scale_y",
+    "cuello_profundidad_cm", "curve_internal_position_y",
+    "cuello_equidistante", "cuello_limitar_altura", "lock_neck_lengths",
+    # Posición objeto
+    "pattern_position_x", "pattern_position_y", "pattern_position_z",
+    "vista_frontal_xz",
+    # Entradas manuales Manga
+    "man_enable_v8_left", "man_v8_left_cm",
+    "man_enable_v8_bottom", "man_v8_bottom_cm",
+    "man_enable_v14_bottom", "man_v14_bottom_cm",
+    "man_enable_sisa_sisa", "man_sisa_sisa_cm",
+    # Entradas manuales Cuello
+    "man_enable_base", "man_base_cm",
+    "man_enable_base_total", "man_base_total_cm",
+    "man_enable_len_base", "man_len_base_cm",
+    "man_enable_len_17", "man_len_17_cm",
+]
+
+@dataclass
+class PatronParams:
+    """Parámetros del patrón; mismos nombres y valores por defecto que PatronShapeProperties."""
+    # Dimensiones
+    pattern_width: float = 67.5
+    pattern_height: float = 80.0
+    mantener_proporcion: bool = False
+    # Manga
+    usar_mitad_auto: bool = True
+    curve_upper_depth_cm: float = 30.0
+    manga_usar_escala_x: bool = False
+    manga_limitar_x_a_mitad: bool = True
+    curve_upper_scale_x: float = 1.0
+    curve_upper_scale_y: float = 1.0
+    curve_upper_position_y: float = 0.0
+    manga_equidistante: bool = False
+    lock_manga_lengths: bool = False
+    # Cuello
+    cuello_seguir_patron: bool = True
+    cuello_scale_x: float = 1.0
+    cuello_scale_y: float = 1.0
+    cuello_profundidad_cm: float = 0.0
+    curve_internal_position_y: float = 0.0
+    cuello_equidistante: bool = False
+    cuello_limitar_altura: bool = True
+    lock_neck_lengths: bool = False
+    # Posición objeto
+    pattern_position_x: float = 0.0
+    pattern_position_y: float = 0.0
+    pattern_position_z: float = 0.0
+    vista_frontal_xz: bool = True
+    # Entradas manuales Manga
+    man_enable_v8_left: bool = False
+    man_v8_left_cm: float = 20.0
+    man_enable_v8_bottom: bool = False
+    man_v8_bottom_cm: float = 25.0
+    man_enable_v14_bottom: bool = False
+    man_v14_bottom_cm: float = 25.0
+    man_enable_sisa_sisa: bool = False
+    man_sisa_sisa_cm: float = 40.0
+    # Entradas manuales Cuello
+    man_enable_base: bool = False
+    man_base_cm: float = 8.0
+    man_enable_base_total: bool = False
+    man_base_total_cm: float = 16.0
+    man_enable_len_base: bool = False
+    man_len_base_cm: float = 20.0
+    man_enable_len_17: bool = False
+    man_len_17_cm: float = 20.0
+
+PATRON_DEFAULTS = asdict(PatronParams())
+
+# Medida manual -> interruptor que la habilita (man_*_cm -> man_enable_*)
+MANUAL_ENABLE_KEYS = {
+    "man_v8_left_cm": "man_enable_v8_left",
+    "man_v8_bottom_cm": "man_enable_v8_bottom",
+    "man_v14_bottom_cm": "man_enable_v14_bottom",
+    "man_sisa_sisa_cm": "man_enable_sisa_sisa",
+    "man_base_cm": "man_enable_base",
+    "man_base_total_cm": "man_enable_base_total",
+    "man_len_base_cm": "man_enable_len_base",
+    "man_len_17_cm": "man_enable_len_17",
+}
+
+def as_params(source):
+    """dict -> PatronParams (claves ausentes con su valor por defecto).
+    PatronParams y objetos con atributos se devuelven tal cual.
+    """
+    if isinstance(source, Mapping):
+        return PatronParams(**{k: source[k] for k in PATRON_SETTINGS_KEYS if k in source})
+    return source
+
+def params_to_dict(source):
+    """Valores de PATRON_SETTINGS_KEYS como dict (formato de 'Guardar medidas')."""
+    source = as_params(source)
+    return {key: getattr(source, key) for key in PATRON_SETTINGS_KEYS}
+
+# ===== Helpers de anclaje/orientación =====
+def _apply_orientation_and_anchor(coords_xy_m, anchor_index=16, frontal=False):
+    ax, ay = coords_xy_m[anchor_index]
+    if frontal:
+        return [(x - ax, 0.0, y - ay) for (x, y) in coords_xy_m]
+    return [(x - ax, y - ay, 0.0) for (x, y) in coords_xy_m]
+
+# ===== Reporte de medidas (una sola pasada) =====
+def _round_half_up(val, decimals):
+    f = 10**decimals
+    return math.floor(val*f + 0.5)/f
+
+@dataclass(frozen=True)
+class PatternMeasurements:
+    """Medidas clave de un patrón resuelto (cm / cm²), calculadas una vez.
+
+    Los nombres siguen las entradas manuales: v8 = sisa, v14 = costura de
+    espalda, 31 = base del cuello, 17 = inicio del cuello.
+    """
+    v8_left: float          # sisa -> borde lateral izquierdo
+    v8_right: float         # sisa -> borde derecho (mitad de sisa a sisa)
+    v8_bottom: float        # altura de la sisa
+    sisa_sisa: float
+    v14_bottom: float       # altura de la costura de espalda
+    base: float             # base del cuello (mitad)
+    base_total: float
+    len_base: float         # borde inferior -> base del cuello (31)
+    len_17: float           # borde inferior -> cuello (17)
+    fabric_width: float     # extensión del contorno
+    fabric_height: float
+    perimeter: float        # perímetro del contorno (línea de corte)
+    area: float             # área encerrada por el contorno
+
+    def rounded(self, decimals=1):
+        """Valores redondeados como en el panel (medio hacia arriba)."""
+        vals = {k: _round_half_up(v, decimals) for k, v in asdict(self).items()}
+        # Los totales se muestran como el doble de la mitad ya redondeada
+        vals["sisa_sisa"] = round(vals["v8_right"] * 2.0, decimals)
+        vals["base_total"] = round(vals["base"] * 2.0, decimals)
+        return PatternMeasurements(**vals)
+
+    def as_dict(self):
+        return asdict(self)
+
+def measure_pattern(props, coords, template=None):
+    """PatternMeasurements en una sola pasada sobre coords (ya ancladas)."""
+    props = as_params(props)
+    t = template or DEFAULT_TEMPLATE
+    lm = t.landmarks
+    v = 2 if props.vista_frontal_xz else 1
+    cm = 100.0
+    min_x = max_x = coords[0][0]
+    min_v = max_v = coords[0][v]
+    perimeter = 0.0
+    area2 = 0.0
+    px, pv = coords[-1][0], coords[-1][v]
+    for c in coords:
+        x, y = c[0], c[v]
+        if x < min_x: min_x = x
+        elif x > max_x: max_x = x
+        if y < min_v: min_v = y
+        elif y > max_v: max_v = y
+        perimeter += math.hypot(x - px, y - pv)
+        area2 += px * y - x * pv
+        px, pv = x, y
+
+    left_x = -(props.pattern_width * 0.01)
+    right_x = 0.0
+    def lateral_left(i): return max(0.0, (coords[i][0] - left_x) * cm)
+    def lateral_right(i): return max(0.0, (right_x - coords[i][0]) * cm)
+    def height(i): return max(0.0, (coords[i][v] - min_v) * cm)
+
+    i8, i14, i31, i17 = lm["sisa"], lm["costura_espalda"], lm["base_cuello"], t.cuello[0]
+    v8_right = lateral_right(i8)
+    base = lateral_right(i31)
+    return PatternMeasurements(
+        v8_left=lateral_left(i8), v8_right=v8_right, v8_bottom=height(i8),
+        sisa_sisa=v8_right * 2.0, v14_bottom=height(i14),
+        base=base, base_total=base * 2.0,
+        len_base=height(i31), len_17=height(i17),
+        fabric_width=(max_x - min_x) * cm, fabric_height=(max_v - min_v) * cm,
+        perimeter=perimeter * cm, area=abs(area2) * 0.5 * cm * cm,
+    )
+
+# ===== Traza del solver =====
+class SolverTrace:
+    """Registro opcional de una resolución: ramas tomadas, límites aplicados y tiempos.
+
+    Se pasa como trace= a transform_pattern_coordinates; sin traza el solver
+    sólo paga una comparación con None por punto instrumentado.
+    """
+
+    def __init__(self):
+        self.branches = []   # (etapa, decisión, detalle)
+        self.clamps = []     # (nombre, antes, después)
+        self.timings = {}    # etapa -> segundos
+        self._stage = None
+        self._t0 = 0.0
+
+    def stage(self, name):
+        """Cierra la etapa en curso y abre name (None sólo cierra)."""
+        now = time.perf_counter()
+        if self._stage is not None:
+            self.timings[self._stage] = self.timings.get(self._stage, 0.0) + (now - self._t0)
+        self._stage = name
+        self._t0 = now
+
+    def branch(self, decision, **detail):
+        self.branches.append((self._stage, decision, detail))
+
+    def clamp(self, name, before, after):
+        self.clamps.append((name, before, after))
+
+    @property
+    def active_clamps(self):
+        """Límites que cambiaron el valor."""
+        return [c for c in self.clamps if c[1] != c[2]]
+
+    @property
+    def total_time(self):
+        return sum(self.timings.values())
+
+    def as_dict(self):
+        return {
+            "branches": [{"stage": st, "decision": d, **detail} for st, d, detail in self.branches],
+            "clamps": [{"name": n, "before": b, "after": a, "changed": b != a} for n, b, a in self.clamps],
+            "timings_ms": {k: v * 1000.0 for k, v in self.timings.items()},
+            "total_ms": self.total_time * 1000.0,
+        }
+
+    def dump(self, path, settings=None):
+        """Guarda la traza (y opcionalmente las medidas que la produjeron) como JSON."""
+        data = self.as_dict()
+        if settings is not None:
+            data["settings"] = params_to_dict(settings)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+def solve_traced(props, template=None):
+    """(coords, SolverTrace) resolviendo sin caché."""
+    trace = SolverTrace()
+    coords = transform_pattern_coordinates(props, trace=trace, template=template)
+    return coords, trace
+
+# ===== Núcleo de transformación =====
+def transform_pattern_coordinates(props, trace=None, template=None):
+    props = as_params(props)
+    t = template or DEFAULT_TEMPLATE
+    manga, cuello = t.manga, t.cuello
+    i_top_l, i_top_r, i_bot_l, i_anchor, i1, i8, i14, i17, i31 = t.solver_indices
+    if trace is not None:
+        trace.stage("escala")
+    unit = 0.01  # cm -> m
+    MIN_GAP_CM = 0.5   # gap mínimo para evitar encimado (0.5 cm)
+    MIN_GAP_M  = MIN_GAP_CM * unit
+
+    # 1) Escala global del patrón
+    sx_w = (props.pattern_width * unit) / (t.bounds['width'] * t.unit_m)
+    sy_h = (props.pattern_height * unit) / (t.bounds['height'] * t.unit_m)
+    sx = sx_w
+    sy = sx_w if props.mantener_proporcion else sy_h
+
+    # 2) Base escalada (XY en metros, sin anclar)
+    base = [(x * sx, y * sy) for (x, y) in t.norm_points]
+
+    # BORDES REALES DE LA TELA (EXCLUYENDO CURVA MANGA)
+    # Top = vértices superiores (0 y 45 en la plantilla incluida)
+    top_fabric_y = max(base[i_top_l][1], base[i_top_r][1])
+    # Bottom = vértices inferiores (15 y 16)
+    bottom_fabric_y = min(base[i_bot_l][1], base[i_anchor][1])
+
+    # 3) Equidistancias opcionales
+    if trace is not None:
+        trace.branch("proporcion" if props.mantener_proporcion else "ancho_alto", sx=sx, sy=sy)
+        trace.stage("equidistancia")
+    if props.manga_equidistante:
+        pts = [base[i] for i in manga]
+        red = redistribute_curve_vertices(pts, True)
+        for k, idx in enumerate(manga):
+            base[idx] = red[k]
+    if props.cuello_equidistante:
+        pts = [base[i] for i in cuello]
+        red = redistribute_curve_vertices(pts, True)
+        for k, idx in enumerate(cuello):
+            base[idx] = red[k]
+    # Puntos extremos precalculados; sólo se recalculan los de curvas redistribuidas
+    ext = t.extremes
+    if props.manga_equidistante or props.cuello_equidistante:
+        ext = dict(ext)
+        if props.manga_equidistante:
+            ext.update(_manga_extremes(base, manga))
+        if props.cuello_equidistante:
+            ext.update(_cuello_extremes(base, cuello))
+        if t.outline_extremes_on_curves:
+            ext.update(_outline_extremes(base))
+
+    # Vértices de referencia
+    ax, ay = base[i_anchor]
+    cx, cy = base[i1]
+    x8, y8 = base[i8]
+    y14 = base[i14][1]
+    neck_cx, neck_cy = base[i17]
+
+    # === Factores baseline (MANGA) ===
+    if trace is not None:
+        trace.stage("manga")
+    max_x_off = abs(base[ext["manga_x"]][0] - cx) or 1e-9
+    target_depth_cm = (props.pattern_width / 2.0) if props.usar_mitad_auto else min(props.curve_upper_depth_cm, props.pattern_width/2.0)
+    x_factor_from_depth = (target_depth_cm * unit) / max_x_off
+    if props.manga_usar_escala_x:
+        manga_factor_x = props.curve_upper_scale_x
+        if props.manga_limitar_x_a_mitad:
+            cap_m = (props.pattern_width / 2.0) * unit
+            manga_factor_x = min(manga_factor_x, cap_m / max_x_off)
+            if trace is not None:
+                trace.clamp("manga_x_mitad", props.curve_upper_scale_x, manga_factor_x)
+    else:
+        manga_factor_x = x_factor_from_depth
+    if trace is not None:
+        trace.branch("manga_x_escala" if props.manga_usar_escala_x else "manga_x_profundidad",
+                     factor_x=manga_factor_x)
+    cap_m = (props.pattern_width / 2.0) * unit
+    cur_max_y = abs(base[ext["manga_y"]][1] - cy) or 1e-9
+    manga_factor_y = min(props.curve_upper_scale_y, cap_m / cur_max_y)
+    if trace is not None:
+        trace.clamp("manga_escala_y", props.curve_upper_scale_y, manga_factor_y)
+
+    # === Overrides manuales (MANGA, ancho) ===
+    left_x  = -(props.pattern_width * unit)
+    if props.man_enable_sisa_sisa and props.man_sisa_sisa_cm > 0.0:
+        target_half_m = (props.man_sisa_sisa_cm * unit) / 2.0
+        target_x_anchor = -target_half_m
+        denom = (x8 - cx) or 1e-9
+        manga_factor_x = (target_x_anchor + ax - cx) / denom
+    elif props.man_enable_v8_left and props.man_v8_left_cm >= 0.0:
+        target_left_m = props.man_v8_left_cm * unit
+        target_x_anchor = left_x + target_left_m
+        denom = (x8 - cx) or 1e-9
+        manga_factor_x = (target_x_anchor + ax - cx) / denom
+    if trace is not None:
+        if props.man_enable_sisa_sisa and props.man_sisa_sisa_cm > 0.0:
+            trace.branch("manual_sisa_sisa", factor_x=manga_factor_x)
+        elif props.man_enable_v8_left and props.man_v8_left_cm >= 0.0:
+            trace.branch("manual_v8_left", factor_x=manga_factor_x)
+
+    if props.manga_limitar_x_a_mitad:
+        before = manga_factor_x
+        manga_factor_x = min(manga_factor_x, (props.pattern_width * unit / 2.0) / max_x_off)
+        if trace is not None:
+            trace.clamp("manga_x_mitad", before, manga_factor_x)
+
+    # === MANGA: independencia vertical v8/v14 con preservación de GAP ===
+    y8_no_off  = cy + (y8  - cy) * manga_factor_y
+    y14_no_off = cy + (y14 - cy) * manga_factor_y
+
+    # Usamos SIEMPRE el borde de la tela como referencia para largos verticales
+    bottom_edge_for_manga = bottom_fabric_y
+
+    s_my = 1.0
+    off_my = 0.01 * props.curve_upper_position_y
+
+    L8_enabled  = props.man_enable_v8_bottom
+    L14_enabled = props.man_enable_v14_bottom
+    L8_m  = props.man_v8_bottom_cm  * unit
+    L14_m = props.man_v14_bottom_cm * unit
+
+    if L8_enabled and L14_enabled and not props.lock_manga_lengths:
+        denom = (y8_no_off - y14_no_off)
+        if abs(denom) > 1e-9:
+            s_my = (L8_m - L14_m) / denom
+        else:
+            s_my = 1.0
+        off_my = (bottom_edge_for_manga + L14_m) - (cy + s_my * (y14_no_off - cy))
+        if trace is not None:
+            trace.branch("manga_largos_v8_v14", s_my=s_my, off_my=off_my)
+    else:
+        s_my = 1.0
+        if L8_enabled:
+            off_my = (bottom_edge_for_manga + L8_m) - y8_no_off
+            if trace is not None:
+                trace.branch("manga_largo_v8", off_my=off_my)
+        elif L14_enabled:
+            off_my = (bottom_edge_for_manga + L14_m) - y14_no_off
+            if trace is not None:
+                trace.branch("manga_largo_v14", off_my=off_my)
+        else:
+            before = off_my
+            off_my = max(-0.20, min(0.20, off_my))
+            if trace is not None:
+                trace.branch("manga_posicion_libre", off_my=off_my)
+                trace.clamp("manga_posicion_20cm", before, off_my)
+
+    # >>> Preservar GAP manga (evitar encimado de v8 y v14)
+    gap_base_m = abs(y8_no_off - y14_no_off)
+    if gap_base_m < 1e-9:
+        gap_base_m = 1e-9
+    s_min_gap = MIN_GAP_M / gap_base_m
+    if trace is not None:
+        trace.clamp("manga_gap_minimo", s_my, max(s_my, s_min_gap))
+    if s_my < s_min_gap:
+        s_my = s_min_gap
+        if L8_enabled and L14_enabled and not props.lock_manga_lengths:
+            off_my = (bottom_edge_for_manga + L14_m) - (cy + s_my * (y14_no_off - cy))
+        elif L8_enabled:
+            off_my = (bottom_edge_for_manga + L8_m) - (cy + s_my * (y8_no_off - cy))
+        elif L14_enabled:
+            off_my = (bottom_edge_for_manga + L14_m) - (cy + s_my * (y14_no_off - cy))
+
+    # >>> Límites 2 cm para la MANGA (#1, sisa #8 y costura espalda #14)
+    y1_orig   = base[i1][1]
+    y1_no_off = cy + (y1_orig - cy) * manga_factor_y
+
+    margin_top    = 0.02  # 2 cm
+    margin_bottom = 0.02  # 2 cm
+
+    # Restrición superior: ninguno de los 3 puede superar top_fabric_y - 2cm
+    off_max1 = top_fabric_y - margin_top - (cy + s_my * (y1_no_off  - cy))
+    off_max2 = top_fabric_y - margin_top - (cy + s_my * (y8_no_off  - cy))
+    off_max3 = top_fabric_y - margin_top - (cy + s_my * (y14_no_off - cy))
+    allowed_off_max = min(off_max1, off_max2, off_max3)
+
+    # Restricción inferior: sisa y costura de espalda no pueden bajar de bottom_fabric_y + 2cm
+    off_min_8  = bottom_fabric_y + margin_bottom - (cy + s_my * (y8_no_off  - cy))
+    off_min_14 = bottom_fabric_y + margin_bottom - (cy + s_my * (y14_no_off - cy))
+    allowed_off_min = max(off_min_8, off_min_14)
+
+    # Clampear off_my dentro del rango permitido
+    off_before = off_my
+    if allowed_off_min > allowed_off_max:
+        # Si las restricciones se cruzan, priorizamos que no se salgan por arriba
+        off_my = min(off_my, allowed_off_max)
+    else:
+        if off_my > allowed_off_max:
+            off_my = allowed_off_max
+        if off_my < allowed_off_min:
+            off_my = allowed_off_min
+    if trace is not None:
+        if allowed_off_min > allowed_off_max:
+            trace.branch("manga_offset_cruce", allowed_off_min=allowed_off_min, allowed_off_max=allowed_off_max)
+        trace.clamp("manga_offset_limite", off_before, off_my)
+        trace.stage("cuello_x")
+
+    # === Factores baseline (CUELLO) con CAP absoluto mitad de ancho ===
+    if props.cuello_seguir_patron:
+        def neck_dxdy(idx):
+            bx, by = base[idx]; return (bx - neck_cx, by - neck_cy)
+    else:
+        def neck_dxdy(idx):
+            bx, by = base[idx]; return ((bx - neck_cx)/sx, (by - neck_cy)/sy)
+
+    neck_base_max_x = abs(neck_dxdy(ext["cuello_x"])[0]) or 1e-9
+    half_width_m = (props.pattern_width * unit) / 2.0
+    depth_cm_cap = min(props.cuello_profundidad_cm, props.pattern_width / 2.0)
+    depth_mult = (depth_cm_cap * unit / neck_base_max_x) if depth_cm_cap > 0.0 else 1.0
+
+    neck_mult_x_total = props.cuello_scale_x * depth_mult
+    max_sx_half = half_width_m / neck_base_max_x
+    if trace is not None:
+        trace.branch("cuello_sigue_patron" if props.cuello_seguir_patron else "cuello_independiente",
+                     depth_mult=depth_mult)
+        trace.clamp("cuello_x_mitad", neck_mult_x_total, min(neck_mult_x_total, max_sx_half))
+    neck_mult_x_total = min(neck_mult_x_total, max_sx_half)
+
+    neck_mult_y_total = props.cuello_scale_y
+    top_edge_y_tmp = base[ext["top"]][1]; bottom_edge_y_tmp = base[ext["bottom"]][1]
+    margin = 0.02
+    allowed_gap = (top_edge_y_tmp - margin) - (bottom_edge_y_tmp + margin)
+    base_h = max(1e-9, neck_dxdy(ext["cuello_top"])[1] - neck_dxdy(ext["cuello_bottom"])[1])
+    max_sy = max(0.0, allowed_gap / base_h)
+    if trace is not None:
+        trace.clamp("cuello_escala_y", neck_mult_y_total, min(neck_mult_y_total, max_sy))
+    neck_mult_y_total = min(neck_mult_y_total, max_sy)
+
+    # === Overrides manuales (CUELLO, base en X) + CAP mitad de ancho ===
+    dx31, _ = neck_dxdy(i31)
+    if props.man_enable_base_total and props.man_base_total_cm > 0.0:
+        target_half_m = (props.man_base_total_cm * unit) / 2.0
+        target_x_anchor = -target_half_m
+        denom = dx31 or 1e-9
+        neck_mult_x_total = (target_x_anchor + ax - neck_cx) / denom
+    elif props.man_enable_base and props.man_base_cm >= 0.0:
+        target_m = props.man_base_cm * unit
+        target_x_anchor = -target_m
+        denom = dx31 or 1e-9
+        neck_mult_x_total = (target_x_anchor + ax - neck_cx) / denom
+    if trace is not None:
+        if props.man_enable_base_total and props.man_base_total_cm > 0.0:
+            trace.branch("manual_base_total", mult_x=neck_mult_x_total)
+        elif props.man_enable_base and props.man_base_cm >= 0.0:
+            trace.branch("manual_base", mult_x=neck_mult_x_total)
+        trace.clamp("cuello_x_mitad", neck_mult_x_total, min(neck_mult_x_total, max_sx_half))
+    neck_mult_x_total = min(neck_mult_x_total, max_sx_half)
+
+    # === Regla frontera sisa para X (si y(17) < y(8)) ===
+    y8_actual_manga = cy + s_my * (y8_no_off - cy) + off_my
+    y17_no_off_y = neck_cy + neck_dxdy(i17)[1] * neck_mult_y_total
+    if y17_no_off_y < y8_actual_manga:
+        x8_actual = cx + (x8 - cx) * manga_factor_x
+        if abs(dx31) > 1e-9:
+            sx_frontera = (x8_actual - 0.02 - neck_cx) / dx31
+            if neck_mult_x_total > 1.0 and dx31 > 0.0:
+                if trace is not None:
+                    trace.branch("frontera_sisa", y17=y17_no_off_y, y8=y8_actual_manga)
+                    trace.clamp("frontera_sisa", neck_mult_x_total, min(neck_mult_x_total, sx_frontera))
+                neck_mult_x_total = min(neck_mult_x_total, sx_frontera)
+    if trace is not None:
+        trace.clamp("cuello_x_mitad", neck_mult_x_total, min(neck_mult_x_total, max_sx_half))
+        trace.stage("cuello_y")
+    neck_mult_x_total = min(neck_mult_x_total, max_sx_half)
+
+    # === Aplicar transformaciones base (sin offset de cuello) ===
+    # Las curvas son rangos contiguos: se recorren directamente, sin buscar índices
+    out_xy = list(base)
+    for i in manga:
+        x, y = base[i]
+        y_scaled = cy + (y - cy) * manga_factor_y
+        out_xy[i] = (cx + (x - cx) * manga_factor_x, cy + s_my * (y_scaled - cy) + off_my)
+    for i in cuello:
+        dx, dy = neck_dxdy(i)
+        out_xy[i] = (neck_cx + dx * neck_mult_x_total, neck_cy + dy * neck_mult_y_total)
+
+    # === Offset/escala vertical del cuello con independencia 31/17 + PRESERVACIÓN DE GAP ===
+    bottom_edge_y_before = min(y for (_, y) in out_xy)
+
+    y31_no_off = out_xy[i31][1]
+    y17_no_off = out_xy[i17][1]
+
+    L31_enabled = props.man_enable_len_base
+    L17_enabled = props.man_enable_len_17
+    L31_m = props.man_len_base_cm * unit
+    L17_m = props.man_len_17_cm * unit
+
+    s_extra = 1.0
+    desired_off_m = props.curve_internal_position_y * unit
+
+    if L31_enabled and L17_enabled and not props.lock_neck_lengths:
+        denom = (y31_no_off - y17_no_off)
+        if abs(denom) > 1e-9:
+            s_extra = (L31_m - L17_m) / denom
+        else:
+            s_extra = 1.0
+        desired_off_m = (bottom_edge_y_before + L17_m) - (neck_cy + s_extra * (y17_no_off - neck_cy))
+
+        ys_all2 = [y for (_, y) in out_xy]
+        top_edge_y = max(ys_all2); bottom_edge_y = min(ys_all2)
+        margin = 0.02
+        neck_y_vals = [out_xy[i][1] for i in cuello]
+        dy_cur_max = max(neck_y_vals) - neck_cy
+        dy_cur_min = min(neck_y_vals) - neck_cy
+        s_top = (top_edge_y - margin - (neck_cy + desired_off_m)) / (dy_cur_max if dy_cur_max != 0 else 1e-9)
+        s_bottom = (bottom_edge_y + margin - (neck_cy + desired_off_m)) / (dy_cur_min if dy_cur_min != 0 else -1e-9)
+        s_allowed = min(s_top if s_top > 0 else 1e9, s_bottom if s_bottom > 0 else 1e9)
+        s_before = s_extra
+        s_extra = max(0.0, min(s_extra, s_allowed))
+
+        allowed_max_31 = out_xy[i_top_l][1] - 0.02
+        y31_after = neck_cy + s_extra * (y31_no_off - neck_cy) + desired_off_m
+        off_before = desired_off_m
+        if y31_after > allowed_max_31:
+            desired_off_m = allowed_max_31 - (neck_cy + s_extra * (y31_no_off - neck_cy))
+        if trace is not None:
+            trace.branch("cuello_largos_31_17", s_extra=s_extra, offset=desired_off_m)
+            trace.clamp("cuello_escala_extra", s_before, s_extra)
+            trace.clamp("cuello_base_tope", off_before, desired_off_m)
+
+        for i in cuello:
+            nx, ny = out_xy[i]
+            ny = neck_cy + s_extra * (ny - neck_cy) + desired_off_m
+            out_xy[i] = (nx, ny)
+
+    else:
+        if L31_enabled and not L17_enabled:
+            target_y31 = bottom_edge_y_before + L31_m
+            delta = target_y31 - y31_no_off
+        elif L17_enabled and not L31_enabled:
+            target_y17 = bottom_edge_y_before + L17_m
+            delta = target_y17 - y17_no_off
+        elif props.lock_neck_lengths and (L31_enabled or L17_enabled):
+            if L31_enabled and L17_enabled:
+                target_y17 = bottom_edge_y_before + L17_m
+                delta = target_y17 - y17_no_off
+            elif L31_enabled:
+                target_y31 = bottom_edge_y_before + L31_m
+                delta = target_y31 - y31_no_off
+            else:
+                target_y17 = bottom_edge_y_before + L17_m
+                delta = target_y17 - y17_no_off
+        else:
+            delta = max(-0.15, min(0.15, props.curve_internal_position_y * unit))
+        if trace is not None:
+            if L31_enabled and not L17_enabled:
+                trace.branch("cuello_largo_31", delta=delta)
+            elif L17_enabled and not L31_enabled:
+                trace.branch("cuello_largo_17", delta=delta)
+            elif props.lock_neck_lengths and (L31_enabled or L17_enabled):
+                trace.branch("cuello_largos_bloqueados", delta=delta)
+            else:
+                trace.branch("cuello_posicion_libre", delta=delta)
+                trace.clamp("cuello_posicion_15cm", props.curve_internal_position_y * unit, delta)
+            delta_before = delta
+
+        ys_all2 = [y for (_, y) in out_xy]
+        top_edge_y = max(ys_all2); bottom_edge_y = min(ys_all2)
+        margin = 0.02
+
+        neck_y_vals = [out_xy[i][1] for i in cuello]
+        y_min_no_off = min(neck_y_vals)
+        y_max_no_off = max(neck_y_vals)
+
+        delta_max_up   = (top_edge_y - margin)    - y_max_no_off
+        delta_max_down = (bottom_edge_y + margin) - y_min_no_off
+        delta = max(delta_max_down, min(delta, delta_max_up))
+
+        allowed_max_31 = out_xy[i_top_l][1] - 0.02
+        if y31_no_off + delta > allowed_max_31:
+            delta = allowed_max_31 - y31_no_off
+        if trace is not None:
+            trace.clamp("cuello_desplazamiento_limite", delta_before, delta)
+
+        for i in cuello:
+            nx, ny = out_xy[i]
+            ny = ny + delta
+            out_xy[i] = (nx, ny)
+
+    # Contención vertical absoluta con margen 2 cm para el cuello
+    if trace is not None:
+        trace.stage("contencion")
+    ys_all = [y for (_, y) in out_xy]
+    top_edge_y = max(ys_all)
+    bottom_edge_y = min(ys_all)
+    margin = 0.02
+    allowed_max = top_edge_y - margin
+    allowed_min = bottom_edge_y + margin
+    neck_max = max(out_xy[i][1] for i in cuello)
+    neck_min = min(out_xy[i][1] for i in cuello)
+    corr = 0.0
+    if neck_max > allowed_max:
+        corr = allowed_max - neck_max
+    elif neck_min < allowed_min:
+        corr = allowed_min - neck_min
+    if corr != 0.0:
+        for i in cuello:
+            nx, ny = out_xy[i]
+            out_xy[i] = (nx, ny + corr)
+    if trace is not None:
+        trace.clamp("cuello_contencion", 0.0, corr)
+        trace.stage("anclaje")
+
+    # 5) Anclar y orientar
+    out_xyz = _apply_orientation_and_anchor(out_xy, anchor_index=i_anchor, frontal=props.vista_frontal_xz)
+    if trace is not None:
+        trace.stage(None)
+    return out_xyz
+
+# ===== Caché del solver (LRU por estado de parámetros) =====
+SOLVER_CACHE_SIZE = 64
+
+def _settings_key(props):
+    """Tupla exacta de valores de PATRON_SETTINGS_KEYS (clave de caché)."""
+    props = as_params(props)
+    return tuple(getattr(props, key) for key in PATRON_SETTINGS_KEYS)
+
+class SolverCache:
+    """LRU acotado: un único resultado resuelto por estado de parámetros."""
+    def __init__(self, maxsize=SOLVER_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, key, compute):
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            value = compute()
+            self._data[key] = value
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return value
+        self.hits += 1
+        self._data.move_to_end(key)
+        return value
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._data), 'maxsize': self.maxsize}
+
+SOLVER_CACHE = SolverCache()
+
+class SolvedPattern:
+    """Resultado cacheado: coordenadas y, calculadas a demanda una sola vez, sus medidas."""
+    __slots__ = ("params", "coords", "template", "_measurements")
+
+    def __init__(self, params, coords, template=None):
+        self.params = params
+        self.coords = coords
+        self.template = template
+        self._measurements = None
+
+    @property
+    def measurements(self):
+        if self._measurements is None:
+            self._measurements = measure_pattern(self.params, self.coords, self.template)
+        return self._measurements
+
+def solve(props, template=None):
+    """SolvedPattern compartido por estado de parámetros y plantilla (caché LRU)."""
+    t = template or DEFAULT_TEMPLATE
+    def compute():
+        params = as_params(params_to_dict(props))
+        return SolvedPattern(params, tuple(transform_pattern_coordinates(params, template=t)), t)
+    return SOLVER_CACHE.get(_settings_key(props) + (t.fingerprint,), compute)
+
+def solve_pattern(props, template=None):
+    """Coordenadas resueltas (tupla inmutable) compartidas por draw, update y medición."""
+    return solve(props, template).coords
+
+def pattern_measurements(props, template=None):
+    """PatternMeasurements del estado actual (cacheado junto a las coordenadas)."""
+    return solve(props, template).measurements
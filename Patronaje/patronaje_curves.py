@@ -0,0 +1,199 @@
+"""Curvas de manga y cuello como splines suaves (sin Blender).
+
+Cada curva se representa como una spline Catmull-Rom centrípeta que pasa
+por los vértices resueltos. Al construirla se precalcula una tabla de
+longitud de arco (y de una medida ponderada por curvatura), así que
+muestrear n puntos cuesta O(n log L): una búsqueda binaria por punto en la
+tabla, sin recorrer la polilínea de entrada por cada salida.
+
+Las curvas se parten en los puntos de giro (sisa 8 y base del cuello 31)
+para conservar esas esquinas y sus índices como hitos.
+"""
+
+import math
+from bisect import bisect_left
+from collections import OrderedDict
+
+from patronaje_core import DEFAULT_TEMPLATE
+
+LUT_STEPS_PER_SEGMENT = 16
+SPLINE_CACHE_SIZE = 128
+MAX_DENSITY_GAIN = 8.0   # tope del refinamiento por curvatura (por unidad de adaptividad)
+
+# Tramos de curva entre hitos de la plantilla incluida (índices de vértice, inclusive)
+CURVE_SPANS = DEFAULT_TEMPLATE.curve_spans()
+
+class CurveSpline:
+    """Spline Catmull-Rom centrípeta con tabla de longitud de arco."""
+
+    def __init__(self, points, alpha=0.5, steps=LUT_STEPS_PER_SEGMENT):
+        pts = [(float(x), float(y)) for x, y in points]
+        if len(pts) < 2:
+            raise ValueError("Se necesitan al menos 2 puntos")
+        self.points = pts
+        self._coeffs = self._hermite_coefficients(pts, alpha)
+        self._build_lut(steps)
+
+    # --- construcción ---
+    @staticmethod
+    def _hermite_coefficients(pts, alpha):
+        ext = [(2 * pts[0][0] - pts[1][0], 2 * pts[0][1] - pts[1][1])] + pts + \
+              [(2 * pts[-1][0] - pts[-2][0], 2 * pts[-1][1] - pts[-2][1])]
+
+        def knot(a, b):
+            return max(math.hypot(b[0] - a[0], b[1] - a[1]) ** alpha, 1e-12)
+
+        coeffs = []
+        for i in range(1, len(ext) - 2):
+            p0, p1, p2, p3 = ext[i - 1], ext[i], ext[i + 1], ext[i + 2]
+            d0 = knot(p0, p1); d1 = knot(p1, p2); d2 = knot(p2, p3)
+            seg = []
+            for k in range(2):
+                m1 = ((p1[k] - p0[k]) / d0 - (p2[k] - p0[k]) / (d0 + d1) + (p2[k] - p1[k]) / d1) * d1
+                m2 = ((p2[k] - p1[k]) / d1 - (p3[k] - p1[k]) / (d1 + d2) + (p3[k] - p2[k]) / d2) * d1
+                a = 2 * p1[k] - 2 * p2[k] + m1 + m2
+                b = -3 * p1[k] + 3 * p2[k] - 2 * m1 - m2
+                seg.append((a, b, m1, p1[k]))
+            coeffs.append(seg)
+        return coeffs
+
+    def _build_lut(self, steps):
+        self._u = []       # parámetro global (segmento + u local)
+        self._s = []       # longitud de arco acumulada
+        self._kappa = []   # curvatura absoluta en cada nodo
+        s = 0.0
+        prev = None
+        for i in range(len(self._coeffs)):
+            for j in range(0 if i == 0 else 1, steps + 1):
+                u = i + j / steps
+                p = self.point(u)
+                if prev is not None:
+                    s += math.hypot(p[0] - prev[0], p[1] - prev[1])
+                prev = p
+                self._u.append(u); self._s.append(s); self._kappa.append(self.curvature(u))
+        self.length = s
+
+    # --- evaluación ---
+    def _segment(self, u):
+        i = min(int(u), len(self._coeffs) - 1)
+        return self._coeffs[i], u - i
+
+    def point(self, u):
+        seg, t = self._segment(u)
+        return tuple(((a * t + b) * t + c) * t + d for a, b, c, d in seg)
+
+    def curvature(self, u):
+        seg, t = self._segment(u)
+        (ax, bx, cx, _), (ay, by, cy, _) = seg
+        dx = (3 * ax * t + 2 * bx) * t + cx; dy = (3 * ay * t + 2 * by) * t + cy
+        ddx = 6 * ax * t + 2 * bx; ddy = 6 * ay * t + 2 * by
+        speed = math.hypot(dx, dy)
+        return abs(dx * ddy - dy * ddx) / speed ** 3 if speed > 1e-12 else 0.0
+
+    def _measure(self, adaptivity):
+        """Medida acumulada: longitud de arco ponderada por 1 + adaptividad·min(|κ|·L/2π, MAX_DENSITY_GAIN)."""
+        if adaptivity <= 0.0:
+            return self._s
+        scale = self.length / (2.0 * math.pi)
+        w = [0.0]
+        for k in range(1, len(self._s)):
+            bend = min(scale * 0.5 * (self._kappa[k - 1] + self._kappa[k]), MAX_DENSITY_GAIN)
+            dens = 1.0 + adaptivity * bend
+            w.append(w[-1] + dens * (self._s[k] - self._s[k - 1]))
+        return w
+
+    def sample(self, count, adaptivity=0.0):
+        """count puntos entre los extremos (incluidos), equiespaciados en longitud
+        de arco o, con adaptivity > 0, más densos donde la curvatura es mayor."""
+        count = max(2, int(count))
+        measure = self._measure(adaptivity)
+        total = measure[-1]
+        if total <= 0.0:
+            return [self.points[0]] * (count - 1) + [self.points[-1]]
+        out = []
+        for n in range(count):
+            target = total * n / (count - 1)
+            k = min(max(bisect_left(measure, target), 1), len(measure) - 1)
+            m0 = measure[k - 1]; m1 = measure[k]
+            f = 0.0 if m1 == m0 else (target - m0) / (m1 - m0)
+            out.append(self.point(self._u[k - 1] + f * (self._u[k] - self._u[k - 1])))
+        out[0] = self.points[0]; out[-1] = self.points[-1]
+        return out
+
+    def weighted_length(self, adaptivity=0.0):
+        return self._measure(adaptivity)[-1]
+
+_SPLINE_CACHE = OrderedDict()
+
+def curve_spline(points):
+    """CurveSpline cacheada por puntos de control (LRU)."""
+    key = tuple((float(x), float(y)) for x, y in points)
+    spline = _SPLINE_CACHE.get(key)
+    if spline is None:
+        spline = _SPLINE_CACHE[key] = CurveSpline(key)
+        if len(_SPLINE_CACHE) > SPLINE_CACHE_SIZE:
+            _SPLINE_CACHE.popitem(last=False)
+    else:
+        _SPLINE_CACHE.move_to_end(key)
+    return spline
+
+def _split_counts(splines, count, adaptivity):
+    """Reparte count puntos entre tramos según su medida (cada tramo >= 2)."""
+    weights = [max(s.weighted_length(adaptivity), 1e-12) for s in splines]
+    total = sum(weights)
+    # count cuenta los vértices de la curva completa; los tramos comparten el hito
+    inner = max(count - 1, len(splines))
+    return [max(2, round(inner * w / total) + 1) for w in weights]
+
+def densify_outline(coords_xyz, manga_points=0, cuello_points=0, adaptivity=0.0, frontal=True,
+                    template=None):
+    """Reemplaza manga y cuello del contorno resuelto por muestras de spline.
+
+    manga_points / cuello_points: vértices de cada curva completa (0 = sin cambio).
+    Conserva el orden del anillo y los hitos (1, 8, 14, 17, 31 y 44 en la
+    plantilla incluida).
+    """
+    return densify_outline_indexed(coords_xyz, manga_points, cuello_points, adaptivity,
+                                   frontal, template)[0]
+
+def densify_outline_indexed(coords_xyz, manga_points=0, cuello_points=0, adaptivity=0.0,
+                            frontal=True, template=None):
+    """Como densify_outline, y además {índice de la plantilla: índice en el contorno}
+    para los vértices conservados y los extremos de cada curva.
+    """
+    t = template or DEFAULT_TEMPLATE
+    spans_by_curve = CURVE_SPANS if t is DEFAULT_TEMPLATE else t.curve_spans()
+    v = 2 if frontal else 1
+    plane = [(c[0], c[v]) for c in coords_xyz]
+    requested = {"manga": manga_points, "cuello": cuello_points}
+    replaced = {}
+    for name, spans in spans_by_curve.items():
+        count = requested[name]
+        if count <= 0:
+            continue
+        splines = [curve_spline(plane[a:b + 1]) for a, b in spans]
+        pts = []
+        for spline, n in zip(splines, _split_counts(splines, count, adaptivity)):
+            seg = spline.sample(n, adaptivity)
+            pts.extend(seg if not pts else seg[1:])
+        replaced[name] = pts
+
+    first = {name: t.curves[name][0] for name in spans_by_curve}
+    last = {name: t.curves[name][1] for name in spans_by_curve}
+    out = []
+    index = {}
+    i = 0
+    while i < len(plane):
+        name = next((n for n in replaced if first[n] == i), None)
+        if name:
+            index[i] = len(out)
+            out.extend(replaced[name])
+            index[last[name]] = len(out) - 1
+            i = last[name] + 1
+        else:
+            index[i] = len(out)
+            out.append(plane[i])
+            i += 1
+    if frontal:
+        return [(x, 0.0, y) for x, y in out], index
+    return [(x, y, 0.0) for x, y in out], index
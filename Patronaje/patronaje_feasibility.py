@@ -0,0 +1,198 @@
+"""Mapa de factibilidad de Patronaje (NumPy, sin Blender).
+
+Muchas combinaciones de parámetros se recortan en silencio dentro del
+solver. build_feasibility_table muestrea, para cada medida manual, una
+grilla (ancho de tela × alto de tela × valor pedido) con
+solve_pattern_batch y guarda por punto una máscara de bits: qué límites
+(CLAMP_FLAGS) intervinieron y si la medida resultante difiere de la pedida.
+El resto de los parámetros queda fijo en la configuración base.
+
+La tabla se guarda como .npz comprimido; FeasibilityTable.check responde
+sin resolver si un valor pedido se respetará (consulta conservadora: OR de
+los vértices de la celda de la grilla). Vale para una medida manual sola:
+las medidas combinadas interactúan (v8/v14 abajo, largo base/largo 17,
+base contra sisa) y la tabla no las cubre. Para un pedido completo,
+check_orders confirma resolviendo en lote.
+
+Uso:
+    python patronaje_feasibility.py --out patronaje_feasibility.npz [--base medidas.json]
+"""
+
+import argparse
+import json
+import sys
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from patronaje_core import PATRON_DEFAULTS, MANUAL_ENABLE_KEYS, as_params, params_to_dict
+from patronaje_grading import CLAMP_FLAGS, solve_pattern_batch
+
+NOT_HONORED_BIT = 1 << 15
+HONOR_TOL_CM = 0.05  # el panel muestra un decimal
+
+CLAMP_LABELS = {
+    "manga_escala_y": "escala Y de manga limitada",
+    "manga_x_mitad": "manga limitada a 1/2 ancho",
+    "manga_gap_minimo": "gap mínimo sisa/espalda",
+    "manga_offset_cruce": "límites de 2 cm cruzados",
+    "manga_offset_limite": "manga a 2 cm del borde",
+    "cuello_escala_y": "escala Y de cuello limitada",
+    "cuello_x_mitad": "cuello limitado a 1/2 ancho",
+    "frontera_sisa": "regla frontera sisa",
+    "cuello_largo_limite": "largo de cuello limitado",
+    "cuello_contencion": "cuello contenido en la tela",
+}
+
+# Medida manual -> (vértice, medición, factor, eje que la normaliza)
+MANUAL_MEASURES = {
+    "man_v8_left_cm":    (8,  'left',   1.0, "pattern_width"),
+    "man_v8_bottom_cm":  (8,  'height', 1.0, "pattern_height"),
+    "man_v14_bottom_cm": (14, 'height', 1.0, "pattern_height"),
+    "man_sisa_sisa_cm":  (8,  'right',  2.0, "pattern_width"),
+    "man_base_cm":       (31, 'right',  1.0, "pattern_width"),
+    "man_base_total_cm": (31, 'right',  2.0, "pattern_width"),
+    "man_len_base_cm":   (31, 'height', 1.0, "pattern_height"),
+    "man_len_17_cm":     (17, 'height', 1.0, "pattern_height"),
+}
+
+def _batch_measure(coords, widths, key):
+    """Medida (cm) de key sobre coords (N, 46, 3), igual que measure_pattern."""
+    vidx, kind, factor, _ = MANUAL_MEASURES[key]
+    x = coords[:, vidx, 0]
+    if kind == 'left':
+        val = (x + widths * 0.01) * 100.0
+    elif kind == 'right':
+        val = -x * 100.0
+    else:
+        v = coords[:, :, 1] + coords[:, :, 2]
+        val = (v[:, vidx] - v.min(axis=1)) * 100.0
+    return np.maximum(0.0, val) * factor
+
+def flags_to_mask(flags):
+    mask = np.zeros(len(next(iter(flags.values()))), dtype=np.uint16)
+    for bit, name in enumerate(CLAMP_FLAGS):
+        mask |= flags[name].astype(np.uint16) << bit
+    return mask
+
+def mask_reasons(mask):
+    """Nombres de CLAMP_FLAGS activos en una máscara."""
+    return [name for bit, name in enumerate(CLAMP_FLAGS) if int(mask) & (1 << bit)]
+
+@dataclass
+class FeasibilityTable:
+    widths: np.ndarray
+    heights: np.ndarray
+    ratios: np.ndarray                         # valor / (factor × eje)
+    masks: dict = field(default_factory=dict)  # medida -> uint16 (nw, nh, nr)
+    base: dict = field(default_factory=dict)
+
+    @staticmethod
+    def _bracket(axis, value):
+        """Índices de la grilla que encierran value (uno solo en los bordes o si coincide)."""
+        i = int(np.searchsorted(axis, value))
+        if i <= 0:
+            return (0,)
+        if i >= len(axis):
+            return (len(axis) - 1,)
+        return (i,) if axis[i] == value else (i - 1, i)
+
+    def lookup(self, key, width, height, value):
+        """Máscara para (ancho, alto, valor pedido): OR de los vértices de la celda.
+
+        Un valor fuera del rango de la grilla se informa como no respetado.
+        """
+        _, _, factor, axis_key = MANUAL_MEASURES[key]
+        dim = width if axis_key == "pattern_width" else height
+        ratio = value / (factor * dim) if dim > 0.0 else np.inf
+        table = self.masks[key]
+        mask = 0
+        for i in self._bracket(self.widths, width):
+            for j in self._bracket(self.heights, height):
+                for k in self._bracket(self.ratios, ratio):
+                    mask |= int(table[i, j, k])
+        if ratio > self.ratios[-1]:
+            mask |= NOT_HONORED_BIT
+        return mask
+
+    def check(self, params, key):
+        """(se respeta, límites activos) para la medida manual key de params."""
+        p = as_params(params)
+        mask = self.lookup(key, p.pattern_width, p.pattern_height, getattr(p, key))
+        return not (mask & NOT_HONORED_BIT), mask_reasons(mask)
+
+    def save(self, path):
+        np.savez_compressed(
+            path, widths=self.widths, heights=self.heights, ratios=self.ratios,
+            base=np.array(json.dumps(self.base)),
+            **{f"mask__{key}": m for key, m in self.masks.items()},
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as z:
+            masks = {name[len("mask__"):]: z[name] for name in z.files if name.startswith("mask__")}
+            return cls(z["widths"], z["heights"], z["ratios"], masks, json.loads(str(z["base"])))
+
+def check_orders(orders):
+    """Para cada pedido, medidas manuales habilitadas que no se respetarán: {clave: límites activos}.
+
+    A diferencia de la tabla, resuelve: un lote con solve_pattern_batch, con
+    todas las medidas del pedido combinadas (unos µs por fila).
+    """
+    rows = [params_to_dict(as_params(o)) for o in orders]
+    if not rows:
+        return []
+    cols = {key: np.array([row[key] for row in rows]) for key in rows[0]}
+    coords, flags = solve_pattern_batch(cols, return_flags=True)
+    mask = flags_to_mask(flags)
+    out = [{} for _ in rows]
+    for key, enable in MANUAL_ENABLE_KEYS.items():
+        missed = cols[enable] & (np.abs(_batch_measure(coords, cols["pattern_width"], key) - cols[key]) > HONOR_TOL_CM)
+        for i in np.flatnonzero(missed):
+            out[i][key] = mask_reasons(mask[i])
+    return out
+
+def build_feasibility_table(base=None, keys=tuple(MANUAL_MEASURES), width_range=(10.0, 400.0),
+                            height_range=(10.0, 400.0), max_ratio=3.0, size_steps=24, ratio_steps=121):
+    """Muestrea la grilla de cada medida manual en lote y devuelve la FeasibilityTable."""
+    base = params_to_dict(base if base is not None else PATRON_DEFAULTS)
+    widths = np.geomspace(*width_range, size_steps)
+    heights = np.geomspace(*height_range, size_steps)
+    # La sisa puede pedir más que el ancho (la manga sobresale del borde)
+    ratios = np.linspace(0.0, max_ratio, ratio_steps)
+    W, H, R = np.meshgrid(widths, heights, ratios, indexing='ij')
+    W = W.ravel(); H = H.ravel(); R = R.ravel()
+    table = FeasibilityTable(widths, heights, ratios, base=base)
+    for key in keys:
+        _, _, factor, axis_key = MANUAL_MEASURES[key]
+        values = R * factor * (W if axis_key == "pattern_width" else H)
+        cols = dict(base)
+        cols.update({"pattern_width": W, "pattern_height": H, key: values,
+                     MANUAL_ENABLE_KEYS[key]: True})
+        coords, flags = solve_pattern_batch(cols, return_flags=True)
+        mask = flags_to_mask(flags)
+        missed = np.abs(_batch_measure(coords, W, key) - values) > HONOR_TOL_CM
+        mask |= np.where(missed, NOT_HONORED_BIT, 0).astype(np.uint16)
+        table.masks[key] = mask.reshape(len(widths), len(heights), len(ratios))
+    return table
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precalcula el mapa de factibilidad de Patronaje.")
+    parser.add_argument("--out", required=True, help="Archivo .npz de salida")
+    parser.add_argument("--base", help="Medidas base (.json de \"Guardar medidas\"); por defecto, valores iniciales")
+    parser.add_argument("--size-steps", type=int, default=24)
+    parser.add_argument("--ratio-steps", type=int, default=121)
+    args = parser.parse_args(argv)
+    base = None
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+    table = build_feasibility_table(base, size_steps=args.size_steps, ratio_steps=args.ratio_steps)
+    table.save(args.out)
+    n = sum(m.size for m in table.masks.values())
+    print(f"{n} puntos en {len(table.masks)} medidas -> {args.out}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""Ajuste inverso de Patronaje: medidas objetivo -> parámetros (sin Blender).
+
+Dadas las medidas deseadas tal como las reporta measure_pattern (sisa al borde
+lateral, altura de sisa, costura de espalda, base del cuello, largos del
+cuello y sisa a sisa), busca los valores continuos de las entradas manuales
+que dan el patrón factible más cercano y reporta el residuo de cada medida.
+Ancho, alto y escalas de manga y cuello quedan como en la base salvo que se
+pidan en free: entonces se buscan junto con las entradas manuales.
+Los límites del solver (márgenes de 2 cm, MIN_GAP_CM, topes de medio ancho)
+se respetan porque cada evaluación pasa por transform_pattern_coordinates.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from patronaje_core import (
+    PATRON_DEFAULTS, MANUAL_ENABLE_KEYS,
+    as_params, params_to_dict, transform_pattern_coordinates, measure_pattern,
+)
+
+# Medida (campo de PatternMeasurements) -> entrada manual que la controla
+FIT_MEASURES = {
+    "v8_left": "man_v8_left_cm",
+    "v8_bottom": "man_v8_bottom_cm",
+    "v14_bottom": "man_v14_bottom_cm",
+    "sisa_sisa": "man_sisa_sisa_cm",
+    "base": "man_base_cm",
+    "len_base": "man_len_base_cm",
+    "len_17": "man_len_17_cm",
+}
+
+# Rangos de las entradas manuales (mismos min/max que PatronShapeProperties)
+_VARIABLE_BOUNDS = {
+    "man_v8_left_cm": (0.0, 1000.0),
+    "man_v8_bottom_cm": (0.0, 1000.0),
+    "man_v14_bottom_cm": (0.0, 1000.0),
+    "man_sisa_sisa_cm": (0.0, 4000.0),
+    "man_base_cm": (0.0, 1000.0),
+    "man_len_base_cm": (0.0, 2000.0),
+    "man_len_17_cm": (0.0, 2000.0),
+}
+
+# Entradas de forma que fit_measurements puede mover además de las manuales (free)
+FIT_FREE_BOUNDS = {
+    "pattern_width": (10.0, 400.0),
+    "pattern_height": (10.0, 400.0),
+    "curve_upper_scale_x": (0.1, 5.0),
+    "curve_upper_scale_y": (0.1, 5.0),
+    "cuello_scale_x": (0.1, 5.0),
+    "cuello_scale_y": (0.1, 5.0),
+}
+
+@dataclass
+class FitResult:
+    settings: dict
+    coords: tuple
+    measured: dict
+    residuals: dict = field(default_factory=dict)
+    iterations: int = 0
+    converged: bool = False
+
+def measure_all(settings, coords, keys=FIT_MEASURES):
+    """Medidas (cm, sin redondeo) de las claves pedidas."""
+    m = measure_pattern(settings, coords)
+    return {key: getattr(m, key) for key in keys}
+
+def _variables_for(targets):
+    # sisa a sisa tiene precedencia sobre v8_left en el solver: si están
+    # ambas, una sola entrada controla el ancho de la manga.
+    names = []
+    for key in FIT_MEASURES:
+        if key not in targets:
+            continue
+        if key == "v8_left" and "sisa_sisa" in targets:
+            continue
+        names.append(FIT_MEASURES[key])
+    return names
+
+def fit_measurements(targets, base=None, free=(), max_iter=25, tol_cm=0.005, step_cm=0.01):
+    """Busca las entradas manuales que mejor reproducen `targets` (cm).
+
+    targets: dict con claves de FIT_MEASURES. base: medidas de partida
+    (PatronParams, dict u objeto). free: claves de FIT_FREE_BOUNDS que también
+    se ajustan (el alto no, si la base mantiene la proporción); las demás
+    quedan fijas en la base.
+    Levenberg-Marquardt con jacobiano por diferencias finitas y límites de caja.
+    """
+    unknown = set(targets) - set(FIT_MEASURES)
+    if unknown:
+        raise KeyError(f"Medidas desconocidas: {sorted(unknown)}")
+    unknown = set(free) - set(FIT_FREE_BOUNDS)
+    if unknown:
+        raise KeyError(f"Entradas libres desconocidas: {sorted(unknown)}")
+    settings = params_to_dict(as_params(base)) if base is not None else dict(PATRON_DEFAULTS)
+    settings["lock_manga_lengths"] = False
+    settings["lock_neck_lengths"] = False
+    names = _variables_for(targets)
+    for name in names:
+        settings[MANUAL_ENABLE_KEYS[name]] = True
+    shape = [k for k in FIT_FREE_BOUNDS
+             if k in free and not (k == "pattern_height" and settings["mantener_proporcion"])]
+    if "sisa_sisa" not in targets and "v8_left" in targets:
+        settings["man_enable_sisa_sisa"] = False
+    if "base" in targets:
+        settings["man_enable_base_total"] = False
+
+    keys = list(targets)
+    goal = np.array([float(targets[k]) for k in keys])
+    bounds = dict(_VARIABLE_BOUNDS, **FIT_FREE_BOUNDS)
+    lo = np.array([bounds[n][0] for n in names + shape])
+    hi = np.array([bounds[n][1] for n in names + shape])
+
+    def evaluate(x):
+        trial = dict(settings)
+        trial.update(zip(names + shape, (float(v) for v in x)))
+        coords = transform_pattern_coordinates(trial)
+        measured = measure_all(trial, coords, keys)
+        return trial, coords, measured, np.array([measured[k] for k in keys]) - goal
+
+    def solve_from(x):
+        trial, coords, measured, r = evaluate(x)
+        cost = float(r @ r)
+        lam = 1e-3
+        it = 0
+        while it < max_iter and np.abs(r).max() > tol_cm and len(x):
+            it += 1
+            J = np.empty((len(keys), len(x)))
+            for j in range(len(x)):
+                h = step_cm if x[j] + step_cm <= hi[j] else -step_cm
+                xp = x.copy(); xp[j] += h
+                J[:, j] = (evaluate(xp)[3] - r) / h
+            JtJ = J.T @ J
+            g = J.T @ r
+            improved = False
+            while lam < 1e8:
+                A = JtJ + lam * np.diag(np.maximum(np.diag(JtJ), 1e-9))
+                try:
+                    dx = np.linalg.solve(A, -g)
+                except np.linalg.LinAlgError:
+                    lam *= 10.0
+                    continue
+                x_new = np.clip(x + dx, lo, hi)
+                cand = evaluate(x_new)
+                new_cost = float(cand[3] @ cand[3])
+                if new_cost < cost:
+                    x, (trial, coords, measured, r), cost = x_new, cand, new_cost
+                    lam = max(lam / 3.0, 1e-9)
+                    improved = True
+                    break
+                lam *= 4.0
+            if not improved:
+                break
+        return cost, it, trial, coords, measured, r
+
+    # Puntos iniciales: cada entrada manual igual a su medida objetivo y,
+    # si difieren, los valores de partida de `settings` (el solver tiene
+    # mínimos locales donde actúan los clamps). Las entradas libres de forma
+    # parten siempre de la base.
+    target_of = {FIT_MEASURES[k]: float(targets[k]) for k in keys}
+    target_of.update((n, float(settings[n])) for n in shape)
+    starts = [np.clip(np.array([target_of[n] for n in names + shape]), lo, hi)]
+    current = np.clip(np.array([float(settings[n]) for n in names + shape]), lo, hi)
+    if not np.array_equal(current, starts[0]):
+        starts.append(current)
+    best = None
+    iterations = 0
+    for x0 in starts:
+        result = solve_from(x0)
+        iterations += result[1]
+        if best is None or result[0] < best[0]:
+            best = result
+        if np.abs(best[5]).max() <= tol_cm:
+            break
+    _, _, trial, coords, measured, r = best
+
+    residuals = {k: float(r[i]) for i, k in enumerate(keys)}
+    return FitResult(settings=trial, coords=coords, measured=measured, residuals=residuals,
+                     iterations=iterations, converged=bool(np.abs(r).max() <= tol_cm))
@@ -0,0 +1,363 @@
+"""Graduación por lotes de Patronaje (NumPy, sin Blender).
+
+solve_pattern_batch resuelve N juegos de parámetros (uno por talle) en una
+sola pasada sobre la plantilla (la de 46 puntos incluida u otra
+PatternTemplate). Con return_flags=True devuelve
+además, por fila, qué límites del solver (CLAMP_FLAGS) intervinieron.
+"""
+
+from itertools import chain, repeat
+from operator import itemgetter
+
+import numpy as np
+
+from patronaje_core import PATRON_SETTINGS_KEYS, PATRON_DEFAULTS, DEFAULT_TEMPLATE
+
+# ===== Graduación por lotes (NumPy) =====
+# Réplica vectorizada de transform_pattern_coordinates: cada rama se evalúa
+# para todas las filas a la vez y se selecciona con np.where, respetando el
+# mismo orden de operaciones para que los clamps coincidan exactamente.
+_TEMPLATE_ARRAYS = {}
+
+def _template_arrays(template):
+    """(X, Y normalizados (n,), slice manga, slice cuello) de la plantilla, una vez por plantilla.
+
+    X e Y son los puntos ya multiplicados por unit_m (contiguos, de sólo
+    lectura): por lote sólo queda escalarlos por sx y sy.
+    """
+    cached = _TEMPLATE_ARRAYS.get(template.fingerprint)
+    if cached is None:
+        tpl = np.array(template.points, dtype=np.float64)
+        norm_x = np.ascontiguousarray(tpl[:, 0] * template.unit_m)
+        norm_y = np.ascontiguousarray(tpl[:, 1] * template.unit_m)
+        norm_x.flags.writeable = False
+        norm_y.flags.writeable = False
+        # Las curvas son rangos contiguos: slices (vistas) en lugar de fancy indexing
+        cached = _TEMPLATE_ARRAYS[template.fingerprint] = (
+            norm_x, norm_y,
+            slice(template.manga[0], template.manga[-1] + 1),
+            slice(template.cuello[0], template.cuello[-1] + 1),
+        )
+    return cached
+
+# Límites del solver que pueden recortar silenciosamente un valor pedido
+CLAMP_FLAGS = (
+    "manga_escala_y",       # curve_upper_scale_y recortada a media tela
+    "manga_x_mitad",        # manga_limitar_x_a_mitad recortó el factor X
+    "manga_gap_minimo",     # escala v8/v14 subida al gap mínimo (s_min_gap)
+    "manga_offset_cruce",   # límites 2 cm cruzados (allowed_off_min > allowed_off_max)
+    "manga_offset_limite",  # desplazamiento de la manga recortado a 2 cm de los bordes
+    "cuello_escala_y",      # cuello_scale_y recortada al alto disponible
+    "cuello_x_mitad",       # multiplicador X del cuello recortado (max_sx_half)
+    "frontera_sisa",        # regla frontera sisa (sx_frontera)
+    "cuello_largo_limite",  # largos/desplazamiento del cuello recortados a los bordes
+    "cuello_contencion",    # corrección final de contención vertical
+)
+
+def _batch_columns(params):
+    """Normaliza la entrada del lote a columnas NumPy por clave.
+
+    Acepta un array (N, len(PATRON_SETTINGS_KEYS)) en el orden de
+    PATRON_SETTINGS_KEYS, un dict de columnas {clave: secuencia} o una
+    secuencia de filas (dicts u objetos con atributos). Las claves
+    ausentes toman el valor por defecto de PatronParams.
+
+    Las filas se pasan a un array (N, claves) en una sola pasada con
+    np.fromiter: itemgetter sobre dicts completos, dict.get (o getattr) con
+    los valores por defecto si faltan claves; el tipo de fila se mira una vez.
+    Tiempo por fila de solve_pattern_batch (4000 talles, medido), frente a
+    70-85 µs de transform_pattern_coordinates por talle: array o dict de
+    columnas ~6.5 µs (~12x), filas dict completas ~9 µs (~8x), filas dict
+    parciales u objetos PatronParams ~11 µs (~7x). Armar las columnas cuesta
+    0.1 µs por fila con array o columnas y 3-5 µs con filas; el resto es la
+    resolución sobre arrays (N, 46), igual para toda entrada.
+    """
+    defaults = PATRON_DEFAULTS
+    if isinstance(params, dict):
+        raw = params
+        n = max((len(np.atleast_1d(v)) for v in params.values()), default=0)
+    else:
+        if not isinstance(params, np.ndarray):
+            rows = params if isinstance(params, (list, tuple)) else list(params)
+            keys, values = PATRON_SETTINGS_KEYS, [defaults[key] for key in PATRON_SETTINGS_KEYS]
+            size = len(rows) * len(keys)
+            if rows and isinstance(rows[0], dict):
+                try:
+                    # filas completas (params_to_dict, "Guardar medidas"): itemgetter en C
+                    flat = np.fromiter(chain.from_iterable(map(itemgetter(*keys), rows)), np.float64, size)
+                except KeyError:
+                    flat = np.fromiter(chain.from_iterable(map(row.get, keys, values) for row in rows),
+                                       np.float64, size)
+            else:
+                flat = np.fromiter(chain.from_iterable(map(getattr, repeat(row), keys, values) for row in rows),
+                                   np.float64, size)
+            params = flat.reshape(len(rows), len(keys))
+        arr = np.atleast_2d(np.asarray(params, dtype=np.float64))
+        raw = {key: arr[:, j] for j, key in enumerate(PATRON_SETTINGS_KEYS)}
+        n = len(arr)
+    cols = {}
+    for key in PATRON_SETTINGS_KEYS:
+        dtype = bool if isinstance(defaults[key], bool) else np.float64
+        col = np.asarray(raw.get(key, defaults[key]), dtype=np.float64).astype(dtype)
+        cols[key] = np.broadcast_to(col, (n,))
+    return cols
+
+def _redistribute_batch(xs, ys, enabled):
+    """redistribute_curve_vertices in situ sobre curvas (N, n), sólo en filas habilitadas."""
+    sel = np.flatnonzero(enabled)
+    if sel.size == 0:
+        return
+    px = xs[sel]; py = ys[sel]
+    n = px.shape[1]
+    seg_len = np.hypot(px[:, 1:] - px[:, :-1], py[:, 1:] - py[:, :-1])
+    dists = np.concatenate([np.zeros((len(sel), 1)), np.cumsum(seg_len, axis=1)], axis=1)
+    total = dists[:, -1]
+    seg = total / (n - 1)
+    targets = np.arange(1, n - 1)[None, :] * seg[:, None]
+    # Primer j >= 1 con dists[j] >= target (mismo recorrido que el bucle escalar)
+    j = np.clip((dists[:, :, None] < targets[:, None, :]).sum(axis=1), 1, n - 1)
+    rows = np.arange(len(sel))[:, None]
+    d0 = dists[rows, j - 1]; d1 = dists[rows, j]
+    same = d1 == d0
+    t = np.where(same, 0.0, (targets - d0) / np.where(same, 1.0, d1 - d0))
+    x0 = px[rows, j - 1]; y0 = py[rows, j - 1]
+    inner_x = x0 + t * (px[rows, j] - x0)
+    inner_y = y0 + t * (py[rows, j] - y0)
+    keep = total != 0.0
+    xs[sel[keep], 1:-1] = inner_x[keep]
+    ys[sel[keep], 1:-1] = inner_y[keep]
+
+def solve_pattern_batch(params, return_flags=False, template=None):
+    """Resuelve N juegos de parámetros en una pasada. Devuelve (N, n, 3) en metros.
+
+    n es el número de puntos de la plantilla (46 en la incluida). Con
+    return_flags=True devuelve (coords, flags), con flags un dict
+    {nombre de CLAMP_FLAGS: array bool (N,)}.
+    """
+    t = template or DEFAULT_TEMPLATE
+    norm_x, norm_y, M, K = _template_arrays(t)
+    i_top_l, i_top_r, i_bot_l, i_anchor, i1, i8, i14, _, i31 = t.solver_indices
+    c = _batch_columns(params)
+    N = len(c["pattern_width"])
+    unit = 0.01
+    MIN_GAP_M = 0.5 * unit
+    W = c["pattern_width"]
+
+    def _nz(v, eps=1e-9):
+        return np.where(v == 0.0, eps, v)
+
+    # 1) Escala global
+    sx_w = (W * unit) / (t.bounds['width'] * t.unit_m)
+    sy_h = (c["pattern_height"] * unit) / (t.bounds['height'] * t.unit_m)
+    sx = sx_w
+    sy = np.where(c["mantener_proporcion"], sx_w, sy_h)
+
+    # 2) Base escalada: X e Y en arrays (N, n) contiguos
+    bx = norm_x[None, :] * sx[:, None]
+    by = norm_y[None, :] * sy[:, None]
+    top_fabric_y = np.maximum(by[:, i_top_l], by[:, i_top_r])
+    bottom_fabric_y = np.minimum(by[:, i_bot_l], by[:, i_anchor])
+
+    # 3) Equidistancias
+    _redistribute_batch(bx[:, M], by[:, M], c["manga_equidistante"])
+    _redistribute_batch(bx[:, K], by[:, K], c["cuello_equidistante"])
+
+    ax = bx[:, i_anchor]
+    cx = bx[:, i1]; cy = by[:, i1]
+    x8 = bx[:, i8]; y8 = by[:, i8]
+    y14 = by[:, i14]
+    neck_cx = bx[:, K.start]; neck_cy = by[:, K.start]
+
+    # === Factores baseline (MANGA) ===
+    max_x_off = _nz(np.abs(bx[:, M] - cx[:, None]).max(axis=1))
+    target_depth_cm = np.where(c["usar_mitad_auto"], W / 2.0, np.minimum(c["curve_upper_depth_cm"], W / 2.0))
+    x_factor_from_depth = (target_depth_cm * unit) / max_x_off
+    cap_m = (W / 2.0) * unit
+    escala_x = np.where(c["manga_limitar_x_a_mitad"],
+                        np.minimum(c["curve_upper_scale_x"], cap_m / max_x_off),
+                        c["curve_upper_scale_x"])
+    manga_factor_x = np.where(c["manga_usar_escala_x"], escala_x, x_factor_from_depth)
+    cur_max_y = _nz(np.abs(by[:, M] - cy[:, None]).max(axis=1))
+    manga_factor_y = np.minimum(c["curve_upper_scale_y"], cap_m / cur_max_y)
+    flags = {"manga_escala_y": manga_factor_y < c["curve_upper_scale_y"]}
+
+    # === Overrides manuales (MANGA, ancho) ===
+    left_x = -(W * unit)
+    denom8 = _nz(x8 - cx)
+    f_sisa = (-((c["man_sisa_sisa_cm"] * unit) / 2.0) + ax - cx) / denom8
+    f_left = ((left_x + c["man_v8_left_cm"] * unit) + ax - cx) / denom8
+    use_sisa = c["man_enable_sisa_sisa"] & (c["man_sisa_sisa_cm"] > 0.0)
+    use_left = ~use_sisa & c["man_enable_v8_left"] & (c["man_v8_left_cm"] >= 0.0)
+    manga_factor_x = np.where(use_sisa, f_sisa, np.where(use_left, f_left, manga_factor_x))
+    cap_x = (W * unit / 2.0) / max_x_off
+    flags["manga_x_mitad"] = c["manga_limitar_x_a_mitad"] & (manga_factor_x > cap_x)
+    manga_factor_x = np.where(c["manga_limitar_x_a_mitad"],
+                              np.minimum(manga_factor_x, cap_x),
+                              manga_factor_x)
+
+    # === MANGA: v8/v14 con preservación de GAP ===
+    y8_no_off = cy + (y8 - cy) * manga_factor_y
+    y14_no_off = cy + (y14 - cy) * manga_factor_y
+    bottom = bottom_fabric_y
+    L8 = c["man_enable_v8_bottom"]; L14 = c["man_enable_v14_bottom"]
+    L8_m = c["man_v8_bottom_cm"] * unit; L14_m = c["man_v14_bottom_cm"] * unit
+    both = L8 & L14 & ~c["lock_manga_lengths"]
+
+    denom = y8_no_off - y14_no_off
+    big = np.abs(denom) > 1e-9
+    s_both = np.where(big, (L8_m - L14_m) / np.where(big, denom, 1.0), 1.0)
+    s_my = np.where(both, s_both, 1.0)
+    off_both = (bottom + L14_m) - (cy + s_my * (y14_no_off - cy))
+    off_free = np.clip(0.01 * c["curve_upper_position_y"], -0.20, 0.20)
+    off_my = np.where(both, off_both,
+             np.where(L8, (bottom + L8_m) - y8_no_off,
+             np.where(L14, (bottom + L14_m) - y14_no_off, off_free)))
+
+    gap_base_m = np.abs(y8_no_off - y14_no_off)
+    gap_base_m = np.where(gap_base_m < 1e-9, 1e-9, gap_base_m)
+    s_min_gap = MIN_GAP_M / gap_base_m
+    low = s_my < s_min_gap
+    flags["manga_gap_minimo"] = low
+    s_my = np.where(low, s_min_gap, s_my)
+    off_gap = np.where(both, (bottom + L14_m) - (cy + s_my * (y14_no_off - cy)),
+              np.where(L8, (bottom + L8_m) - (cy + s_my * (y8_no_off - cy)),
+              np.where(L14, (bottom + L14_m) - (cy + s_my * (y14_no_off - cy)), off_my)))
+    off_my = np.where(low, off_gap, off_my)
+
+    # >>> Límites 2 cm para la MANGA
+    y1_no_off = cy + (by[:, i1] - cy) * manga_factor_y
+    allowed_off_max = np.minimum(np.minimum(
+        top_fabric_y - 0.02 - (cy + s_my * (y1_no_off - cy)),
+        top_fabric_y - 0.02 - (cy + s_my * (y8_no_off - cy))),
+        top_fabric_y - 0.02 - (cy + s_my * (y14_no_off - cy)))
+    allowed_off_min = np.maximum(
+        bottom_fabric_y + 0.02 - (cy + s_my * (y8_no_off - cy)),
+        bottom_fabric_y + 0.02 - (cy + s_my * (y14_no_off - cy)))
+    capped = np.minimum(off_my, allowed_off_max)
+    crossed = allowed_off_min > allowed_off_max
+    clamped_off = np.where(crossed, capped, np.maximum(capped, allowed_off_min))
+    flags["manga_offset_cruce"] = crossed
+    flags["manga_offset_limite"] = clamped_off != off_my
+    off_my = clamped_off
+
+    # === Factores baseline (CUELLO) ===
+    follow = c["cuello_seguir_patron"][:, None]
+    ndx = bx[:, K] - neck_cx[:, None]
+    ndy = by[:, K] - neck_cy[:, None]
+    ndx = np.where(follow, ndx, ndx / sx[:, None])
+    ndy = np.where(follow, ndy, ndy / sy[:, None])
+
+    neck_base_max_x = _nz(np.abs(ndx).max(axis=1))
+    half_width_m = (W * unit) / 2.0
+    depth_cm_cap = np.minimum(c["cuello_profundidad_cm"], W / 2.0)
+    depth_mult = np.where(depth_cm_cap > 0.0, depth_cm_cap * unit / neck_base_max_x, 1.0)
+    max_sx_half = half_width_m / neck_base_max_x
+    neck_mult_x_total = np.minimum(c["cuello_scale_x"] * depth_mult, max_sx_half)
+    capped_x = c["cuello_scale_x"] * depth_mult > max_sx_half
+
+    allowed_gap = (by.max(axis=1) - 0.02) - (by.min(axis=1) + 0.02)
+    base_h = np.maximum(1e-9, ndy.max(axis=1) - ndy.min(axis=1))
+    max_sy = np.maximum(0.0, allowed_gap / base_h)
+    neck_mult_y_total = np.minimum(c["cuello_scale_y"], max_sy)
+    flags["cuello_escala_y"] = neck_mult_y_total < c["cuello_scale_y"]
+
+    # === Overrides manuales (CUELLO, base en X) ===
+    i31 -= K.start
+    i17 = 0
+    dx31 = ndx[:, i31]
+    denom31 = _nz(dx31)
+    f_total = (-((c["man_base_total_cm"] * unit) / 2.0) + ax - neck_cx) / denom31
+    f_base = (-(c["man_base_cm"] * unit) + ax - neck_cx) / denom31
+    use_total = c["man_enable_base_total"] & (c["man_base_total_cm"] > 0.0)
+    use_base = ~use_total & c["man_enable_base"] & (c["man_base_cm"] >= 0.0)
+    neck_mult_x_total = np.where(use_total, f_total, np.where(use_base, f_base, neck_mult_x_total))
+    capped_x = np.where(use_total | use_base, neck_mult_x_total > max_sx_half, capped_x)
+    neck_mult_x_total = np.minimum(neck_mult_x_total, max_sx_half)
+
+    # === Regla frontera sisa ===
+    y8_actual_manga = cy + s_my * (y8_no_off - cy) + off_my
+    y17_no_off_y = neck_cy + ndy[:, i17] * neck_mult_y_total
+    x8_actual = cx + (x8 - cx) * manga_factor_x
+    nz31 = np.abs(dx31) > 1e-9
+    sx_frontera = (x8_actual - 0.02 - neck_cx) / np.where(nz31, dx31, 1.0)
+    frontera = (y17_no_off_y < y8_actual_manga) & nz31 & (neck_mult_x_total > 1.0) & (dx31 > 0.0)
+    flags["frontera_sisa"] = frontera & (sx_frontera < neck_mult_x_total)
+    neck_mult_x_total = np.where(frontera, np.minimum(neck_mult_x_total, sx_frontera), neck_mult_x_total)
+    capped_x |= neck_mult_x_total > max_sx_half
+    flags["cuello_x_mitad"] = capped_x
+    neck_mult_x_total = np.minimum(neck_mult_x_total, max_sx_half)
+
+    # === Aplicar transformaciones base ===
+    ox = bx.copy(); oy = by.copy()
+    y_scaled = cy[:, None] + (by[:, M] - cy[:, None]) * manga_factor_y[:, None]
+    ox[:, M] = cx[:, None] + (bx[:, M] - cx[:, None]) * manga_factor_x[:, None]
+    oy[:, M] = cy[:, None] + s_my[:, None] * (y_scaled - cy[:, None]) + off_my[:, None]
+    ox[:, K] = neck_cx[:, None] + ndx * neck_mult_x_total[:, None]
+    neck_y = neck_cy[:, None] + ndy * neck_mult_y_total[:, None]
+    oy[:, K] = neck_y
+
+    # === Offset/escala vertical del cuello ===
+    bottom_before = oy.min(axis=1)
+    top_edge_y = oy.max(axis=1)
+    neck_top = neck_y.max(axis=1); neck_bottom = neck_y.min(axis=1)
+    y31_no_off = neck_y[:, i31]; y17_no_off = neck_y[:, i17]
+    L31 = c["man_enable_len_base"]; L17 = c["man_enable_len_17"]
+    L31_m = c["man_len_base_cm"] * unit; L17_m = c["man_len_17_cm"] * unit
+    both_neck = L31 & L17 & ~c["lock_neck_lengths"]
+    allowed_max_31 = oy[:, i_top_l] - 0.02
+
+    # Rama con dos largos independientes (escala + offset)
+    d = y31_no_off - y17_no_off
+    big = np.abs(d) > 1e-9
+    s_extra = np.where(big, (L31_m - L17_m) / np.where(big, d, 1.0), 1.0)
+    desired = (bottom_before + L17_m) - (neck_cy + s_extra * (y17_no_off - neck_cy))
+    dy_cur_max = neck_top - neck_cy
+    dy_cur_min = neck_bottom - neck_cy
+    s_top = (top_edge_y - 0.02 - (neck_cy + desired)) / np.where(dy_cur_max != 0, dy_cur_max, 1e-9)
+    s_bottom = (bottom_before + 0.02 - (neck_cy + desired)) / np.where(dy_cur_min != 0, dy_cur_min, -1e-9)
+    s_allowed = np.minimum(np.where(s_top > 0, s_top, 1e9), np.where(s_bottom > 0, s_bottom, 1e9))
+    s_req = s_extra
+    s_extra = np.maximum(0.0, np.minimum(s_extra, s_allowed))
+    y31_after = neck_cy + s_extra * (y31_no_off - neck_cy) + desired
+    over_31 = y31_after > allowed_max_31
+    desired = np.where(over_31,
+                       allowed_max_31 - (neck_cy + s_extra * (y31_no_off - neck_cy)), desired)
+    both_clamped = (s_extra != s_req) | over_31
+
+    # Rama de desplazamiento simple
+    delta = np.where(L31 & ~L17, (bottom_before + L31_m) - y31_no_off,
+            np.where(L17, (bottom_before + L17_m) - y17_no_off,
+                     np.clip(c["curve_internal_position_y"] * unit, -0.15, 0.15)))
+    delta_max_up = (top_edge_y - 0.02) - neck_top
+    delta_max_down = (bottom_before + 0.02) - neck_bottom
+    delta_req = delta
+    delta = np.maximum(delta_max_down, np.minimum(delta, delta_max_up))
+    delta = np.where(y31_no_off + delta > allowed_max_31, allowed_max_31 - y31_no_off, delta)
+    flags["cuello_largo_limite"] = np.where(both_neck, both_clamped, delta != delta_req)
+
+    ncy = neck_cy[:, None]
+    oy[:, K] = np.where(both_neck[:, None],
+                        ncy + s_extra[:, None] * (neck_y - ncy) + desired[:, None],
+                        neck_y + delta[:, None])
+
+    # Contención vertical absoluta con margen 2 cm
+    allowed_max = oy.max(axis=1) - 0.02
+    allowed_min = oy.min(axis=1) + 0.02
+    neck_y = oy[:, K]
+    neck_max = neck_y.max(axis=1); neck_min = neck_y.min(axis=1)
+    corr = np.where(neck_max > allowed_max, allowed_max - neck_max,
+           np.where(neck_min < allowed_min, allowed_min - neck_min, 0.0))
+    oy[:, K] += corr[:, None]
+    flags["cuello_contencion"] = corr != 0.0
+
+    # 5) Anclar y orientar
+    ox -= ox[:, i_anchor:i_anchor + 1]
+    oy -= oy[:, i_anchor:i_anchor + 1]
+    result = np.zeros((N, len(norm_x), 3))
+    result[:, :, 0] = ox
+    frontal = c["vista_frontal_xz"]
+    result[frontal, :, 2] = oy[frontal]
+    result[~frontal, :, 1] = oy[~frontal]
+    if return_flags:
+        return result, {name: flags[name] for name in CLAMP_FLAGS}
+    return result
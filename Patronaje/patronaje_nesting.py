@@ -0,0 +1,410 @@
+"""Tizada (marker) de Patronaje: encaje de talles sobre un rollo de tela.
+
+nest_marker recibe contornos resueltos (transform_pattern_coordinates) con
+su cantidad por talle y un ancho de rollo, y los ubica con relleno
+abajo-izquierda minimizando el largo de rollo:
+
+* Cada pieza se representa por partes convexas: el rectángulo de tela
+  (esquinas 0, 15, 16, 45) y la envolvente de cada tramo del contorno que
+  sobresale de él. Los recortes de manga y cuello son ranuras donde no
+  entra otra pieza, así que no se modelan.
+* Colisiones por no-fit polygon (NFP) entre partes convexas, calculado
+  como suma de Minkowski; una posición choca si cae dentro de algún NFP.
+* Índice espacial en grilla uniforme: cada prueba sólo mira las piezas
+  vecinas. Los candidatos descartados no se vuelven a probar.
+* Orientaciones: normal, espejada, 180° y espejada + 180° (hilo de tela
+  conservado). El orden de colocación se perturba con una semilla y se
+  queda el mejor de varios intentos, así que el resultado es reproducible.
+
+Unidades: cm. Eje X = largo del rollo, eje Y = ancho.
+
+Uso:
+    python patronaje_nesting.py S.settings.json:4 M.settings.json:6 --roll 150 --out tizada
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+from dataclasses import dataclass, field
+
+from patronaje_core import as_params, transform_pattern_coordinates
+
+_EPS = 1e-7
+_CORNERS = (0, 15, 16, 45)
+# (espejo, rotación 180°)
+ORIENTATIONS = ((False, False), (True, False), (False, True), (True, True))
+
+# ===== Geometría convexa =====
+def _cross(o, a, b):
+    return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+def convex_hull(points):
+    """Envolvente convexa antihoraria (cadena monótona), sin puntos colineales."""
+    pts = sorted(set(points))
+    if len(pts) <= 2:
+        return pts
+    lower = []
+    for p in pts:
+        while len(lower) >= 2 and _cross(lower[-2], lower[-1], p) <= _EPS:
+            lower.pop()
+        lower.append(p)
+    upper = []
+    for p in reversed(pts):
+        while len(upper) >= 2 and _cross(upper[-2], upper[-1], p) <= _EPS:
+            upper.pop()
+        upper.append(p)
+    return lower[:-1] + upper[:-1]
+
+def no_fit_polygon(fixed, moving):
+    """NFP de dos polígonos convexos: posiciones del origen de moving que lo solapan con fixed."""
+    return convex_hull([(a[0] - b[0], a[1] - b[1]) for a in fixed for b in moving])
+
+def _strictly_inside(poly, x, y):
+    """True si (x, y) está en el interior de un convexo antihorario (el borde no cuenta)."""
+    n = len(poly)
+    if n < 3:
+        return False
+    for i in range(n):
+        ax, ay = poly[i]
+        bx, by = poly[(i + 1) % n]
+        if (bx - ax) * (y - ay) - (by - ay) * (x - ax) <= _EPS:
+            return False
+    return True
+
+def _bbox(points):
+    xs = [p[0] for p in points]; ys = [p[1] for p in points]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def _polygon_area(pts):
+    a2 = 0.0
+    px, py = pts[-1]
+    for x, y in pts:
+        a2 += px * y - x * py
+        px, py = x, y
+    return abs(a2) * 0.5
+
+# ===== Piezas =====
+def outline_cm(coords):
+    """Contorno (x, y) en cm de coordenadas ancladas en metros, plano XY o XZ."""
+    # El alto vive en Y o en Z según la vista; la otra componente es 0
+    return [(c[0] * 100.0, (c[1] + c[2]) * 100.0) for c in coords]
+
+def nesting_parts(outline):
+    """Partes convexas que cubren la pieza: rectángulo de tela + tramos que sobresalen."""
+    x0, y0, x1, y1 = _bbox([outline[i] for i in _CORNERS])
+    def outside(p):
+        return p[0] < x0 - _EPS or p[0] > x1 + _EPS or p[1] < y0 - _EPS or p[1] > y1 + _EPS
+    parts = [[(x0, y0), (x1, y0), (x1, y1), (x0, y1)]]
+    n = len(outline)
+    flags = [outside(p) for p in outline]
+    if not any(flags):
+        return parts
+    # Tramos consecutivos fuera del rectángulo, con sus vecinos de adentro:
+    # la envolvente cubre también los segmentos que cruzan el borde.
+    start = flags.index(False)
+    run = []
+    for k in range(1, n + 1):
+        i = (start + k) % n
+        if flags[i]:
+            if not run:
+                run.append(outline[(i - 1) % n])
+            run.append(outline[i])
+        elif run:
+            run.append(outline[i])
+            parts.append(convex_hull(run))
+            run = []
+    return parts
+
+@dataclass
+class _Shape:
+    """Pieza en una orientación, normalizada a bbox con mínimo (0, 0)."""
+    key: tuple
+    outline: list
+    parts: list
+    width: float
+    height: float
+    mirrored: bool
+    rotated: bool
+
+def _oriented_shape(piece_idx, outline, parts, mirrored, rotated):
+    def tf(p):
+        x, y = p
+        if mirrored:
+            x = -x
+        if rotated:
+            x, y = -x, -y
+        return (x, y)
+    moved = [tf(p) for p in outline]
+    bx0, by0, bx1, by1 = _bbox(moved + [tf(p) for part in parts for p in part])
+    shift = lambda p: (p[0] - bx0, p[1] - by0)
+    return _Shape(
+        key=(piece_idx, mirrored, rotated),
+        outline=[shift(p) for p in moved],
+        parts=[convex_hull([shift(tf(p)) for p in part]) for part in parts],
+        width=bx1 - bx0, height=by1 - by0,
+        mirrored=mirrored, rotated=rotated,
+    )
+
+# ===== Índice espacial =====
+class _GridIndex:
+    """Grilla uniforme de bboxes: devuelve las partes ubicadas cerca de un rectángulo."""
+
+    def __init__(self, cell):
+        self.cell = cell
+        self.cells = {}
+
+    def _range(self, bbox):
+        c = self.cell
+        return (range(math.floor(bbox[0] / c), math.floor(bbox[2] / c) + 1),
+                range(math.floor(bbox[1] / c), math.floor(bbox[3] / c) + 1))
+
+    def insert(self, bbox, item):
+        rx, ry = self._range(bbox)
+        for i in rx:
+            for j in ry:
+                self.cells.setdefault((i, j), []).append(item)
+
+    def query(self, bbox):
+        rx, ry = self._range(bbox)
+        found = set()
+        for i in rx:
+            for j in ry:
+                found.update(self.cells.get((i, j), ()))
+        return found
+
+# ===== Resultado =====
+@dataclass
+class Placement:
+    label: str
+    copy: int
+    x: float
+    y: float
+    mirrored: bool
+    rotated: bool
+    outline: list = field(repr=False)  # contorno ubicado (cm)
+
+@dataclass
+class Marker:
+    roll_width: float
+    length: float
+    placements: list
+    piece_area: float
+    seed: int
+
+    @property
+    def utilization(self):
+        """Área de piezas / área de rollo usada, en porcentaje."""
+        used = self.length * self.roll_width
+        return 100.0 * self.piece_area / used if used > 0.0 else 0.0
+
+    def as_dict(self):
+        return {
+            "roll_width_cm": self.roll_width, "length_cm": round(self.length, 4),
+            "utilization_pct": round(self.utilization, 4), "seed": self.seed,
+            "placements": [
+                {"label": p.label, "copy": p.copy, "x_cm": round(p.x, 4), "y_cm": round(p.y, 4),
+                 "mirrored": p.mirrored, "rotated_180": p.rotated,
+                 "outline_cm": [[round(x, 4), round(y, 4)] for x, y in p.outline]}
+                for p in self.placements
+            ],
+        }
+
+# ===== Colocación =====
+class _Layout:
+    """Estado de una tizada en curso (un intento)."""
+
+    def __init__(self, roll_width, cell):
+        self.roll_width = roll_width
+        self.placed = []        # partes ubicadas: (polígono, bbox)
+        self.index = _GridIndex(cell)
+        self.nfp_cache = {}     # (parte ubicada, forma, parte k) -> NFP
+        self.candidates = {}    # forma -> set de posiciones vivas
+        self.seen = {}          # forma -> cantidad de partes ubicadas ya procesadas
+        self.length = 0.0
+
+    def _nfp(self, placed_idx, shape, k):
+        key = (placed_idx, shape.key, k)
+        nfp = self.nfp_cache.get(key)
+        if nfp is None:
+            nfp = self.nfp_cache[key] = no_fit_polygon(self.placed[placed_idx][0], shape.parts[k])
+        return nfp
+
+    def _refresh_candidates(self, shape):
+        """Agrega los candidatos de las partes ubicadas desde la última consulta."""
+        cands = self.candidates.get(shape.key)
+        if cands is None:
+            y_max = self.roll_width - shape.height
+            cands = self.candidates[shape.key] = {(0.0, 0.0), (0.0, y_max)}
+            self.seen[shape.key] = 0
+        y_max = self.roll_width - shape.height
+        for pi in range(self.seen[shape.key], len(self.placed)):
+            for k in range(len(shape.parts)):
+                for vx, vy in self._nfp(pi, shape, k):
+                    if vx < -_EPS:
+                        continue
+                    if -_EPS <= vy <= y_max + _EPS:
+                        cands.add((vx, vy))
+                        cands.add((0.0, vy))
+                    cands.add((vx, 0.0))
+                    cands.add((vx, y_max))
+        self.seen[shape.key] = len(self.placed)
+        return cands
+
+    def _collides(self, shape, x, y):
+        for k, part in enumerate(shape.parts):
+            bx0, by0, bx1, by1 = _bbox(part)
+            near = self.index.query((bx0 + x, by0 + y, bx1 + x, by1 + y))
+            for pi in near:
+                if _strictly_inside(self._nfp(pi, shape, k), x, y):
+                    return True
+        return False
+
+    def best_position(self, shape):
+        """Primer candidato libre en orden (x, y); descarta para siempre los que chocan."""
+        if shape.height > self.roll_width + _EPS:
+            return None
+        cands = self._refresh_candidates(shape)
+        y_max = self.roll_width - shape.height
+        for pos in sorted(cands):
+            x, y = pos
+            if x < -_EPS or y < -_EPS or y > y_max + _EPS or self._collides(shape, x, y):
+                # Las piezas sólo se agregan: una posición que choca no vuelve a quedar libre
+                cands.discard(pos)
+                continue
+            return pos
+        return None
+
+    def place(self, shape, x, y):
+        for part in shape.parts:
+            poly = [(px + x, py + y) for px, py in part]
+            bbox = _bbox(poly)
+            self.index.insert(bbox, len(self.placed))
+            self.placed.append((poly, bbox))
+        self.length = max(self.length, x + shape.width)
+
+def _run_layout(order, shapes_of, roll_width, cell):
+    layout = _Layout(roll_width, cell)
+    result = []
+    for item in order:
+        best = None
+        for shape in shapes_of[item[0]]:
+            pos = layout.best_position(shape)
+            if pos is None:
+                continue
+            score = (round(pos[0] + shape.width, 6), round(pos[1], 6))
+            if best is None or score < best[0]:
+                best = (score, shape, pos)
+        if best is None:
+            raise ValueError(f"La pieza '{item[1]}' no entra en un rollo de {roll_width:g} cm")
+        _, shape, (x, y) = best
+        layout.place(shape, x, y)
+        result.append((item, shape, x, y))
+    return layout.length, result
+
+def nest_marker(pieces, roll_width_cm, seed=0, trials=4, allow_mirror=True, allow_rotate=True):
+    """Tizada de mínimo largo para pieces sobre un rollo de roll_width_cm.
+
+    pieces: secuencia de (etiqueta, coords, cantidad), con coords en metros
+    como las devuelve transform_pattern_coordinates. El primer intento
+    coloca de mayor a menor área; los siguientes perturban ese orden con
+    random.Random(seed). Devuelve el Marker de menor largo.
+    """
+    roll_width = float(roll_width_cm)
+    if roll_width <= 0.0:
+        raise ValueError("El ancho de rollo debe ser positivo")
+    orientations = [o for o in ORIENTATIONS
+                    if (allow_mirror or not o[0]) and (allow_rotate or not o[1])]
+    shapes_of, items, areas = [], [], []
+    max_dim = 1.0
+    for pidx, (label, coords, qty) in enumerate(pieces):
+        outline = outline_cm(coords)
+        parts = nesting_parts(outline)
+        shapes = [_oriented_shape(pidx, outline, parts, m, r) for m, r in orientations]
+        shapes_of.append(shapes)
+        area = _polygon_area(outline)
+        areas.append(area)
+        max_dim = max(max_dim, shapes[0].width, shapes[0].height)
+        items.extend((pidx, str(label), c, area) for c in range(int(qty)))
+    if not items:
+        return Marker(roll_width, 0.0, [], 0.0, seed)
+
+    cell = max_dim / 2.0
+    rng = random.Random(seed)
+    order = sorted(items, key=lambda it: (-it[3], it[0], it[2]))
+    best = None
+    for t in range(max(1, int(trials))):
+        if t > 0:
+            order = list(order)
+            # Perturbación local: intercambios entre vecinos cercanos del orden por área
+            for _ in range(max(1, len(order) // 4)):
+                i = rng.randrange(len(order))
+                j = min(len(order) - 1, i + rng.randint(1, 3))
+                order[i], order[j] = order[j], order[i]
+        length, placed = _run_layout(order, shapes_of, roll_width, cell)
+        if best is None or length < best[0] - _EPS:
+            best = (length, placed)
+
+    length, placed = best
+    placements = [
+        Placement(label=item[1], copy=item[2], x=x, y=y,
+                  mirrored=shape.mirrored, rotated=shape.rotated,
+                  outline=[(px + x, py + y) for px, py in shape.outline])
+        for item, shape, x, y in placed
+    ]
+    return Marker(roll_width, length, placements, sum(item[3] for item in items), seed)
+
+def marker_svg(marker, margin_cm=1.5):
+    """Tizada como SVG en cm: borde del rollo y un polígono por pieza."""
+    w = marker.length + margin_cm * 2.0
+    h = marker.roll_width + margin_cm * 2.0
+    def pts(poly):
+        return " ".join(f"{x + margin_cm:.4f},{h - (y + margin_cm):.4f}" for x, y in poly)
+    roll = [(0.0, 0.0), (marker.length, 0.0), (marker.length, marker.roll_width), (0.0, marker.roll_width)]
+    body = "\n".join(
+        f'  <polygon id="{p.label}-{p.copy}" points="{pts(p.outline)}" fill="none" stroke="#000000" '
+        f'stroke-width="0.04" stroke-linejoin="round"/>'
+        for p in marker.placements
+    )
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{w:.3f}cm" height="{h:.3f}cm" viewBox="0 0 {w:.3f} {h:.3f}">\n'
+        f'<g id="capa-rollo">\n'
+        f'  <polygon points="{pts(roll)}" fill="none" stroke="#999999" stroke-width="0.04"/>\n'
+        f'</g>\n<g id="capa-tizada">\n{body}\n</g>\n</svg>\n'
+    )
+
+# ===== Línea de comandos =====
+def _parse_piece_arg(arg):
+    path, sep, qty = arg.rpartition(":")
+    if not sep or not qty.isdigit():
+        path, qty = arg, "1"
+    with open(path, encoding="utf-8") as f:
+        settings = json.load(f)
+    label = os.path.basename(path).split(".")[0]
+    return label, transform_pattern_coordinates(as_params(settings)), int(qty)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Arma una tizada de patrones Patronaje sobre un rollo.")
+    parser.add_argument("pieces", nargs="+", help="Medidas .json (\"Guardar medidas\" o .settings.json), opcionalmente archivo:cantidad")
+    parser.add_argument("--roll", type=float, required=True, help="Ancho del rollo (cm)")
+    parser.add_argument("--out", required=True, help="Prefijo de salida (<out>.json y <out>.svg)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--trials", type=int, default=4)
+    parser.add_argument("--no-mirror", action="store_true", help="No espejar piezas")
+    parser.add_argument("--no-rotate", action="store_true", help="No rotar piezas 180°")
+    args = parser.parse_args(argv)
+    pieces = [_parse_piece_arg(a) for a in args.pieces]
+    marker = nest_marker(pieces, args.roll, seed=args.seed, trials=args.trials,
+                         allow_mirror=not args.no_mirror, allow_rotate=not args.no_rotate)
+    with open(args.out + ".json", "w", encoding="utf-8") as f:
+        json.dump(marker.as_dict(), f, indent=2)
+    with open(args.out + ".svg", "w", encoding="utf-8") as f:
+        f.write(marker_svg(marker))
+    print(f"{len(marker.placements)} piezas, largo {marker.length:.1f} cm, "
+          f"aprovechamiento {marker.utilization:.2f} % -> {args.out}.json")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""Panel completo a partir de la mitad resuelta (sin Blender).
+
+El solver genera media pieza anclada en el origen (vértice 16 de la
+plantilla incluida), con la línea central en x = 0: origen, extremos del
+cuello (17 y 44) y esquina superior derecha (45). mirror_panel agrega la
+mitad espejada y comparte esos vértices por aritmética de índices: cada
+vértice fuera de la línea central i recibe el índice n + (su posición entre
+los no centrales), los centrales se reutilizan, y los tramos entre dos
+vértices centrales consecutivos (16–17 y 44–45) quedan dentro de la pieza y
+no se emiten. No hace falta fusionar vértices por distancia después.
+
+El resultado es un contorno exterior y el cuello como agujero cerrado.
+Sólo es válido si la media pieza queda toda en x <= 0: con algunas medidas
+la manga cruza la línea central y el espejo se superpone con la pieza;
+crossing_indices lo detecta antes de espejar.
+panel_pair duplica el panel (delantero y espalda) desplazado en X.
+"""
+
+from patronaje_core import DEFAULT_TEMPLATE
+
+PANEL_MODES = ("MITAD", "COMPLETO", "PAR")
+
+def centre_indices(template=None):
+    """Índices de la plantilla sobre la línea central: misma X que el origen,
+    fuera del interior de manga y cuello (en la incluida: 16, 17, 44, 45).
+    """
+    t = template or DEFAULT_TEMPLATE
+    x0 = t.points[t.landmarks["origen"]][0]
+    interior = set(t.manga[1:-1]) | set(t.cuello[1:-1])
+    return tuple(i for i, (x, _y) in enumerate(t.points) if x == x0 and i not in interior)
+
+def crossing_indices(coords_xyz, centre):
+    """Índices fuera de la línea central con x > 0: el espejo se superpondría con la media pieza."""
+    centre = frozenset(centre)
+    return tuple(i for i, c in enumerate(coords_xyz) if i not in centre and c[0] > 0.0)
+
+def mirror_panel(coords_xyz, centre):
+    """(vértices, aristas) del panel completo a partir del anillo de media pieza.
+
+    centre: índices del anillo sobre la línea central; se comparten con la
+    mitad espejada (su X se fija en 0).
+    """
+    n = len(coords_xyz)
+    centre = frozenset(centre)
+    verts = [(0.0, c[1], c[2]) if i in centre else tuple(c) for i, c in enumerate(coords_xyz)]
+    mirror = list(range(n))
+    for i, c in enumerate(coords_xyz):
+        if i not in centre:
+            mirror[i] = len(verts)
+            verts.append((-c[0], c[1], c[2]))
+    edges = []
+    for i in range(n):
+        j = (i + 1) % n
+        if i in centre and j in centre:
+            continue    # tramo de la línea central: interior al panel
+        edges.append((i, j))
+        edges.append((mirror[i], mirror[j]))
+    return verts, edges
+
+def panel_pair(verts, edges, gap=0.0):
+    """Delantero y espalda: el panel más una copia a su derecha, separada gap (m)."""
+    n = len(verts)
+    half_width = max(abs(v[0]) for v in verts)
+    dx = 2.0 * half_width + gap
+    verts = list(verts) + [(x + dx, y, z) for x, y, z in verts]
+    edges = list(edges) + [(a + n, b + n) for a, b in edges]
+    return verts, edges
@@ -0,0 +1,233 @@
+"""Biblioteca de perfiles de medidas de Patronaje (SQLite, sin Blender).
+
+Reemplaza el archivo JSON por perfil: cada perfil guarda los valores de
+PATRON_SETTINGS_KEYS (una columna por clave) y sus medidas resueltas
+(columnas m_*, de PatternMeasurements) en una base SQLite local con
+índices sobre las medidas clave, así que las búsquedas por rango no
+recorren toda la tabla:
+
+    store = ProfileStore("perfiles.sqlite")
+    store.query(pattern_width=(60, 70), m_sisa_sisa=(45, None))
+
+Uso:
+    python patronaje_profiles.py perfiles.sqlite import carpeta/ [carpeta2/ ...]
+    python patronaje_profiles.py perfiles.sqlite query pattern_width=60:70 m_sisa_sisa=45:
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from dataclasses import fields
+
+from patronaje_core import (
+    PATRON_SETTINGS_KEYS, PATRON_DEFAULTS, PatternMeasurements,
+    as_params, params_to_dict, transform_pattern_coordinates, measure_pattern,
+)
+
+SCHEMA_VERSION = 1
+MEASURE_COLUMNS = [f"m_{f.name}" for f in fields(PatternMeasurements)]
+# Columnas indexadas: dimensiones de tela y medidas clave del panel
+INDEXED_COLUMNS = ("pattern_width", "pattern_height", "m_v8_left", "m_v8_bottom", "m_sisa_sisa",
+                   "m_base", "m_len_base", "m_len_17")
+
+def _sql_type(value):
+    return "INTEGER" if isinstance(value, (bool, int)) else "REAL"
+
+_SETTINGS_COLUMNS = [(key, _sql_type(PATRON_DEFAULTS[key])) for key in PATRON_SETTINGS_KEYS]
+QUERY_COLUMNS = frozenset([key for key, _ in _SETTINGS_COLUMNS] + MEASURE_COLUMNS)
+
+def _row_values(settings):
+    """(valores de settings, valores de medidas) para una fila."""
+    settings = params_to_dict(as_params(settings))
+    m = measure_pattern(settings, transform_pattern_coordinates(settings))
+    values = [int(v) if isinstance(v, bool) else v for v in (settings[k] for k in PATRON_SETTINGS_KEYS)]
+    return values + [getattr(m, f.name) for f in fields(PatternMeasurements)]
+
+class ProfileStore:
+    """Perfiles de medidas en una base SQLite (se crea si no existe)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self._ensure_schema()
+
+    def _ensure_schema(self):
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == SCHEMA_VERSION:
+            return
+        if version != 0:
+            raise RuntimeError(f"Base de perfiles con esquema {version}; se esperaba {SCHEMA_VERSION}")
+        cols = ",\n".join(
+            [f"  {key} {typ} NOT NULL" for key, typ in _SETTINGS_COLUMNS]
+            + [f"  {col} REAL NOT NULL" for col in MEASURE_COLUMNS]
+        )
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE profiles (\n"
+                "  id INTEGER PRIMARY KEY,\n"
+                "  name TEXT NOT NULL,\n"
+                "  source TEXT UNIQUE,\n"
+                "  created REAL NOT NULL,\n"
+                f"{cols}\n)"
+            )
+            self.conn.execute("CREATE INDEX idx_profiles_name ON profiles(name)")
+            for col in INDEXED_COLUMNS:
+                self.conn.execute(f"CREATE INDEX idx_profiles_{col} ON profiles({col})")
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ----- Escritura -----
+    _COLUMNS = ["name", "source", "created"] + [k for k, _ in _SETTINGS_COLUMNS] + MEASURE_COLUMNS
+
+    def _insert_sql(self):
+        cols = ", ".join(self._COLUMNS)
+        marks = ", ".join("?" * len(self._COLUMNS))
+        updates = ", ".join(f"{c} = excluded.{c}" for c in self._COLUMNS if c != "source")
+        # Reimportar el mismo archivo actualiza su perfil en lugar de duplicarlo
+        return (f"INSERT INTO profiles ({cols}) VALUES ({marks}) "
+                f"ON CONFLICT(source) DO UPDATE SET {updates}")
+
+    def add(self, settings, name, source=None):
+        """Guarda un perfil y devuelve su id."""
+        with self.conn:
+            cur = self.conn.execute(self._insert_sql(), [name, source, time.time()] + _row_values(settings))
+        if source is None:
+            return cur.lastrowid
+        # Con upsert lastrowid no es confiable: se busca por origen
+        return self.conn.execute("SELECT id FROM profiles WHERE source = ?", (source,)).fetchone()[0]
+
+    def import_json_files(self, paths, recursive=True, batch_size=500):
+        """Importa archivos .json de "Guardar medidas" (archivos o carpetas). Devuelve (importados, omitidos)."""
+        imported = skipped = 0
+        batch = []
+        sql = self._insert_sql()
+
+        def flush():
+            with self.conn:
+                self.conn.executemany(sql, batch)
+            batch.clear()
+
+        for path in _iter_json_files(paths, recursive):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, dict) or not any(k in data for k in PATRON_SETTINGS_KEYS):
+                    raise ValueError("sin claves de medidas")
+                row = _row_values(data)
+            except (OSError, ValueError, TypeError):
+                skipped += 1
+                continue
+            name = os.path.splitext(os.path.basename(path))[0]
+            batch.append([name, os.path.abspath(path), time.time()] + row)
+            imported += 1
+            if len(batch) >= batch_size:
+                flush()
+        if batch:
+            flush()
+        return imported, skipped
+
+    def delete(self, profile_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM profiles WHERE id = ?", (profile_id,))
+
+    # ----- Lectura -----
+    def get(self, profile_id):
+        """Valores de PATRON_SETTINGS_KEYS del perfil (dict) o None si no existe."""
+        cols = ", ".join(k for k, _ in _SETTINGS_COLUMNS)
+        row = self.conn.execute(f"SELECT {cols} FROM profiles WHERE id = ?", (profile_id,)).fetchone()
+        if row is None:
+            return None
+        return {key: (bool(v) if isinstance(PATRON_DEFAULTS[key], bool) else v)
+                for key, v in zip(PATRON_SETTINGS_KEYS, row)}
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+
+    def query(self, order_by="id", limit=None, **ranges):
+        """Perfiles cuyos valores caen en los rangos dados: [(id, nombre), ...].
+
+        Cada rango es (mín, máx) inclusivo, con None para dejar un extremo
+        abierto, o un valor exacto. Las claves son columnas de
+        PATRON_SETTINGS_KEYS o medidas m_* (p. ej. m_sisa_sisa).
+        """
+        where, args = [], []
+        for col, rng in ranges.items():
+            if col not in QUERY_COLUMNS:
+                raise KeyError(f"Columna desconocida: {col}")
+            if isinstance(rng, (tuple, list)):
+                lo, hi = rng
+                if lo is not None:
+                    where.append(f"{col} >= ?"); args.append(lo)
+                if hi is not None:
+                    where.append(f"{col} <= ?"); args.append(hi)
+            else:
+                where.append(f"{col} = ?"); args.append(rng)
+        if order_by not in QUERY_COLUMNS and order_by not in ("id", "name", "created"):
+            raise KeyError(f"Columna desconocida: {order_by}")
+        sql = "SELECT id, name FROM profiles"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {order_by}"
+        if limit is not None:
+            sql += " LIMIT ?"; args.append(int(limit))
+        return self.conn.execute(sql, args).fetchall()
+
+def _iter_json_files(paths, recursive):
+    if isinstance(paths, (str, os.PathLike)):
+        paths = [paths]
+    for path in paths:
+        if os.path.isdir(path):
+            if recursive:
+                for root, dirs, files in os.walk(path):
+                    dirs.sort()
+                    for fn in sorted(files):
+                        if fn.lower().endswith(".json"):
+                            yield os.path.join(root, fn)
+            else:
+                for fn in sorted(os.listdir(path)):
+                    if fn.lower().endswith(".json"):
+                        yield os.path.join(path, fn)
+        else:
+            yield path
+
+def _parse_range(text):
+    """'col=60:70' -> ('col', (60.0, 70.0)); 'col=45:' abre el máximo; 'col=3' es exacto."""
+    col, _, spec = text.partition("=")
+    if ":" not in spec:
+        return col, float(spec)
+    lo, _, hi = spec.partition(":")
+    return col, (float(lo) if lo else None, float(hi) if hi else None)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Biblioteca SQLite de perfiles de medidas de Patronaje.")
+    parser.add_argument("db", help="Archivo .sqlite")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="Importar archivos .json de medidas")
+    imp.add_argument("paths", nargs="+")
+    q = sub.add_parser("query", help="Buscar perfiles por rangos (col=mín:máx)")
+    q.add_argument("ranges", nargs="*")
+    q.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args(argv)
+    with ProfileStore(args.db) as store:
+        if args.cmd == "import":
+            ok, skipped = store.import_json_files(args.paths)
+            print(f"{ok} perfiles importados, {skipped} omitidos ({store.count()} en total)")
+        else:
+            for pid, name in store.query(limit=args.limit, **dict(_parse_range(r) for r in args.ranges)):
+                print(f"{pid}\t{name}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+"""Aprovechamiento de tela y residuo de Patronaje (NumPy, sin Blender).
+
+waste_metrics evalúa N contornos resueltos (N, 46, 3) en una pasada:
+área del patrón frente al rectángulo de tela, área de los recortes de
+manga (1–14) y cuello (17–44), perímetro y largo de corte interno.
+score_variants resuelve y evalúa un lote de parámetros con
+solve_pattern_batch; rank_variants ordena por aprovechamiento.
+"""
+
+from dataclasses import dataclass, fields
+
+import numpy as np
+
+from patronaje_core import DEFAULT_TEMPLATE, PATRON_SETTINGS_KEYS
+from patronaje_grading import _batch_columns, solve_pattern_batch
+
+@dataclass(frozen=True)
+class WasteMetrics:
+    """Métricas por variante (arrays (N,), cm y cm²)."""
+    fabric_width: np.ndarray
+    fabric_height: np.ndarray
+    fabric_area: np.ndarray
+    pattern_area: np.ndarray
+    waste_area: np.ndarray
+    utilization: np.ndarray      # pattern_area / fabric_area (0–1)
+    manga_cut_area: np.ndarray   # recorte de la manga (polígono 1–14); < 0 si sobresale del borde
+    cuello_cut_area: np.ndarray  # recorte del cuello (polígono 17–44)
+    perimeter: np.ndarray        # contorno completo
+    cut_length: np.ndarray       # cortes internos: curva de manga + curva de cuello
+
+    def __len__(self):
+        return len(self.utilization)
+
+    def row(self, i):
+        """Métricas de la variante i como dict de floats."""
+        return {f.name: float(getattr(self, f.name)[i]) for f in fields(self)}
+
+    def as_dict(self):
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+def _signed_area(x, y):
+    """Área con signo (positiva en sentido antihorario) de polígonos cerrados (N, n)."""
+    a2 = (x[:, :-1] * y[:, 1:] - x[:, 1:] * y[:, :-1]).sum(axis=1)
+    a2 += x[:, -1] * y[:, 0] - x[:, 0] * y[:, -1]
+    return a2 * 0.5
+
+def _path_length(x, y):
+    """Largo de polilíneas abiertas (N, n)."""
+    return np.hypot(np.diff(x, axis=1), np.diff(y, axis=1)).sum(axis=1)
+
+def waste_metrics(coords, template=None):
+    """WasteMetrics de contornos (N, n, 3) o (n, 3) en metros, plano XY o XZ.
+
+    La tela es el rectángulo envolvente del contorno: coincide con
+    pattern_width × pattern_height salvo con mantener_proporcion (el alto
+    sigue al ancho) o cuando la manga sobresale del borde izquierdo. El
+    contorno gira en sentido antihorario y los recortes hacia adentro en
+    sentido horario, de ahí el signo de las áreas de recorte.
+    """
+    t = template or DEFAULT_TEMPLATE
+    manga = slice(t.manga[0], t.manga[-1] + 1)
+    cuello = slice(t.cuello[0], t.cuello[-1] + 1)
+    c = np.asarray(coords, dtype=np.float64)
+    if c.ndim == 2:
+        c = c[None]
+    cm = 100.0
+    x = c[:, :, 0] * cm
+    # El alto vive en Y o en Z según la vista; la otra componente es 0
+    y = (c[:, :, 1] + c[:, :, 2]) * cm
+
+    width = x.max(axis=1) - x.min(axis=1)
+    height = y.max(axis=1) - y.min(axis=1)
+    fabric = width * height
+    area = np.abs(_signed_area(x, y))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        utilization = np.where(fabric > 0.0, area / fabric, 0.0)
+
+    outline_closed_x = np.concatenate([x, x[:, :1]], axis=1)
+    outline_closed_y = np.concatenate([y, y[:, :1]], axis=1)
+    xm, ym = x[:, manga], y[:, manga]
+    xk, yk = x[:, cuello], y[:, cuello]
+    return WasteMetrics(
+        fabric_width=width, fabric_height=height, fabric_area=fabric,
+        pattern_area=area, waste_area=fabric - area, utilization=utilization,
+        manga_cut_area=-_signed_area(xm, ym), cuello_cut_area=-_signed_area(xk, yk),
+        perimeter=_path_length(outline_closed_x, outline_closed_y),
+        cut_length=_path_length(xm, ym) + _path_length(xk, yk),
+    )
+
+def score_variants(params, chunk_size=8192, template=None):
+    """Resuelve y evalúa un lote de parámetros (cualquier entrada de solve_pattern_batch).
+
+    Procesa en bloques de chunk_size filas para acotar la memoria en
+    catálogos grandes; el resultado es el mismo que en una sola pasada.
+    """
+    if isinstance(params, dict):
+        # columnas normalizadas: cada bloque es un dict con las mismas claves
+        cols = _batch_columns(params)
+        n = len(cols[PATRON_SETTINGS_KEYS[0]])
+        block = lambda i: {key: col[i:i + chunk_size] for key, col in cols.items()}
+    else:
+        rows = params if isinstance(params, np.ndarray) else list(params)
+        n = len(rows)
+        block = lambda i: rows[i:i + chunk_size]
+    if n <= chunk_size:
+        return waste_metrics(solve_pattern_batch(block(0), template=template), template)
+    parts = [waste_metrics(solve_pattern_batch(block(i), template=template), template)
+             for i in range(0, n, chunk_size)]
+    return WasteMetrics(**{f.name: np.concatenate([getattr(p, f.name) for p in parts])
+                           for f in fields(WasteMetrics)})
+
+def rank_variants(metrics):
+    """Índices de mejor a peor: mayor aprovechamiento y, a igualdad, menor largo de corte."""
+    return np.lexsort((metrics.cut_length, -np.round(metrics.utilization, 6)))
@@ -0,0 +1,490 @@
+# -*- coding: utf-8 -*-
+bl_info = {
+    "name": "Relleno",
+    "author": "Mauro Menchón",
+    "version": (0, 1, 0),
+    "blender": (3, 6, 0),
+    "location": "View3D > N-panel > Relleno",
+    "description": "Rellena el contorno de un patrón con una malla de quads para simulación de tela",
+    "category": "Mesh",
+}
+
+import os
+
+import bpy
+import bmesh
+import numpy as np
+from bpy.types import Operator, Panel, PropertyGroup
+from bpy.props import BoolProperty, FloatProperty, IntProperty, PointerProperty, StringProperty
+from bpy.app.handlers import persistent
+
+# Motor sin bpy (relleno_core.py junto a este archivo)
+from relleno_core import outline_loops, plane_axes, grid_fill, adaptive_fill
+from relleno_cache import FillCache, fill_key
+from relleno_update import moved_segments, plan_update
+
+
+# ---------------------------
+# Utilidades
+# ---------------------------
+_SOURCE_PROP = "relleno_origen"
+# Lo que se rellenó la última vez: tramos del contorno y de refinamiento en el
+# plano (lista plana de K × 4) y los parámetros; con eso se actualiza sólo la
+# franja que cambió.
+_SEGMENTS_PROP = "relleno_tramos"
+_PARAMS_PROP = "relleno_parametros"
+
+
+def _mesh_arrays(mesh):
+    """Coordenadas locales (N, 3) y aristas (E, 2) de la malla, con foreach_get."""
+    co = np.empty(3 * len(mesh.vertices), dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    ed = np.empty(2 * len(mesh.edges), dtype=np.int32)
+    mesh.edges.foreach_get("vertices", ed)
+    return co.reshape(-1, 3).astype(np.float64), ed.reshape(-1, 2)
+
+
+def _seam_segments(mesh):
+    """Aristas marcadas como costura (seam): segmentos (K, 2, 3) en coordenadas locales."""
+    coords, edges = _mesh_arrays(mesh)
+    seam = np.zeros(len(mesh.edges), dtype=bool)
+    mesh.edges.foreach_get("use_seam", seam)
+    return coords[edges[seam]]
+
+
+def _guide_segments(context, guide, source):
+    """Aristas del objeto guía (curva o malla, ya evaluado) en coordenadas locales de source."""
+    evaluated = guide.evaluated_get(context.evaluated_depsgraph_get())
+    mesh = evaluated.to_mesh()
+    try:
+        coords, edges = _mesh_arrays(mesh)
+    finally:
+        evaluated.to_mesh_clear()
+    m = np.array(source.matrix_world.inverted() @ guide.matrix_world)
+    coords = coords @ m[:3, :3].T + m[:3, 3]
+    return coords[edges]
+
+
+def _source_object(obj):
+    """Objeto patrón de obj: el guardado si obj es un relleno, o el mismo obj."""
+    name = obj.get(_SOURCE_PROP)
+    if isinstance(name, str) and name in bpy.data.objects:
+        return bpy.data.objects[name]
+    return obj
+
+
+def fill_outline(coords, edges, cell, conforming=True, clearance=0.5,
+                 levels=0, features=None, band=0.0, refine_outline=False, cache=None):
+    """Relleno del contorno (coords locales, aristas). Devuelve (vértices (N, 3), quads (F, 4)).
+
+    conforming: anillo de quads con el borde sobre el contorno; si no, sólo la grilla.
+    levels, features (segmentos (K, 2, 3) locales), band, refine_outline:
+    densidad adaptativa (ver adaptive_fill); sólo con conforming.
+    cache: FillCache opcional, por contorno y parámetros.
+    """
+    index_loops = outline_loops(edges)
+    if not index_loops:
+        raise ValueError("El objeto no tiene un contorno cerrado")
+    u, v, w = plane_axes(coords)
+
+    def compute():
+        loops = [coords[l][:, [u, v]] for l in index_loops]
+        if conforming:
+            feats = None if features is None else np.asarray(features)[:, :, [u, v]]
+            fill = adaptive_fill(loops, cell, levels, feats, band, refine_outline, clearance)
+        else:
+            fill = grid_fill(loops, cell)
+        verts = np.empty((len(fill.verts), 3))
+        verts[:, u] = fill.verts[:, 0]
+        verts[:, v] = fill.verts[:, 1]
+        verts[:, w] = coords[:, w].mean()
+        return verts, fill.faces
+
+    if cache is None:
+        return compute()
+    params = (cell, conforming, clearance, levels, band, refine_outline, coords[:, w].mean())
+    return cache.get(fill_key([coords[l] for l in index_loops], features, params), compute)
+
+
+def fill_segments(coords, edges, features=None):
+    """Tramos del contorno y de refinamiento (K, 2, 2) en el plano: lo que determina el relleno."""
+    u, v, _w = plane_axes(coords)
+    segs = [np.stack([coords[l], coords[np.roll(l, -1)]], axis=1) for l in outline_loops(edges)]
+    if features is not None:
+        segs.append(np.asarray(features, dtype=np.float64).reshape(-1, 2, 3))
+    if not segs:
+        return np.zeros((0, 2, 2))
+    return np.concatenate(segs)[:, :, [u, v]]
+
+
+def _mesh_quads(mesh):
+    """Quads (F, 4) de la malla, o None si tiene otras caras (editada a mano)."""
+    n = len(mesh.polygons)
+    totals = np.empty(n, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_total", totals)
+    if (totals != 4).any():
+        return None
+    starts = np.empty(n, dtype=np.int32)
+    mesh.polygons.foreach_get("loop_start", starts)
+    loops = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loops)
+    return loops[starts[:, None] + np.arange(4)]
+
+
+def _has_annotations(obj):
+    """Si el relleno tiene grupos de vértices o costuras que una reconstrucción perdería."""
+    if len(obj.vertex_groups):
+        return True
+    seam = np.zeros(len(obj.data.edges), dtype=bool)
+    obj.data.edges.foreach_get("use_seam", seam)
+    return bool(seam.any())
+
+
+def _apply_update(mesh, update, verts):
+    """Aplica un FillUpdate con bmesh sobre la malla existente.
+
+    Sólo se tocan las caras y vértices de la franja; grupos de vértices,
+    costuras y aristas de Coser del resto quedan como estaban.
+    """
+    bm = bmesh.new()
+    bm.from_mesh(mesh)
+    bm.verts.ensure_lookup_table()
+    bm.faces.ensure_lookup_table()
+    n_old = len(bm.verts)
+    deform = bm.verts.layers.deform.active
+    dropped = [bm.faces[i] for i in update.drop_faces.tolist()]
+    freed = [bm.verts[i] for i in update.freed.tolist()]
+    ext = {i: bm.verts[i] for i in np.unique(update.add_faces[update.add_faces < n_old]).tolist()}
+    stale = {e for f in dropped for e in f.edges}
+    bmesh.ops.delete(bm, geom=dropped, context='FACES_ONLY')
+    for v in freed:
+        for e in list(v.link_edges):
+            bm.edges.remove(e)
+    # índices liberados: los ocupan los vértices nuevos, sin pesos viejos
+    for v, i in zip(freed, update.reused.tolist()):
+        v.co = verts[i]
+        if deform is not None:
+            v[deform].clear()
+    for k, i in enumerate(update.appended.tolist()):
+        v = bm.verts.new(verts[i])
+        v.index = n_old + k
+        ext[n_old + k] = v
+    for quad in update.add_faces.tolist():
+        bm.faces.new([ext[i] for i in quad])
+    # aristas de caras quitadas que no volvieron a usarse
+    for e in stale:
+        if e.is_valid and e.is_wire:
+            bm.edges.remove(e)
+    for v in freed[len(update.reused):]:
+        bm.verts.remove(v)
+    if update.order is not None:
+        order = update.order.tolist()
+        bm.verts.sort(key=lambda v: order[v.index])
+    bm.to_mesh(mesh)
+    bm.free()
+    mesh.update()
+
+
+def _build_fill_mesh(name, verts, faces):
+    """Malla de quads cargada en bloque con foreach_set (sin bmesh por vértice).
+
+    verts float32 e int32 contiguos (como los de la caché) pasan sin copia.
+    """
+    mesh = bpy.data.meshes.new(name)
+    n_faces = len(faces)
+    mesh.vertices.add(len(verts))
+    mesh.loops.add(4 * n_faces)
+    mesh.polygons.add(n_faces)
+    mesh.vertices.foreach_set("co", np.asarray(verts, dtype=np.float32).ravel())
+    mesh.loops.foreach_set("vertex_index", np.asarray(faces, dtype=np.int32).ravel())
+    mesh.polygons.foreach_set("loop_start", np.arange(0, 4 * n_faces, 4, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_total", np.full(n_faces, 4, dtype=np.int32))
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+def _find_fill(source):
+    """Objeto de relleno existente de source, o None."""
+    for obj in bpy.data.objects:
+        if obj.type == 'MESH' and obj.get(_SOURCE_PROP) == source.name:
+            return obj
+    return None
+
+
+def _fill_object(context, source):
+    """Objeto de relleno de source (lo crea si no existe)."""
+    obj = _find_fill(source)
+    if obj is not None:
+        return obj
+    obj = bpy.data.objects.new(f"{source.name}_relleno", bpy.data.meshes.new(f"{source.name}_relleno"))
+    obj[_SOURCE_PROP] = source.name
+    context.collection.objects.link(obj)
+    return obj
+
+
+# ---------------------------
+# Caché
+# ---------------------------
+# Una FillCache por carpeta; el LRU en memoria vive mientras el addon esté cargado.
+_CACHE_STATE = {'cache': None}
+
+
+def _cache_dir(p):
+    """Carpeta de la caché; con el .blend sin guardar, una carpeta temporal."""
+    if p.carpeta_cache.startswith("//") and not bpy.data.filepath:
+        return os.path.join(bpy.app.tempdir, "relleno_cache")
+    return bpy.path.abspath(p.carpeta_cache)
+
+
+def _fill_cache(p):
+    """FillCache de la carpeta elegida, o None con la caché apagada."""
+    if not p.usar_cache:
+        return None
+    directory = _cache_dir(p)
+    cache = _CACHE_STATE['cache']
+    if cache is None or cache.directory != directory:
+        cache = _CACHE_STATE['cache'] = FillCache(directory)
+    return cache
+
+
+# ---------------------------
+# Propiedades
+# ---------------------------
+def _guide_poll(self, obj):
+    return obj.type in {'CURVE', 'MESH'}
+
+
+class RellenoProperties(PropertyGroup):
+    celda_cm: FloatProperty(name="Tamaño de celda (cm)", description="Lado de los quads de la grilla (de las celdas base si hay refinamiento)", default=1.0, min=0.05, max=50.0, precision=2)
+    borde_conforme: BoolProperty(name="Borde sobre el contorno", description="Agrega un anillo de quads cuyo borde sigue el contorno exacto (esquinas incluidas)", default=True)
+    holgura: FloatProperty(name="Holgura (celdas)", description="Distancia mínima entre la grilla y el contorno, en celdas; el anillo la cubre", default=0.5, min=0.1, max=2.0, precision=2)
+    # Densidad adaptativa
+    niveles: IntProperty(name="Niveles de refinamiento", description="Cuántas veces se parte una celda en 3 × 3 cerca del contorno, costuras y curvas guía (0 = densidad uniforme)", default=0, min=0, max=3)
+    zona_cm: FloatProperty(name="Zona fina (cm)", description="Ancho de la franja de celdas finas alrededor de cada elemento", default=0.0, min=0.0, max=50.0, precision=2)
+    refinar_contorno: BoolProperty(name="Junto al contorno", description="Celdas finas a lo largo del contorno (el anillo sigue el tamaño fino)", default=True)
+    refinar_costuras: BoolProperty(name="Costuras y pliegues", description="Celdas finas junto a las aristas marcadas como costura (seam) en el patrón o en su relleno, como las líneas de pliegue de Doblar", default=True)
+    curvas: PointerProperty(name="Curvas guía", description="Curva o malla cuyas aristas también se refinan", type=bpy.types.Object, poll=_guide_poll)
+    # Caché
+    usar_cache: BoolProperty(name="Caché de rellenos", description="Reutiliza rellenos ya calculados para el mismo contorno y parámetros (memoria y disco)", default=True)
+    carpeta_cache: StringProperty(name="Carpeta", description="Carpeta de los rellenos guardados (.npy)", default="//relleno_cache/", subtype='DIR_PATH')
+    # Actualización
+    incremental: BoolProperty(name="Sólo lo que cambió", description="Con el relleno ya hecho, rehace sólo la franja de los tramos del contorno que se movieron: el resto conserva índices, grupos de vértices y costuras", default=True)
+    en_vivo: BoolProperty(name="Actualizar en vivo", description="Vuelve a rellenar cada vez que cambia la malla de un patrón que ya tiene relleno", default=False)
+
+
+# ---------------------------
+# Relleno y actualización
+# ---------------------------
+def _refill(context, source, p):
+    """Rellena source o, si ya tiene relleno con los mismos parámetros, actualiza
+    sólo la franja de los tramos que se movieron. Devuelve (nivel, mensaje) para report;
+    WARNING si se reconstruyó un relleno con grupos de vértices o costuras.
+    """
+    coords, edges = _mesh_arrays(source.data)
+    if not len(coords):
+        return 'ERROR', "El objeto no tiene un contorno cerrado"
+    target = _find_fill(source)
+    features = [np.zeros((0, 2, 3))]
+    if p.niveles and p.refinar_costuras:
+        features.append(_seam_segments(source.data))
+        if target is not None:
+            features.append(_seam_segments(target.data))
+    if p.niveles and p.curvas is not None:
+        features.append(_guide_segments(context, p.curvas, source))
+    features = np.concatenate(features)
+    cell, band = p.celda_cm * 0.01, p.zona_cm * 0.01
+    u, v, w = plane_axes(coords)
+    segments = fill_segments(coords, edges, features)
+    params = repr((cell, p.borde_conforme, p.holgura, p.niveles, band, p.refinar_contorno,
+                   (u, v, w), float(coords[:, w].mean())))
+
+    moved = None
+    if (p.incremental and target is not None and len(target.data.polygons)
+            and target.get(_PARAMS_PROP) == params and _SEGMENTS_PROP in target):
+        moved = moved_segments(np.array(target[_SEGMENTS_PROP]), segments)
+        if not len(moved):
+            return 'INFO', "Relleno sin cambios"
+
+    cache = _fill_cache(p)
+    hits = cache.hits + cache.disk_hits if cache else 0
+    try:
+        verts, faces = fill_outline(coords, edges, cell, p.borde_conforme, p.holgura,
+                                    p.niveles, features, band, p.refinar_contorno, cache)
+    except ValueError as e:
+        return 'ERROR', str(e)
+    if not len(faces):
+        return 'ERROR', "Ninguna celda entra en el contorno: probá con un tamaño de celda menor"
+    cached = " (caché)" if cache and cache.hits + cache.disk_hits > hits else ""
+
+    level, update = 'INFO', None
+    if moved is not None:
+        old_faces = _mesh_quads(target.data)
+        if old_faces is not None:
+            old_co, _ed = _mesh_arrays(target.data)
+            # misma precisión que la malla: lo que no cambió coincide exacto
+            new_co = np.asarray(verts, dtype=np.float32).astype(np.float64)
+            reach = band + (3.0 + p.holgura + p.niveles) * cell
+            update = plan_update(old_co[:, [u, v]], old_faces, new_co[:, [u, v]], faces, moved, reach)
+    if update is not None:
+        _apply_update(target.data, update, verts)
+        message = (f"Relleno actualizado: {len(update.drop_faces)} quads quitados, "
+                   f"{len(update.add_faces)} nuevos ({len(faces)} quads, {len(verts)} vértices){cached}")
+    else:
+        if target is None:
+            target = _fill_object(context, source)
+        elif p.incremental and _has_annotations(target):
+            level = 'WARNING'
+        old_mesh = target.data
+        target.data = _build_fill_mesh(f"{source.name}_relleno", verts, faces)
+        if old_mesh.users == 0:
+            bpy.data.meshes.remove(old_mesh)
+        message = f"Relleno: {len(faces)} quads, {len(verts)} vértices{cached}"
+        if level == 'WARNING':
+            message += (" — reconstruido entero (otros parámetros o cambios lejos del contorno):"
+                        " se perdieron los grupos de vértices y las costuras del relleno anterior")
+    target.matrix_world = source.matrix_world
+    target[_SEGMENTS_PROP] = segments.ravel().tolist()
+    target[_PARAMS_PROP] = params
+    return level, message
+
+
+# ---------------------------
+# Vista en vivo
+# ---------------------------
+# El handler sólo anota los patrones (con relleno) cuya malla cambió; el
+# timer los actualiza con el último estado, a lo sumo cada LIVE_INTERVAL s.
+LIVE_INTERVAL = 0.1
+_LIVE_STATE = {'pending': set()}
+
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph):
+    p = getattr(scene, "relleno_props", None)
+    if p is None or not p.en_vivo:
+        return
+    for update in depsgraph.updates:
+        if not (update.is_updated_geometry and isinstance(update.id, bpy.types.Object)):
+            continue
+        obj = update.id.original
+        # los cambios del propio relleno no disparan otra actualización
+        if obj.type == 'MESH' and _SOURCE_PROP not in obj and _find_fill(obj) is not None:
+            _LIVE_STATE['pending'].add(obj.name)
+    if _LIVE_STATE['pending'] and not bpy.app.timers.is_registered(_live_tick):
+        bpy.app.timers.register(_live_tick, first_interval=LIVE_INTERVAL)
+
+
+def _live_tick():
+    pending, _LIVE_STATE['pending'] = _LIVE_STATE['pending'], set()
+    p = getattr(bpy.context.scene, "relleno_props", None)
+    if p is None or not p.en_vivo:
+        return None
+    for name in pending:
+        source = bpy.data.objects.get(name)
+        if source is not None:
+            try:
+                _refill(bpy.context, source, p)
+            except Exception:
+                pass
+    return None
+
+
+# ---------------------------
+# Operador principal
+# ---------------------------
+class MESH_OT_relleno_fill(Operator):
+    bl_idname = "mesh.relleno_fill"
+    bl_label = "Rellenar"
+    bl_description = "Rellena el contorno del patrón activo con una malla de quads (o actualiza sólo lo que cambió)"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        obj = context.active_object
+        if not obj or obj.type != 'MESH':
+            self.report({'ERROR'}, "Seleccioná el patrón (malla) a rellenar")
+            return {'CANCELLED'}
+        level, message = _refill(context, _source_object(obj), context.scene.relleno_props)
+        self.report({level}, message)
+        return {'CANCELLED'} if level == 'ERROR' else {'FINISHED'}
+
+
+class MESH_OT_relleno_clear_cache(Operator):
+    bl_idname = "mesh.relleno_clear_cache"
+    bl_label = "Vaciar caché"
+    bl_description = "Borra los rellenos guardados en la carpeta de la caché"
+    bl_options = {'REGISTER'}
+
+    def execute(self, context):
+        p = context.scene.relleno_props
+        cache = _CACHE_STATE['cache']
+        if cache is None or cache.directory != _cache_dir(p):
+            cache = FillCache(_cache_dir(p))
+        removed = cache.clear(disk=True)
+        self.report({'INFO'}, f"Caché vaciada ({removed} archivos)")
+        return {'FINISHED'}
+
+
+# ---------------------------
+# Panel
+# ---------------------------
+class VIEW3D_PT_relleno(Panel):
+    bl_label = "Relleno"
+    bl_idname = "VIEW3D_PT_relleno"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = "Relleno"
+
+    def draw(self, context):
+        layout = self.layout
+        p = context.scene.relleno_props
+        col = layout.column(align=True)
+        col.prop(p, "celda_cm")
+        col.prop(p, "borde_conforme")
+        if p.borde_conforme:
+            col.prop(p, "holgura")
+            col.separator()
+            col.prop(p, "niveles")
+            if p.niveles:
+                col.prop(p, "zona_cm")
+                col.prop(p, "refinar_contorno")
+                col.prop(p, "refinar_costuras")
+                col.prop(p, "curvas")
+        col.separator()
+        col.prop(p, "usar_cache")
+        if p.usar_cache:
+            row = col.row(align=True)
+            row.prop(p, "carpeta_cache", text="")
+            row.operator(MESH_OT_relleno_clear_cache.bl_idname, text="", icon='TRASH')
+        col.separator()
+        col.prop(p, "incremental")
+        col.prop(p, "en_vivo")
+        col.separator()
+        col.operator(MESH_OT_relleno_fill.bl_idname, text="Rellenar", icon='MESH_GRID')
+
+
+# ---------------------------
+# Registro
+# ---------------------------
+classes = (
+    RellenoProperties,
+    MESH_OT_relleno_fill,
+    MESH_OT_relleno_clear_cache,
+    VIEW3D_PT_relleno,
+)
+
+def register():
+    for c in classes:
+        bpy.utils.register_class(c)
+    bpy.types.Scene.relleno_props = PointerProperty(type=RellenoProperties)
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+
+def unregister():
+    if _on_depsgraph_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(_on_depsgraph_update)
+    if bpy.app.timers.is_registered(_live_tick):
+        bpy.app.timers.unregister(_live_tick)
+    del bpy.types.Scene.relleno_props
+    for c in reversed(classes):
+        bpy.utils.unregister_class(c)
+
+if __name__ == "__main__":
+    register()
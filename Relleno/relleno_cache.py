@@ -0,0 +1,120 @@
+"""Caché de rellenos: LRU en memoria más archivos en disco (sin Blender).
+
+La clave es el sha1 de los lazos del contorno (coordenadas en float64, con
+el largo de cada lazo), de los segmentos de refinamiento y de los parámetros
+del relleno: el mismo talle en otro pedido, o volver a rellenar sin haber
+tocado el patrón, da la misma clave.
+
+Cada resultado va a dos .npy: vértices float32 (N, 3) y quads int32 (F, 4),
+el formato que esperan vertices.foreach_set y loops.foreach_set. Se leen con
+mmap_mode='r', así un acierto en disco no copia nada hasta que la malla se
+carga (.npz no admite mapeo en memoria). Se escriben a un temporal y se
+renombran, para que un corte no deje un archivo a medias.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+FILL_CACHE_VERSION = 1
+FILL_CACHE_SIZE = 32
+
+def fill_key(loops, features=None, params=()):
+    """Clave sha1 de un relleno: lazos (cada uno (N, k)), segmentos de refinamiento y parámetros."""
+    h = hashlib.sha1(f"relleno-{FILL_CACHE_VERSION}".encode("ascii"))
+    h.update(repr(tuple(params)).encode("ascii"))
+    for loop in loops:
+        # + 0.0 deja -0.0 como 0.0: misma geometría, mismos bytes
+        a = np.ascontiguousarray(np.asarray(loop, dtype=np.float64) + 0.0)
+        h.update(np.int64(a.shape).tobytes())
+        h.update(a.tobytes())
+    if features is not None and len(features):
+        h.update(b"features")
+        h.update(np.ascontiguousarray(np.asarray(features, dtype=np.float64) + 0.0).tobytes())
+    return h.hexdigest()
+
+class FillCache:
+    """LRU acotado de (vértices, quads) por clave, respaldado en directory (o sólo memoria si es None)."""
+
+    def __init__(self, directory=None, maxsize=FILL_CACHE_SIZE):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def _paths(self, key):
+        return (os.path.join(self.directory, f"{key}.verts.npy"),
+                os.path.join(self.directory, f"{key}.faces.npy"))
+
+    def _load(self, key):
+        if self.directory is None:
+            return None
+        verts_path, faces_path = self._paths(key)
+        try:
+            verts = np.load(verts_path, mmap_mode="r", allow_pickle=False)
+            faces = np.load(faces_path, mmap_mode="r", allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        if verts.dtype != np.float32 or faces.dtype != np.int32 or verts.ndim != 2 or faces.ndim != 2:
+            return None
+        return verts, faces
+
+    def _store(self, key, verts, faces):
+        if self.directory is None:
+            return
+        verts_path, faces_path = self._paths(key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # quads primero: un lector exige los dos archivos
+            for path, arr in ((faces_path, faces), (verts_path, verts)):
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    np.save(f, arr, allow_pickle=False)
+                os.replace(tmp, path)
+        except OSError:
+            # Carpeta no escribible: el relleno sigue, sólo queda en memoria
+            pass
+
+    def get(self, key, compute):
+        """(vértices, quads) de key; compute() -> (vértices, quads) si no está ni en memoria ni en disco."""
+        value = self._data.get(key)
+        if value is not None:
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+        value = self._load(key)
+        if value is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            verts, faces = compute()
+            value = (np.ascontiguousarray(verts, dtype=np.float32),
+                     np.ascontiguousarray(faces, dtype=np.int32).reshape(-1, 4))
+            self._store(key, *value)
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return value
+
+    def clear(self, disk=False):
+        """Vacía la memoria y, con disk, borra los archivos de la carpeta. Devuelve cuántos borró."""
+        self._data.clear()
+        self.hits = self.disk_hits = self.misses = 0
+        removed = 0
+        if disk and self.directory is not None and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith((".verts.npy", ".faces.npy")):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                        removed += 1
+                    except OSError:
+                        pass
+        return removed
+
+    def stats(self):
+        return {'hits': self.hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                'size': len(self._data), 'maxsize': self.maxsize}
@@ -0,0 +1,1220 @@
+"""Relleno de patrones con una grilla de quads (NumPy, sin Blender).
+
+El contorno llega como lazos cerrados de puntos (N, 2) en el plano del
+patrón (exterior y agujeros, p. ej. el cuello del panel completo).
+grid_fill ubica una grilla de celdas de lado `cell` anclada en el origen
+(x = i·cell, y = j·cell: la grilla no se corre al mover el contorno) y
+conserva las celdas que quedan dentro sin que el contorno las atraviese.
+
+La prueba de punto en polígono (par/impar) se hace para toda la grilla a la
+vez: se calculan los cruces de cada fila con todas las aristas, una sola
+búsqueda binaria ubica cada cruce entre las columnas y una suma acumulada
+da, para cada punto, cuántos cruces tiene a su izquierda. Lo mismo por
+columnas detecta las aristas de celda que el contorno corta.
+
+conforming_fill agrega la capa que se ajusta al contorno (el "inner ring"):
+la grilla se retira del borde una holgura, y cada vértice del borde
+escalonado de la grilla se proyecta sobre el contorno; entre ambos lazos
+queda un anillo de quads cuyos vértices exteriores están sobre las aristas
+del patrón, con el espaciado de la grilla. Las proyecciones usan un hash
+espacial uniforme de tramos de arista precalculados, así el costo crece
+linealmente con la cantidad de vértices del borde.
+
+adaptive_fill varía la densidad: cada celda base se parte en 3 × 3 (hasta
+tres niveles) cerca del contorno, de costuras o de curvas guía. Los niveles
+se guardan en una grilla del tamaño de la celda más fina y se equilibran
+para que cada celda tenga a lo sumo un lado refinado o dos contiguos; esos
+lados se cierran con plantillas de transición de quads, sin nodos colgados.
+"""
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+@dataclass(frozen=True)
+class Fill:
+    """Malla de relleno: vértices (N, 2) en el plano del patrón y quads (F, 4) antihorarios."""
+    verts: np.ndarray
+    faces: np.ndarray
+
+    @property
+    def quad_count(self):
+        return len(self.faces)
+
+def outline_loops(edges):
+    """Lazos cerrados del grafo de aristas (E, 2): lista de arrays de índices en orden.
+
+    Sólo cuentan las componentes en las que todo vértice tiene dos aristas
+    (líneas abiertas, como pliegues dibujados, se ignoran).
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    edges = edges[edges[:, 0] != edges[:, 1]]
+    if not len(edges):
+        return []
+    n = int(edges.max()) + 1
+    degree = np.bincount(edges.ravel(), minlength=n)
+    neighbours = [[] for _ in range(n)]
+    for a, b in edges.tolist():
+        neighbours[a].append(b)
+        neighbours[b].append(a)
+    seen = np.zeros(n, dtype=bool)
+    loops = []
+    for start in np.flatnonzero(degree).tolist():
+        if seen[start]:
+            continue
+        loop = [start]
+        closed = True
+        seen[start] = True
+        prev, cur = start, neighbours[start][0]
+        while cur != start:
+            if seen[cur] or degree[cur] != 2:
+                closed = False
+                break
+            seen[cur] = True
+            loop.append(cur)
+            a, b = neighbours[cur]
+            prev, cur = cur, (b if a == prev else a)
+        # marcar el resto de la componente para no volver a recorrerla
+        if not closed or degree[start] != 2:
+            stack = [start]
+            while stack:
+                v = stack.pop()
+                for w in neighbours[v]:
+                    if not seen[w]:
+                        seen[w] = True
+                        stack.append(w)
+            continue
+        loops.append(np.asarray(loop, dtype=np.int64))
+    return loops
+
+def plane_axes(coords):
+    """(u, v, w): ejes del plano del patrón y eje normal (el de menor extensión)."""
+    co = np.asarray(coords, dtype=np.float64)
+    w = int(np.argmin(co.max(axis=0) - co.min(axis=0)))
+    u, v = (a for a in range(3) if a != w)
+    return u, v, w
+
+def _segments(loops):
+    """Aristas de todos los lazos como (p0, p1), arrays (E, 2)."""
+    p0 = np.concatenate([np.asarray(l, dtype=np.float64) for l in loops])
+    p1 = np.concatenate([np.roll(np.asarray(l, dtype=np.float64), -1, axis=0) for l in loops])
+    return p0, p1
+
+def _crossing_counts(p0, p1, lines, samples):
+    """Cruces de las aristas p0→p1 con las rectas horizontales y = lines[j].
+
+    Devuelve (cuenta, total): cuenta[j, i] = cruces de la recta j con
+    x <= samples[i] (samples crecientes) y total[j] = cruces de la recta j.
+    Regla semiabierta en y, así un vértice sobre la recta cuenta una vez.
+    """
+    y0, y1 = p0[:, 1], p1[:, 1]
+    ly = lines[:, None]
+    hit = (np.minimum(y0, y1) <= ly) & (ly < np.maximum(y0, y1))
+    rows, segs = np.nonzero(hit)
+    t = (lines[rows] - y0[segs]) / (y1[segs] - y0[segs])
+    x = p0[segs, 0] + t * (p1[segs, 0] - p0[segs, 0])
+    # posición de cada cruce entre las columnas: cuenta para samples[i] si pos <= i
+    pos = np.searchsorted(samples, x, side="left")
+    width = len(samples) + 1
+    hist = np.bincount(rows * width + pos, minlength=len(lines) * width).reshape(len(lines), width)
+    return hist.cumsum(axis=1)[:, :-1], hist.sum(axis=1)
+
+def _lattice(lo, hi, cell):
+    """Coordenadas de la grilla anclada en 0 que cubren [lo, hi]."""
+    return np.arange(np.floor(lo / cell), np.ceil(hi / cell) + 1.0) * cell
+
+def grid_fill(loops, cell):
+    """Quads de la grilla de lado cell que quedan dentro del contorno.
+
+    Una celda se conserva si sus cuatro esquinas están dentro, ninguno de
+    sus lados corta el contorno y no contiene vértices del contorno.
+    """
+    if cell <= 0.0:
+        raise ValueError("El tamaño de celda debe ser positivo")
+    if not loops:
+        return Fill(np.zeros((0, 2)), np.zeros((0, 4), dtype=np.int32))
+    p0, p1 = _segments(loops)
+    lo = np.minimum(p0.min(axis=0), p1.min(axis=0))
+    hi = np.maximum(p0.max(axis=0), p1.max(axis=0))
+    xs = _lattice(lo[0], hi[0], cell)
+    ys = _lattice(lo[1], hi[1], cell)
+
+    # Filas: paridad de los cruces a la derecha de cada punto y lados horizontales cortados
+    count_h, total_h = _crossing_counts(p0, p1, ys, xs)
+    inside = (total_h[:, None] - count_h) % 2 == 1                 # (R, C)
+    cut_h = count_h[:, 1:] != count_h[:, :-1]                       # (R, C-1)
+    # Columnas: lo mismo con los ejes intercambiados
+    swap = [1, 0]
+    count_v, _ = _crossing_counts(p0[:, swap], p1[:, swap], xs, ys)
+    cut_v = (count_v[:, 1:] != count_v[:, :-1]).T                   # (R-1, C)
+
+    keep = (inside[:-1, :-1] & inside[:-1, 1:] & inside[1:, :-1] & inside[1:, 1:]
+            & ~cut_h[:-1] & ~cut_h[1:] & ~cut_v[:, :-1] & ~cut_v[:, 1:])
+    # Celdas con vértices del contorno adentro (puntas que no cortan lados)
+    ci = np.floor((p0[:, 0] - xs[0]) / cell).astype(np.int64)
+    cj = np.floor((p0[:, 1] - ys[0]) / cell).astype(np.int64)
+    ok = (ci >= 0) & (ci < keep.shape[1]) & (cj >= 0) & (cj < keep.shape[0])
+    keep[cj[ok], ci[ok]] = False
+
+    return _quads_from_cells(keep, xs, ys)
+
+def _quads_from_cells(keep, xs, ys):
+    """Fill con los quads de las celdas keep[j, i] de la grilla xs × ys."""
+    used = np.zeros((len(ys), len(xs)), dtype=bool)
+    used[:-1, :-1] |= keep
+    used[:-1, 1:] |= keep
+    used[1:, :-1] |= keep
+    used[1:, 1:] |= keep
+    index = np.cumsum(used.ravel()).reshape(used.shape) - 1
+    vj, vi = np.nonzero(used)
+    verts = np.stack([xs[vi], ys[vj]], axis=1)
+    cj, ci = np.nonzero(keep)
+    faces = np.stack([index[cj, ci], index[cj, ci + 1], index[cj + 1, ci + 1], index[cj + 1, ci]], axis=1)
+    return Fill(verts, faces.astype(np.int32))
+
+
+# ---------------------------
+# Hash espacial de aristas
+# ---------------------------
+_KEY_OFFSET = 1 << 30
+_NEIGHBOURS = (np.repeat([-1, 0, 1], 3), np.tile([-1, 0, 1], 3))
+
+def _bin_keys(bx, by):
+    return (bx + _KEY_OFFSET) * (2 * _KEY_OFFSET) + (by + _KEY_OFFSET)
+
+class SegmentHash:
+    """Aristas p0→p1 anotadas en una grilla uniforme de lado bin_size.
+
+    Cada arista se parte en tramos de largo <= bin_size y cada tramo se anota
+    en las (a lo sumo 2 × 2) celdas que toca su caja. nearest revisa las
+    3 × 3 celdas vecinas de cada punto: encuentra toda arista a menos de
+    bin_size del punto.
+    """
+
+    def __init__(self, p0, p1, bin_size):
+        self.p0 = np.asarray(p0, dtype=np.float64)
+        self.p1 = np.asarray(p1, dtype=np.float64)
+        self.bin_size = float(bin_size)
+        d = self.p1 - self.p0
+        pieces = np.maximum(np.ceil(np.hypot(d[:, 0], d[:, 1]) / self.bin_size), 1).astype(np.int64)
+        seg = np.repeat(np.arange(len(d)), pieces)
+        k = np.arange(len(seg)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        a = self.p0[seg] + (k / pieces[seg])[:, None] * d[seg]
+        b = self.p0[seg] + ((k + 1) / pieces[seg])[:, None] * d[seg]
+        lo = np.floor(np.minimum(a, b) / self.bin_size).astype(np.int64)
+        hi = np.floor(np.maximum(a, b) / self.bin_size).astype(np.int64)
+        keys, segs = [], []
+        for dx in (0, 1):
+            for dy in (0, 1):
+                ok = (lo[:, 0] + dx <= hi[:, 0]) & (lo[:, 1] + dy <= hi[:, 1])
+                keys.append(_bin_keys(lo[ok, 0] + dx, lo[ok, 1] + dy))
+                segs.append(seg[ok])
+        pairs = np.unique(np.stack([np.concatenate(keys), np.concatenate(segs)], axis=1), axis=0)
+        self._keys, first = np.unique(pairs[:, 0], return_index=True)
+        self._start = np.append(first, len(pairs))
+        self._segs = pairs[:, 1]
+
+    def nearest(self, pts, allowed=None):
+        """Arista más cercana a cada punto (dentro de las 3 × 3 celdas vecinas).
+
+        allowed: máscara opcional sobre las aristas. Devuelve (dist, seg, t);
+        dist = inf y seg = -1 si no hay aristas cerca.
+        """
+        pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+        n = len(pts)
+        dist = np.full(n, np.inf)
+        best = np.full(n, -1, dtype=np.int64)
+        param = np.zeros(n)
+        if not n or not len(self._keys):
+            return dist, best, param
+        b = np.floor(pts / self.bin_size).astype(np.int64)
+        keys = _bin_keys(b[:, 0, None] + _NEIGHBOURS[0], b[:, 1, None] + _NEIGHBOURS[1])   # (n, 9)
+        idx = np.searchsorted(self._keys, keys)
+        idx_c = np.minimum(idx, len(self._keys) - 1)
+        found = self._keys[idx_c] == keys
+        count = np.where(found, self._start[idx_c + 1] - self._start[idx_c], 0).ravel()
+        total = int(count.sum())
+        if not total:
+            return dist, best, param
+        query = np.repeat(np.repeat(np.arange(n), 9), count)
+        entry = (np.repeat(self._start[idx_c].ravel(), count)
+                 + np.arange(total) - np.repeat(np.cumsum(count) - count, count))
+        seg = self._segs[entry]
+        if allowed is not None:
+            ok = allowed[seg]
+            query, seg = query[ok], seg[ok]
+        if not len(query):
+            return dist, best, param
+        d, t = _point_segment(pts[query], self.p0[seg], self.p1[seg])
+        # los pares vienen agrupados por punto: mínimo por grupo sin ordenar
+        starts = np.flatnonzero(np.r_[True, query[1:] != query[:-1]])
+        q = query[starts]
+        group = np.cumsum(np.r_[False, query[1:] != query[:-1]])
+        hit = np.flatnonzero(d == np.minimum.reduceat(d, starts)[group])
+        first = hit[np.r_[True, query[hit][1:] != query[hit][:-1]]]
+        dist[q], best[q], param[q] = d[first], seg[first], t[first]
+        return dist, best, param
+
+def _point_segment(pts, a, b):
+    """Distancia de pts a los segmentos a→b y parámetro t del punto más cercano."""
+    d = b - a
+    dd = (d * d).sum(axis=1)
+    t = np.clip(((pts - a) * d).sum(axis=1) / np.where(dd > 0.0, dd, 1.0), 0.0, 1.0)
+    r = pts - (a + t[:, None] * d)
+    return np.hypot(r[:, 0], r[:, 1]), t
+
+def _nearest_brute(pts, p0, p1, allowed=None):
+    """nearest sin hash (respaldo para los pocos puntos lejos de todo tramo)."""
+    segs = np.flatnonzero(allowed) if allowed is not None else np.arange(len(p0))
+    q = np.repeat(np.arange(len(pts)), len(segs))
+    s = np.tile(segs, len(pts))
+    d, t = _point_segment(pts[q], p0[s], p1[s])
+    d = d.reshape(len(pts), -1)
+    k = d.argmin(axis=1)
+    rows = np.arange(len(pts))
+    return d[rows, k], segs[k], t.reshape(len(pts), -1)[rows, k]
+
+def _nearest_any(hashes, pts, allowed=None):
+    """nearest probando hashes del más fino al más grueso (vale el primero que
+    encuentra una arista a menos de su bin_size); el resto, sin hash."""
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    dist = np.full(len(pts), np.inf)
+    seg = np.full(len(pts), -1, dtype=np.int64)
+    param = np.zeros(len(pts))
+    todo = np.arange(len(pts))
+    for hash_ in hashes:
+        if not len(todo):
+            break
+        d, s, t = hash_.nearest(pts[todo], allowed)
+        ok = d <= hash_.bin_size
+        dist[todo[ok]], seg[todo[ok]], param[todo[ok]] = d[ok], s[ok], t[ok]
+        todo = todo[~ok]
+    if len(todo):
+        dist[todo], seg[todo], param[todo] = _nearest_brute(pts[todo], hashes[0].p0, hashes[0].p1, allowed)
+    return dist, seg, param
+
+# ---------------------------
+# Capa ajustada al contorno
+# ---------------------------
+def _orient_loops(loops):
+    """Lazos orientados con el interior del patrón a la izquierda (exterior antihorario, agujeros horario)."""
+    p0, p1 = _segments(loops)
+    out = []
+    for loop in loops:
+        loop = np.asarray(loop, dtype=np.float64)
+        d = np.roll(loop, -1, axis=0) - loop
+        k = int(np.argmax(np.hypot(d[:, 0], d[:, 1])))
+        length = math.hypot(*d[k])
+        probe = loop[k] + 0.5 * d[k] + 1e-3 * length * np.array([-d[k, 1], d[k, 0]]) / length
+        out.append(loop if _points_inside(p0, p1, probe[None])[0] else loop[::-1].copy())
+    return out
+
+def _points_inside(p0, p1, pts):
+    """Par/impar de cada punto contra todas las aristas (para pocos puntos)."""
+    y0, y1 = p0[:, 1], p1[:, 1]
+    py = pts[:, 1, None]
+    hit = (np.minimum(y0, y1) <= py) & (py < np.maximum(y0, y1))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x = p0[:, 0] + (py - y0) / (y1 - y0) * (p1[:, 0] - p0[:, 0])
+    return ((hit & (x > pts[:, 0, None])).sum(axis=1) % 2) == 1
+
+def _remove_pinches(keep, lev, levels):
+    """Quita hojas que tocan a otra sólo por una esquina (el borde no sería un lazo simple).
+
+    keep y lev están en la grilla fina; se quita la hoja entera de la celda
+    fina que toca por la esquina.
+    """
+    keep = keep.copy()
+    while True:
+        a, b = keep[:-1, :-1], keep[:-1, 1:]
+        c, d = keep[1:, :-1], keep[1:, 1:]
+        diag = a & d & ~b & ~c
+        anti = b & c & ~a & ~d
+        if not (diag.any() or anti.any()):
+            return keep
+        drop = np.zeros_like(keep)
+        drop[:-1, :-1] |= diag
+        drop[:-1, 1:] |= anti
+        keep &= ~_whole_leaves(drop, lev, levels)
+
+def _whole_leaves(mask, lev, levels):
+    """Máscara de la grilla fina extendida a las hojas enteras que toca."""
+    out = np.zeros_like(mask)
+    for l in range(levels + 1):
+        size = 3 ** (levels - l)
+        ny, nx = mask.shape[0] // size, mask.shape[1] // size
+        out |= _expand((mask & (lev == l)).reshape(ny, size, nx, size).any(axis=(1, 3)), size)
+    return out
+
+def _boundary_loops(faces, n_verts):
+    """Lazos de borde de quads antihorarios (aristas sin gemela), con la malla a la izquierda."""
+    he = np.stack([faces, np.roll(faces, -1, axis=1)], axis=2).reshape(-1, 2).astype(np.int64)
+    # arista sin orientación; las que aparecen una sola vez son de borde
+    key = np.sort(he, axis=1) @ np.array([n_verts, 1], dtype=np.int64)
+    order = np.argsort(key, kind="stable")
+    same = key[order[1:]] == key[order[:-1]]
+    shared = np.zeros(len(he), dtype=bool)
+    shared[order[1:][same]] = True
+    shared[order[:-1][same]] = True
+    border = he[~shared]
+    nxt = np.full(n_verts, -1, dtype=np.int64)
+    nxt[border[:, 0]] = border[:, 1]
+    seen = np.zeros(n_verts, dtype=bool)
+    loops = []
+    for start in border[:, 0].tolist():
+        if seen[start]:
+            continue
+        loop = []
+        v = start
+        while not seen[v]:
+            seen[v] = True
+            loop.append(v)
+            v = nxt[v]
+        loops.append(np.asarray(loop, dtype=np.int64))
+    return loops
+
+def _corner_mask(loop, angle):
+    """Vértices del lazo donde el contorno gira más de angle grados."""
+    d_in = loop - np.roll(loop, 1, axis=0)
+    d_out = np.roll(loop, -1, axis=0) - loop
+    cross = d_in[:, 0] * d_out[:, 1] - d_in[:, 1] * d_out[:, 0]
+    dot = (d_in * d_out).sum(axis=1)
+    return np.abs(np.degrees(np.arctan2(cross, dot))) > angle
+
+def _spread_group(s, fixed, k, e, lo, hi):
+    """Reparte parejos los libres de s[k:e + 1] entre los fijos del grupo y lo / hi en los extremos."""
+    anchors = [(k - 1, lo)] + [(i, s[i]) for i in range(k, e + 1) if fixed[i]] + [(e + 1, hi)]
+    for (a, va), (b, vb) in zip(anchors, anchors[1:]):
+        if b - a > 1:
+            s[a + 1:b] = np.linspace(va, vb, b - a + 1)[1:-1]
+    return s
+
+def _spread_runs(s, fixed, tol=0.0):
+    """Separa los valores repetidos de s (creciente, a menos de tol) entre sus vecinos distintos; los fijos no se mueven."""
+    n = len(s)
+    k = 0
+    while k < n:
+        e = k
+        while e + 1 < n and s[e + 1] - s[e] <= tol:
+            e += 1
+        if e > k:
+            _spread_group(s, fixed, k, e, 0.5 * (s[k - 1] + s[k]) if k > 0 else s[k],
+                          0.5 * (s[e] + s[e + 1]) if e + 1 < n else s[e])
+        k = e + 1
+    return s
+
+def _near_outline(p0, p1, xs, ys, cell, reach):
+    """Celdas de la grilla xs × ys a menos de reach (más una celda) de alguna arista."""
+    d = p1 - p0
+    pieces = np.maximum(np.ceil(np.hypot(d[:, 0], d[:, 1]) / cell), 1).astype(np.int64)
+    seg = np.repeat(np.arange(len(d)), pieces)
+    k = np.arange(len(seg)) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+    pts = p0[seg] + (k / pieces[seg])[:, None] * d[seg]
+    mask = np.zeros((len(ys) - 1, len(xs) - 1), dtype=bool)
+    ci = np.clip(np.floor((pts[:, 0] - xs[0]) / cell).astype(np.int64), 0, mask.shape[1] - 1)
+    cj = np.clip(np.floor((pts[:, 1] - ys[0]) / cell).astype(np.int64), 0, mask.shape[0] - 1)
+    mask[cj, ci] = True
+    for _ in range(int(math.ceil(reach / cell)) + 1):
+        grown = mask.copy()
+        grown[1:] |= mask[:-1]
+        grown[:-1] |= mask[1:]
+        grown[:, 1:] |= mask[:, :-1]
+        grown[:, :-1] |= mask[:, 1:]
+        mask = grown
+    return mask
+
+def _has_between(values, lo, hi):
+    """Para cada intervalo (lo[k], hi[k]), si algún valor (ordenados) cae estrictamente adentro."""
+    return np.searchsorted(values, hi, side="left") > np.searchsorted(values, lo, side="right")
+
+def _point_at(loop, cum, seg_len, s):
+    """Puntos del lazo en los parámetros de longitud de arco s (en [0, perímetro))."""
+    e = np.clip(np.searchsorted(cum, s, side="right") - 1, 0, len(loop) - 1)
+    t = (s - cum[e]) / np.where(seg_len[e] > 0.0, seg_len[e], 1.0)
+    d = np.roll(loop, -1, axis=0) - loop
+    return loop[e] + t[:, None] * d[e]
+
+# Separación mínima entre puntos vecinos del anillo sobre el contorno, en
+# fracciones del lado local del lazo escalonado
+_RING_MIN_GAP = 0.3
+
+# Giro (relativo al lado local al cuadrado) por debajo del cual _quad_score
+# toma un quad por plano: tres puntos alineados sobre el contorno dan un giro
+# que es cero más el redondeo, y el redondeo cambia con un tramo lejano
+_FLAT_TURN = 1e-9
+# Posiciones que se prueban para cada punto de un tramo con quads malos, entre sus vecinos
+_UNTANGLE_STEPS = 16
+# Particiones de _flip_quads sobre el hexágono (0..5) y el punto nuevo (6);
+# las de dos quads repiten el primero para ir en el mismo arreglo
+_FLIP_QUADS = np.array([[[0, 1, 2, 3], [3, 4, 5, 0], [3, 4, 5, 0]],
+                        [[1, 2, 3, 4], [4, 5, 0, 1], [4, 5, 0, 1]],
+                        [[2, 3, 4, 5], [5, 0, 1, 2], [5, 0, 1, 2]],
+                        [[0, 1, 2, 6], [6, 2, 3, 4], [4, 5, 0, 6]],
+                        [[1, 2, 3, 6], [6, 3, 4, 5], [5, 0, 1, 6]]])
+# Pesos de los vértices del hexágono para el punto nuevo de _flip_quads
+_SPLIT_POINTS = np.array([[1, 1, 1, 1, 1, 1], [1, 0, 1, 0, 1, 0], [0, 1, 0, 1, 0, 1]]) / np.array([[6.0], [3.0], [3.0]])
+# Veces que adaptive_fill rehace un anillo con quads malos refinando el contorno cerca
+_TANGLED_RETRIES = 2
+# Fracciones del camino desde c a las que _fan_candidates pone los puntos nuevos
+_FAN_REACH = np.array([1.0 / 3.0, 0.5, 2.0 / 3.0])
+# Quads de _fan_reflex sobre (a, b, c, g, q, r, y, z, w)
+_FAN_QUADS = np.array([[0, 1, 2, 6], [6, 2, 7, 8], [7, 2, 4, 5], [0, 6, 8, 3], [8, 7, 5, 3]])
+
+def _quad_cross(quads):
+    """Producto cruz de los lados que llegan y salen de cada vértice de quads (..., 4, 2): todos > 0 si es convexo y antihorario."""
+    e = np.roll(quads, -1, axis=-2) - quads
+    return np.roll(e[..., 0], 1, axis=-1) * e[..., 1] - np.roll(e[..., 1], 1, axis=-1) * e[..., 0]
+
+def _transition_points(g0, g1, c1, c2):
+    """Puntos interiores de la transición 1 → 3: a 2/3 del camino entre el lado de la grilla y el contorno."""
+    return (2.0 * g0 + g1) / 9.0 + 2.0 * c1 / 3.0, (g0 + 2.0 * g1) / 9.0 + 2.0 * c2 / 3.0
+
+def _tip_points(quad):
+    """Puntos interiores del quad de una punta partido en cinco: cada vértice, hacia el centro.
+
+    Uno llano (la punta sobre un lado recto) se mueve menos, así el quad
+    interior queda convexo.
+    """
+    t = np.where(_quad_cross(quad) > 0.0, 0.5, 0.25)
+    return quad + t[:, None] * (quad.mean(axis=0) - quad)
+
+def _interval_mesh(g0, g1, pts):
+    """Quads de un tramo g0 → g1 del anillo con sus k + 1 puntos sobre el contorno.
+
+    Devuelve (puntos interiores (J, 2), quads (K, 4)) con índices locales:
+    0 = g0, 1 = g1, 2.. los puntos del contorno y después los interiores.
+    k = 1: un quad; k = 3: la transición 1 → 3; k = 2n + 1 ≥ 5 (una punta
+    que la grilla no alcanza, ver _ladder_values): un quad contra el lado de
+    la grilla y una escalera de quads de un lado al otro de la punta; los
+    cuatro puntos del final forman la punta, partida en cinco quads si así
+    quedan menos cóncavos o planos.
+    """
+    k = len(pts) - 1
+    if k == 1:
+        return np.empty((0, 2)), np.array([[0, 2, 3, 1]])
+    if k == 3:
+        return (np.stack(_transition_points(g0, g1, pts[1], pts[2])),
+                np.array([[0, 2, 3, 6], [6, 3, 4, 7], [7, 4, 5, 1], [0, 6, 7, 1]]))
+    n = k // 2
+    i = np.arange(n - 1)
+    faces = np.concatenate([[[0, 2, 2 + k, 1]], np.stack([2 + i, 3 + i, 1 + k - i, 2 + k - i], axis=1)])
+    tip = n + 1 + np.arange(4)
+    inner = _tip_points(pts[tip - 2])
+    ids = k + 3 + np.arange(4)
+    split = np.concatenate([np.stack([tip, np.roll(tip, -1), np.roll(ids, -1), ids], axis=1), [ids]])
+    local = np.concatenate([[g0, g1], pts, inner])
+    scale = np.hypot(*(g1 - g0))
+    if _quad_score(local[split], scale)[0] < _quad_score(local[tip][None], scale)[0]:
+        return inner, np.concatenate([faces, split])
+    return np.empty((0, 2)), np.concatenate([faces, [tip]])
+
+def _interval_quads(g0, g1, pts):
+    """Quads (K, 4, 2) de un tramo g0 → g1 del anillo con sus puntos sobre el contorno (ver _interval_mesh)."""
+    inner, faces = _interval_mesh(g0, g1, pts)
+    return np.concatenate([[g0, g1], pts, inner])[faces]
+
+def _quad_score(quads, scale):
+    """(quads cóncavos o planos, -lado más corto / scale, hasta _RING_MIN_GAP): menor es mejor."""
+    e = np.roll(quads, -1, axis=1) - quads
+    shortest = np.hypot(e[..., 0], e[..., 1]).min() / scale
+    bad = int((_quad_cross(quads) <= _FLAT_TURN * scale * scale).any(axis=1).sum())
+    return bad, -min(shortest, _RING_MIN_GAP)
+
+def _split_evenly(lo, hi, fixed, count):
+    """count - 1 valores que parten (lo, hi) en count tramos: los fijos y el resto repartido según el largo."""
+    stops = np.concatenate([[lo], fixed, [hi]])
+    share = np.diff(stops) / (hi - lo) * (count - len(stops) + 1)
+    pieces = 1 + np.floor(share).astype(np.int64)
+    pieces[np.argsort(np.floor(share) - share)[:count - pieces.sum()]] += 1
+    return np.concatenate([np.linspace(a, b, p + 1)[1:] for a, b, p in zip(stops[:-1], stops[1:], pieces)])[:-1]
+
+def _transition_values(a, b, inside):
+    """Los dos puntos extra de la transición 1 → 3 en el tramo (a, b): las esquinas adentro o los tercios."""
+    inside = inside[:2].tolist()
+    if len(inside) == 1:
+        c = inside[0]
+        inside.append(0.5 * (c + b) if b - c > c - a else 0.5 * (a + c))
+    return np.array(sorted(inside) if inside else (a + (b - a) / 3.0, a + 2.0 * (b - a) / 3.0))
+
+def _ladder_values(a, b, inside, g0, g1, span, loop, cum, tol):
+    """Puntos extra de un tramo largo (a, b) para la escalera de _interval_mesh: (valores, punta).
+
+    El contorno rodea una punta que la grilla no alcanza (un cuello angosto,
+    un tajo): la punta es el vértice del tramo más lejos del lado g0 → g1.
+    Cada lado de la punta se parte en tramos de a lo sumo un lado del lazo
+    escalonado, con las esquinas (inside) entre los puntos y uno más del
+    lado más largo, así los escalones unen un punto de cada lado.
+    """
+    perimeter = cum[-1]
+    vs = a + (cum[:-1] - a) % perimeter
+    cand = np.flatnonzero((vs > a + tol) & (vs < b - tol))
+    apex = 0.5 * (a + b)
+    if len(cand):
+        d, _t = _point_segment(loop[cand], np.broadcast_to(g0, (len(cand), 2)), np.broadcast_to(g1, (len(cand), 2)))
+        apex = vs[cand[np.argmax(d)]]
+    left, right = inside[inside < apex - tol], inside[inside > apex + tol]
+    n = max(math.ceil((apex - a) / span), math.ceil((b - apex) / span), len(left) + 1, len(right) + 1)
+    n_left, n_right = (n, n - 1) if apex - a >= b - apex else (n - 1, n)
+    if n_left <= len(left) or n_right <= len(right):
+        n_left, n_right = n_left + 1, n_right + 1
+    return np.concatenate([_split_evenly(a, apex, left, n_left), [apex],
+                           _split_evenly(apex, b, right, n_right)]), apex
+
+def _settle_ring(values, pinned, at, inner_xy, span, points):
+    """Separa los puntos del anillo sobre el contorno que quedan casi encimados.
+
+    values: parámetro (creciente) de cada punto del anillo sobre el contorno,
+    con el cierre al final; at: posición en values del punto de cada vértice
+    del lazo escalonado (los extra de un tramo partido quedan entre medio).
+    points(v): puntos del contorno. Un grupo de puntos más juntos, en
+    promedio, que _RING_MIN_GAP lados puede quedar como está, abrirse hacia
+    atrás, hacia adelante o hacia los dos lados; se elige la opción cuyos
+    quads tienen menos cóncavos y, después, el lado más corto más largo.
+    """
+    n, m = len(values), len(at)
+    bounds = np.append(at, n - 1)
+    # separación pedida acumulada: un grupo crece hasta que sus puntos,
+    # repartidos parejo, quedan a la separación mínima
+    need = np.concatenate([[0.0], np.cumsum(_RING_MIN_GAP * np.repeat(span, np.diff(bounds)))])
+    k = 0
+    while k < n - 1:
+        e = k
+        while e + 1 < n - 1 and values[e + 1] - values[k] < need[e + 1] - need[k]:
+            e += 1
+        if e > k and not pinned[k:e + 1].all():
+            r = int(np.searchsorted(bounds, k, side="right")) - 1
+            first = max(r - int(bounds[r] == k), 0)
+            last = min(int(np.searchsorted(bounds, e, side="right")) - 1, m - 1)
+            lo, hi = int(bounds[first]), int(bounds[last + 1])
+
+            def score(v):
+                pts = points(v[lo:hi + 1])
+                quads = [_interval_quads(inner_xy[j], inner_xy[(j + 1) % m],
+                                         pts[bounds[j] - lo:bounds[j + 1] - lo + 1])
+                         for j in range(first, last + 1)]
+                return _quad_score(np.concatenate(quads), span[first:last + 1].min())
+
+            prev, after = values[k - 1], values[e + 1]
+            best, best_score = values, score(values)
+            for a, b in ((prev, values[e]), (values[k], after),
+                         (0.5 * (prev + values[k]), 0.5 * (values[e] + after))):
+                option = _spread_group(values.copy(), pinned, k, e, a, b)
+                option_score = score(option)
+                if option_score < best_score:
+                    best, best_score = option, option_score
+            values = best
+        k = e + 1
+    return values
+
+def _ring_quads(values, at, inner_xy, points):
+    """Quads (K, 4, 2) del anillo y el tramo de cada uno (values, at y points como en _settle_ring)."""
+    m = len(at)
+    bounds = np.append(at, len(values) - 1)
+    pts = points(values)
+    nxt = np.roll(np.arange(m), -1)
+    simple = np.flatnonzero(np.diff(bounds) == 1)
+    quads = [np.stack([inner_xy[simple], pts[bounds[simple]], pts[bounds[simple] + 1], inner_xy[nxt[simple]]], axis=1)]
+    owner = [simple]
+    for j in np.flatnonzero(np.diff(bounds) > 1).tolist():
+        quads.append(_interval_quads(inner_xy[j], inner_xy[nxt[j]], pts[bounds[j]:bounds[j + 1] + 1]))
+        owner.append(np.full(len(quads[-1]), j))
+    return np.concatenate(quads), np.concatenate(owner)
+
+def _untangle_ring(values, pinned, at, inner_xy, span, points, passes=4):
+    """Corre sobre el contorno los puntos de los tramos con quads cóncavos, planos o invertidos.
+
+    Cada punto libre de un tramo así se prueba en _UNTANGLE_STEPS posiciones
+    entre sus vecinos y queda en la que deja menos quads malos en los tramos
+    que lo usan (a igualdad, la de lado más corto más largo). Pasa, p. ej.,
+    en un escalón de la grilla perpendicular al contorno cuyas dos
+    proyecciones caen del mismo lado del escalón.
+    """
+    n, m = len(values), len(at)
+    bounds = np.append(at, n - 1)
+
+    def score(v, touch):
+        quads = [_interval_quads(inner_xy[j], inner_xy[(j + 1) % m], points(v[bounds[j]:bounds[j + 1] + 1]))
+                 for j in touch]
+        return _quad_score(np.concatenate(quads), span[touch].min())
+
+    for _ in range(passes):
+        quads, owner = _ring_quads(values, at, inner_xy, points)
+        bad = np.unique(owner[(_quad_cross(quads) <= 0.0).any(axis=1)])
+        moved = False
+        for j in bad.tolist():
+            for v in range(int(bounds[j]), int(bounds[j + 1]) + 1):
+                if pinned[v]:
+                    continue
+                r = int(np.searchsorted(bounds, v, side="right")) - 1
+                touch = [r - 1, r] if bounds[r] == v else [r]
+                best, best_score = values, score(values, touch)
+                for c in np.linspace(values[v - 1], values[v + 1], _UNTANGLE_STEPS + 2)[1:-1]:
+                    option = values.copy()
+                    option[v] = c
+                    option_score = score(option, touch)
+                    if option_score < best_score:
+                        best, best_score = option, option_score
+                moved |= best is not values
+                values = best
+        if not moved:
+            break
+    return values
+
+def _flip_quads(coords, faces):
+    """Vuelve a partir los pares de quads vecinos cuando uno está cruzado o cóncavo.
+
+    El par es un hexágono h0..h5 partido por h0-h3; se prueban las diagonales
+    h1-h4 y h2-h5 y, con un punto nuevo x adentro, los tres quads
+    [h0, h1, h2, x], [x, h2, h3, h4], [h4, h5, h0, x] (y su giro), y queda
+    lo que deja menos quads malos, si mejora. Pasa, p. ej., en un vértice del
+    lazo junto a la punta de un tajo, donde el quad de un lado queda cruzado
+    y tres puntos seguidos del hexágono están sobre la misma pared.
+    """
+    edge = {(u, v): f for f, quad in enumerate(faces.tolist()) for u, v in zip(quad, quad[1:] + quad[:1])}
+    bad = (_quad_cross(coords[faces]) <= 0.0).any(axis=1)
+    done, splits, points = set(), [], []
+    faces = faces.copy()
+    for f in np.flatnonzero(bad).tolist():
+        quad = faces[f].tolist()
+        for i in range(4):
+            other = edge.get((quad[(i + 1) % 4], quad[i]))
+            if other is None or done & {f, other}:
+                continue
+            x = quad[i + 1:] + quad[:i + 1]
+            y = faces[other].tolist()
+            y = y[y.index(x[-1]):] + y[:y.index(x[-1])]
+            hexagon = np.array(x + y[1:3])
+            corners = coords[hexagon]
+            # 0..5 el hexágono, 6 el punto nuevo; las tres primeras no lo usan
+            local = np.concatenate([np.broadcast_to(corners, (len(_SPLIT_POINTS), 6, 2)),
+                                    (_SPLIT_POINTS @ corners)[:, None]], axis=1)
+            cross = [_quad_cross(corners[_FLIP_QUADS[:3, :2]])]
+            cross.append(_quad_cross(local[:, _FLIP_QUADS[3:]].reshape(-1, 3, 4, 2)))
+            worse = np.concatenate([(c <= 0.0).any(axis=-1).sum(axis=-1) for c in cross])
+            best = int(np.argmin(worse))
+            if worse[best] >= worse[0]:
+                continue
+            done |= {f, other}
+            if best < 3:
+                faces[f], faces[other] = hexagon[_FLIP_QUADS[best, :2]]
+            else:
+                point, option = divmod(best - 3, 2)
+                n = len(coords) + len(points)
+                split = np.where(_FLIP_QUADS[3 + option] < 6, hexagon[_FLIP_QUADS[3 + option] % 6], n)
+                faces[f], faces[other] = split[:2]
+                splits.append(split[2:])
+                points.append(_SPLIT_POINTS[point] @ corners)
+            break
+    if not splits:
+        return coords, faces
+    return np.concatenate([coords, points]), np.concatenate([faces, *splits])
+
+def _fan_candidates(a, b, c, g, q, r):
+    """Posiciones (y, z, w) que prueba _fan_reflex, (K, 3, 2).
+
+    y sale de c hacia a, hacia g, siguiendo b → c o a mitad de camino entre
+    esos rayos; z lo mismo con r y q; w va sobre c-g. En la punta de un tajo
+    b → c casi vuelve sobre a → b y a y le queda sólo un sector angosto.
+    """
+    unit = lambda v: v / np.hypot(v[:, 0], v[:, 1])[:, None]
+
+    def around(p, back):
+        rays = unit(np.array([p - c, g - c, c - back]))
+        rays = np.concatenate([rays, unit(rays[[0, 0]] + rays[[2, 1]])])
+        reach = min(np.hypot(*(p - c)), np.hypot(*(g - c)))
+        return (c + _FAN_REACH[:, None, None] * reach * rays).reshape(-1, 2)
+
+    ys, zs = around(a, b), around(r, q)
+    ws = c + _FAN_REACH[:, None] * (g - c)
+    iy, iz, iw = np.meshgrid(np.arange(len(ys)), np.arange(len(zs)), np.arange(len(ws)), indexing="ij")
+    return np.stack([ys[iy.ravel()], zs[iz.ravel()], ws[iw.ravel()]], axis=1)
+
+def _fan_reflex(coords, faces):
+    """Cambia los pares de quads vecinos con más de 180° en el vértice común c por cinco quads.
+
+    Pasa en la punta de un tajo, donde los quads que la rodean suman 360°.
+    [a, b, c, g] y [g, c, q, r] pasan a [a, b, c, y], [y, c, z, w],
+    [z, c, q, r], [a, y, w, g] y [w, z, r, g] (el borde del par no cambia),
+    así c queda en tres quads. De las posiciones de _fan_candidates queda la
+    de menos quads malos y, a igualdad, la de giro más abierto; sólo se
+    cambia si quedan menos quads malos que en el par.
+    """
+    edge = {(u, v): f for f, quad in enumerate(faces.tolist()) for u, v in zip(quad, quad[1:] + quad[:1])}
+    bad = (_quad_cross(coords[faces]) <= 0.0).any(axis=1)
+    drop, fans, points = set(), [], []
+    for f in np.flatnonzero(bad).tolist():
+        quad = faces[f].tolist()
+        for i in np.flatnonzero(_quad_cross(coords[faces[f]]) <= 0.0).tolist():
+            c = quad[i]
+            for first, second, g in ((f, edge.get((quad[(i + 1) % 4], c)), quad[(i + 1) % 4]),
+                                     (edge.get((c, quad[i - 1])), f, quad[i - 1])):
+                if second is None or first is None or drop & {first, second}:
+                    continue
+                A, B = faces[first].tolist(), faces[second].tolist()
+                a, b = A[(A.index(c) + 2) % 4], A[(A.index(c) + 3) % 4]
+                q, r = B[(B.index(c) + 1) % 4], B[(B.index(c) + 2) % 4]
+                corners = coords[[a, b, c, g, q, r]]
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    options = _fan_candidates(*corners)
+                    local = np.concatenate([np.broadcast_to(corners, (len(options), 6, 2)), options], axis=1)
+                    cross = _quad_cross(local[:, _FAN_QUADS]) / np.hypot(*(coords[g] - coords[c])) ** 2
+                worse = (~(cross > 0.0)).any(axis=2).sum(axis=1)
+                best = np.lexsort((-np.nan_to_num(cross, nan=-np.inf).min(axis=(1, 2)), worse))[0]
+                if worse[best] < bad[first] + bad[second]:
+                    n = len(coords) + 3 * len(points)
+                    drop |= {first, second}
+                    fans.append(np.where(_FAN_QUADS < 6, np.array([a, b, c, g, q, r, 0, 0, 0])[_FAN_QUADS],
+                                         n + _FAN_QUADS - 6))
+                    points.append(options[best])
+                    break
+            if f in drop:
+                break
+    if not fans:
+        return coords, faces
+    keep = np.ones(len(faces), dtype=bool)
+    keep[list(drop)] = False
+    return np.concatenate([coords, *points]), np.concatenate([faces[keep], *fans])
+
+def _snap_corners(s, near, inner_xy, loop, cum, seg_len, corner_angle, tol):
+    """Lleva las esquinas del contorno a vértices del anillo: (s, fijos, esquinas sin vértice).
+
+    Una esquina va al vértice más cercano en parámetro, a menos de un lado
+    (ante un empate, el anterior). Si varios proyectan justo sobre ella (el
+    anillo rodea una punta), va al que tiene enfrente, en la bisectriz hacia
+    afuera de sus lados: así los demás quedan sobre el lado que enfrentan.
+    """
+    n, perimeter = len(s), cum[-1]
+    fixed = np.zeros(n, dtype=bool)
+    pending = []
+    for c in np.flatnonzero(_corner_mask(loop, corner_angle)):
+        sc = s[0] + (cum[c] - s[0]) % perimeter
+        i = int(np.searchsorted(s, sc - tol))
+        ties = [j for j in range(i, int(np.searchsorted(s, sc + tol, side="right"))) if not fixed[j]]
+        if len(ties) > 1:
+            # coseno de cada empate con la bisectriz hacia afuera de los lados de la esquina
+            legs = loop[[c - 1, (c + 1) % len(loop)]] - loop[c]
+            out = -(legs / np.hypot(*legs.T)[:, None]).sum(axis=0)
+            rel = inner_xy[ties] - loop[c]
+            cands = [ties[int(np.argmax(rel @ out / np.maximum(np.hypot(*rel.T), 1e-300)))]]
+        else:
+            cands = [j for j in (i - 1, i) if 0 <= j < n and not fixed[j] and abs(s[j] - sc) <= near[j] + tol]
+        if cands:
+            j = cands[0]
+            if len(cands) == 2 and abs(s[cands[1]] - sc) < abs(s[j] - sc) - tol:
+                j = cands[1]
+            s[j] = sc
+            fixed[j] = True
+        else:
+            pending.append(sc)
+    return s, fixed, pending
+
+def _ring(inner_idx, inner_xy, loop, hashes, allowed, seg_base, corner_angle, outer_base):
+    """Anillo de quads entre un lazo escalonado de la grilla y su lazo de contorno.
+
+    inner_idx / inner_xy: vértices del lazo escalonado, con la grilla a la
+    izquierda; loop: lazo de contorno orientado igual, cuyas aristas son
+    seg_base.. en hashes. Devuelve (puntos sobre el contorno (K, 2), quads,
+    posiciones del lazo escalonado en quads cóncavos o invertidos, que
+    deberían faltar); los puntos nuevos (sobre el contorno y luego los
+    interiores de las transiciones y las puntas) se numeran desde
+    outer_base. Las tolerancias siguen el largo de los lados del lazo
+    escalonado (varía con la densidad).
+    """
+    span = np.hypot(*(np.roll(inner_xy, -1, axis=0) - inner_xy).T)
+    near = np.maximum(span, np.roll(span, 1))
+    seg_len = np.hypot(*(np.roll(loop, -1, axis=0) - loop).T)
+    cum = np.concatenate([[0.0], np.cumsum(seg_len)])
+    perimeter = cum[-1]
+
+    _dist, seg, t = _nearest_any(hashes, inner_xy, allowed)
+    seg = seg - seg_base
+    s = cum[seg] + t * seg_len[seg]
+
+    # Parámetro continuo y creciente a lo largo del lazo escalonado
+    d = (np.diff(s) + 0.5 * perimeter) % perimeter - 0.5 * perimeter
+    s = np.maximum.accumulate(np.concatenate([[s[0]], s[0] + np.cumsum(d)]))
+    s = np.minimum(s, s[0] + perimeter)
+
+    # Las comparaciones llevan una tolerancia: s acumula el largo de todo el
+    # lazo, y sin ella un empate exacto (esquina justo a un lado de distancia)
+    # se resolvería por redondeo distinto cuando cambia un tramo lejano
+    tol = 1e-9 * perimeter
+
+    s, fixed, pending = _snap_corners(s, near, inner_xy, loop, cum, seg_len, corner_angle, tol)
+    # el vértice 0 una vuelta después cierra el lazo: fijo, para que nada lo alcance
+    closed = _spread_runs(np.append(s, s[0] + perimeter), np.append(fixed, True), tol)
+    s = closed[:-1]
+
+    # Intervalos largos o con una esquina sin vértice: puntos extra sobre el
+    # contorno. Con dos, la transición 1 → 3 (dos puntos interiores, cuatro
+    # quads); uno de más de cuatro lados rodea una punta que la grilla no
+    # alcanza (un cuello angosto) y se parte en proporción a su largo, con la
+    # escalera de _interval_mesh, salvo que así queden más quads malos. Una esquina
+    # que cayó sobre un vértice del anillo ya está.
+    nxt = np.append(s[1:], s[0] + perimeter)
+    pending = np.sort(np.asarray(pending, dtype=np.float64))
+    i = np.clip(np.searchsorted(closed, pending), 1, len(closed) - 1)
+    pending = pending[np.minimum(closed[i] - pending, pending - closed[i - 1]) > tol]
+    split = np.flatnonzero((nxt - s > 2.0 * span + tol) | _has_between(pending, s, nxt))
+    m = len(s)
+    points = lambda v: _point_at(loop, cum, seg_len, v % perimeter)
+    extra, keep = [], [pending]
+    for k in split.tolist():
+        a, b = s[k], nxt[k]
+        inside = pending[(pending > a) & (pending < b)]
+        best = _transition_values(a, b, inside)
+        if b - a > 4.0 * span[k] + tol:
+            g0, g1 = inner_xy[k], inner_xy[(k + 1) % m]
+            ladder, apex = _ladder_values(a, b, inside, g0, g1, span[k], loop, cum, tol)
+            if (_quad_score(_interval_quads(g0, g1, points(np.concatenate([[a], ladder, [b]]))), span[k])[0]
+                    <= _quad_score(_interval_quads(g0, g1, points(np.concatenate([[a], best, [b]]))), span[k])[0]):
+                best = ladder
+                keep.append([apex])
+        extra.append(best)
+    keep = np.concatenate(keep)
+
+    # Puntos del contorno casi encimados (una esquina junto a la proyección de
+    # un vecino, un escalón de la grilla perpendicular al contorno, una curva
+    # cóncava que junta muchas proyecciones) darían quads chatos o cóncavos.
+    # El vértice 0 queda fijo, porque también cierra el lazo
+    counts = np.zeros(m, dtype=np.int64)
+    counts[split] = [len(e) for e in extra]
+    at = np.arange(m) + np.cumsum(counts) - counts
+    at_extra = np.concatenate([[0]] + [at[k] + 1 + np.arange(counts[k]) for k in split.tolist()])[1:]
+    values = np.empty(m + counts.sum() + 1)
+    pinned = np.ones(len(values), dtype=bool)
+    values[at], pinned[at] = s, fixed
+    if len(split):
+        values[at_extra] = np.concatenate(extra)
+        pinned[at_extra] = np.isin(values[at_extra], keep)
+    values[-1] = s[0] + perimeter
+    pinned[0] = True
+    values = _settle_ring(values, pinned, at, inner_xy, span, points)
+    values = _untangle_ring(values, pinned, at, inner_xy, span, points)
+
+    # Índices locales: los vértices del lazo escalonado (0..m - 1), los puntos
+    # de esos vértices sobre el contorno, los extra y los interiores
+    order = np.concatenate([at, at_extra]).astype(np.int64)
+    ids = np.empty(len(values), dtype=np.int64)
+    ids[order] = m + np.arange(len(order))
+    ids[-1] = ids[0]
+    bounds = np.append(at, len(values) - 1)
+    pts = points(values)
+    g = np.arange(m)
+    g_next = np.roll(g, -1)
+    simple = np.ones(m, dtype=bool)
+    simple[split] = False
+    faces = [np.stack([g, ids[bounds[:-1]], ids[bounds[:-1] + 1], g_next], axis=1)[simple]]
+    coords = [inner_xy, pts[order]]
+    next_id = m + len(order)
+    for k in split.tolist():
+        lo, hi = bounds[k], bounds[k + 1] + 1
+        inner, local = _interval_mesh(inner_xy[k], inner_xy[g_next[k]], pts[lo:hi])
+        index = np.concatenate([[k, g_next[k]], ids[lo:hi], next_id + np.arange(len(inner))])
+        faces.append(index[local])
+        coords.append(inner)
+        next_id += len(inner)
+    coords, faces = _fan_reflex(*_flip_quads(np.concatenate(coords), np.concatenate(faces)))
+    wrong = faces[(_quad_cross(coords[faces]) <= 0.0).any(axis=1)]
+    index = np.concatenate([np.asarray(inner_idx), outer_base + np.arange(len(coords) - m)])
+    return coords[m:], index[faces], np.unique(wrong[wrong < m])
+
+
+# ---------------------------
+# Densidad adaptativa
+# ---------------------------
+# Transiciones de una hoja hacia vecinos partidos en 3 × 3, en tercios de
+# celda. Un lado refinado (abajo): dos puntos interiores a 1/3 de altura y
+# cuatro quads. Dos lados contiguos (abajo e izquierda): puntos interiores en
+# (1, 1) y (2, 2) y cinco quads. Las demás orientaciones son rotaciones de
+# 90° alrededor del centro: la k-ésima refina el lado k (o los lados k y k - 1),
+# con los lados numerados abajo, derecha, arriba, izquierda.
+_SIDE = np.array([[(0, 0), (1, 0), (1, 1), (0, 3)],
+                  [(1, 0), (2, 0), (2, 1), (1, 1)],
+                  [(2, 0), (3, 0), (3, 3), (2, 1)],
+                  [(1, 1), (2, 1), (3, 3), (0, 3)]], dtype=np.int64)
+_CORNER = np.array([[(0, 0), (1, 0), (1, 1), (0, 1)],
+                    [(1, 0), (2, 0), (2, 2), (1, 1)],
+                    [(0, 1), (1, 1), (2, 2), (0, 2)],
+                    [(2, 0), (3, 0), (3, 3), (2, 2)],
+                    [(0, 2), (2, 2), (3, 3), (0, 3)]], dtype=np.int64)
+
+def _rotations(template):
+    out = [template]
+    for _ in range(3):
+        out.append(np.stack([3 - out[-1][..., 1], out[-1][..., 0]], axis=-1))
+    return out
+
+_SIDE_TRANSITIONS = _rotations(_SIDE)
+_CORNER_TRANSITIONS = _rotations(_CORNER)
+_SQUARE = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.int64)
+
+def _expand(mask, size):
+    """Máscara por bloques llevada a la grilla fina (cada bloque son size × size celdas finas)."""
+    return np.repeat(np.repeat(mask, size, axis=0), size, axis=1)
+
+def _side_levels(lev, size):
+    """Nivel más fino del otro lado de cada lado de los bloques size × size de lev.
+
+    Devuelve (4, filas, columnas): abajo, derecha, arriba, izquierda; -1 fuera de la grilla.
+    """
+    h, w = lev.shape
+    ny, nx = h // size, w // size
+    pad = np.pad(lev, 1, constant_values=-1)
+    below = pad[0:h:size, 1:w + 1].reshape(ny, nx, size).max(axis=2)
+    above = pad[size + 1:h + 2:size, 1:w + 1].reshape(ny, nx, size).max(axis=2)
+    left = pad[1:h + 1, 0:w:size].reshape(ny, size, nx).max(axis=1)
+    right = pad[1:h + 1, size + 1:w + 2:size].reshape(ny, size, nx).max(axis=1)
+    return np.stack([below, right, above, left])
+
+def _leaf_levels(shape, origin, cell, levels, targets, band):
+    """Nivel de la hoja que contiene cada celda fina, grilla (filas, columnas) · 3^levels.
+
+    targets: tríos (p0, p1, factor) de segmentos. Una hoja de nivel l (lado
+    c = cell / 3^l) se parte en 3 × 3 si su centro está a menos de
+    band + factor · c de algún segmento. Después se
+    equilibra: se parten las hojas con un vecino dos niveles más fino, con
+    dos lados opuestos refinados o con tres o más, así toda hoja con un lado
+    refinado (o dos contiguos) se cierra con una transición sin nodos colgados.
+    """
+    fine = 3 ** levels
+    lev = np.zeros((shape[0] * fine, shape[1] * fine), dtype=np.int8)
+    if not targets:
+        return lev
+    for l in range(levels):
+        size = 3 ** (levels - l)
+        c = cell / 3 ** l
+        cj, ci = np.nonzero(lev[::size, ::size] == l)
+        centres = np.stack([(origin[0] * 3 ** l + ci + 0.5) * c, (origin[1] * 3 ** l + cj + 0.5) * c], axis=1)
+        near = np.zeros(len(centres), dtype=bool)
+        for p0, p1, factor in targets:
+            near |= SegmentHash(p0, p1, band + factor * c).nearest(centres)[0] < band + factor * c
+        split = np.zeros((shape[0] * 3 ** l, shape[1] * 3 ** l), dtype=bool)
+        split[cj[near], ci[near]] = True
+        lev[_expand(split, size)] = l + 1
+    return _balance(lev, levels)
+
+def _balance(lev, levels):
+    """Parte hojas hasta que cada una tenga a lo sumo un lado refinado o dos contiguos."""
+    changed = True
+    while changed:
+        changed = False
+        for l in range(levels):
+            size = 3 ** (levels - l)
+            sides = _side_levels(lev, size)
+            finer = sides > l
+            split = (lev[::size, ::size] == l) & ((finer.sum(axis=0) >= 3) | (finer[0] & finer[2])
+                                                  | (finer[1] & finer[3]) | (sides > l + 1).any(axis=0))
+            if split.any():
+                lev[_expand(split, size)] = l + 1
+                changed = True
+    return lev
+
+def _inside_leaves(lev, levels, origin, cell, p0, p1, hashes, clearance):
+    """Hojas con el centro adentro y a más de su holgura del contorno, en la grilla fina.
+
+    La holgura de una hoja de lado c es (media diagonal + clearance) · c.
+    """
+    keep = np.zeros(lev.shape, dtype=bool)
+    for l in range(levels + 1):
+        size = 3 ** (levels - l)
+        leaf = lev[::size, ::size] == l
+        rows = np.flatnonzero(leaf.any(axis=1))
+        if not len(rows):
+            continue
+        c = cell / 3 ** l
+        reach = (math.sqrt(0.5) + clearance) * c
+        xs = (origin[0] * 3 ** l + np.arange(leaf.shape[1] + 1)) * c
+        ys = (origin[1] * 3 ** l + np.arange(leaf.shape[0] + 1)) * c
+        xc, yc = xs[:-1] + 0.5 * c, ys[:-1] + 0.5 * c
+        count, total = _crossing_counts(p0, p1, yc[rows], xc)
+        inside = np.zeros(leaf.shape, dtype=bool)
+        inside[rows] = (total[:, None] - count) % 2 == 1
+        inside &= leaf
+        # Distancias sólo en la franja de celdas cercanas al contorno
+        cj, ci = np.nonzero(inside & _near_outline(p0, p1, xs, ys, c, reach))
+        dist, _seg, _t = hashes[levels - l].nearest(np.stack([xc[ci], yc[cj]], axis=1))
+        inside[cj[dist < reach], ci[dist < reach]] = False
+        keep |= _expand(inside, size)
+    return keep
+
+def _leaf_quads(keep, lev, levels, origin, cell):
+    """Fill con los quads de las hojas conservadas; transiciones en las que tienen lados refinados.
+
+    Los vértices se identifican por su posición en la grilla fina, así las
+    hojas vecinas de distinto nivel comparten los puntos de sus lados.
+    """
+    h, w = lev.shape
+    corners = []
+    for l in range(levels + 1):
+        size = 3 ** (levels - l)
+        leaf = (lev[::size, ::size] == l) & keep[::size, ::size]
+        if not leaf.any():
+            continue
+        finer = _side_levels(lev, size) > l if l < levels else np.zeros((4,) + leaf.shape, dtype=bool)
+        n_finer = finer.sum(axis=0)
+        cj, ci = np.nonzero(leaf & (n_finer == 0))
+        corners.append((np.stack([ci, cj], axis=1)[:, None, :] + _SQUARE) * size)
+        for k in range(4):
+            for template, mask in ((_SIDE_TRANSITIONS[k], finer[k] & (n_finer == 1)),
+                                   (_CORNER_TRANSITIONS[k], finer[k] & finer[k - 1])):
+                cj, ci = np.nonzero(leaf & mask)
+                base = np.stack([ci, cj], axis=1)[:, None, None, :] * size
+                corners.append((base + template * (size // 3)).reshape(-1, 4, 2))
+    corners = np.concatenate(corners) if corners else np.zeros((0, 4, 2), dtype=np.int64)
+    keys, faces = np.unique(corners[..., 1] * (w + 1) + corners[..., 0], return_inverse=True)
+    step = cell / 3 ** levels
+    fine = 3 ** levels
+    verts = np.stack([(origin[0] * fine + keys % (w + 1)) * step, (origin[1] * fine + keys // (w + 1)) * step], axis=1)
+    return Fill(verts, faces.reshape(-1, 4).astype(np.int32))
+
+def _claim_loops(grid, hashes, loop_id):
+    """Lazos escalonados de la grilla: ({lazo de contorno: lazo escalonado}, huecos, islas).
+
+    Cada lazo escalonado va con el lazo de contorno al que proyecta la
+    mayoría de sus vértices; si varios van al mismo, queda el más largo. De
+    los que quedan sin reclamar, los horarios son huecos de la grilla y los
+    antihorarios, islas sueltas (las dos cosas quedarían sin anillo).
+    """
+    claimed, rest = {}, []
+    for inner in _boundary_loops(grid.faces, len(grid.verts)):
+        _d, seg, _t = _nearest_any(hashes, grid.verts[inner])
+        target = int(np.bincount(loop_id[seg]).argmax())
+        if target not in claimed or len(inner) > len(claimed[target]):
+            if target in claimed:
+                rest.append(claimed[target])
+            claimed[target] = inner
+        else:
+            rest.append(inner)
+    holes, islands = [], []
+    for inner in rest:
+        x, y = grid.verts[inner].T
+        (holes if np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)) < 0.0 else islands).append(inner)
+    return claimed, holes, islands
+
+def _cells_beside(loops, verts, origin, step, shape, side):
+    """Celdas finas (lado step, grilla desde origin en pasos finos) junto a las aristas de los lazos.
+
+    side = 1: a la derecha de cada arista; side = -1: a la izquierda.
+    """
+    mask = np.zeros(shape, dtype=bool)
+    for loop in loops:
+        a = np.rint(verts[loop] / step)
+        b = np.roll(a, -1, axis=0)
+        d = np.sign(b - a) * side
+        cell = np.floor(0.5 * (a + b) + 0.5 * np.stack([d[:, 1], -d[:, 0]], axis=1)).astype(np.int64) - origin
+        mask[cell[:, 1], cell[:, 0]] = True
+    return mask
+
+def _feature_segments(features):
+    """Segmentos (K, 2, 2) como (p0, p1)."""
+    f = np.asarray(features, dtype=np.float64).reshape(-1, 2, 2)
+    return f[:, 0], f[:, 1]
+
+def adaptive_fill(loops, cell, levels=0, features=None, band=0.0, refine_outline=False,
+                  clearance=0.5, corner_angle=30.0):
+    """conforming_fill con celdas más finas cerca de costuras, pliegues y curvas.
+
+    cell: lado de las celdas base. levels: cuántas veces (0–3) se puede
+    partir una celda en 3 × 3. features: segmentos (K, 2, 2) alrededor de
+    los cuales se refina (costuras, pliegues, curvas guía); refine_outline
+    suma las aristas del contorno. band: ancho de la zona de celdas finas.
+    """
+    if cell <= 0.0:
+        raise ValueError("El tamaño de celda debe ser positivo")
+    if not 0 <= levels <= 3:
+        raise ValueError("Los niveles de refinamiento van de 0 a 3")
+    if not loops:
+        return Fill(np.zeros((0, 2)), np.zeros((0, 4), dtype=np.int32))
+    loops = _orient_loops(loops)
+    p0, p1 = _segments(loops)
+    loop_id = np.repeat(np.arange(len(loops)), [len(l) for l in loops])
+    seg_base = np.concatenate([[0], np.cumsum([len(l) for l in loops])])[:-1]
+    # un hash por nivel, del más fino al más grueso: cada hoja consulta el de su tamaño
+    hashes = [SegmentHash(p0, p1, (math.sqrt(2.0) + clearance) * cell / 3 ** l) for l in range(levels, -1, -1)]
+
+    lo = np.minimum(p0.min(axis=0), p1.min(axis=0))
+    hi = np.maximum(p0.max(axis=0), p1.max(axis=0))
+    xs = _lattice(lo[0], hi[0], cell)
+    ys = _lattice(lo[1], hi[1], cell)
+    origin = np.rint([xs[0] / cell, ys[0] / cell]).astype(np.int64)
+    shape = (len(ys) - 1, len(xs) - 1)
+
+    # Junto al contorno se refina también la franja que la holgura descarta,
+    # así el borde escalonado (y el anillo) quedan con las celdas finas
+    targets = []
+    if levels:
+        f0, f1 = _feature_segments(features if features is not None else np.zeros((0, 2, 2)))
+        if len(f0):
+            targets.append((f0, f1, math.sqrt(0.5)))
+        if refine_outline:
+            targets.append((p0, p1, math.sqrt(2.0) + clearance))
+    # Un anillo que queda con quads malos (hojas finas de una costura junto a
+    # un tramo del contorno sin refinar dejan entre las gruesas bahías más
+    # angostas que el anillo) se rehace con esos tramos refinados como con
+    # refine_outline
+    tangled_near = np.zeros(len(p0), dtype=bool)
+    for _ in range(_TANGLED_RETRIES + 1):
+        extra = [(p0[tangled_near], p1[tangled_near], math.sqrt(2.0) + clearance)] if tangled_near.any() else []
+        lev = _leaf_levels(shape, origin, cell, levels, targets + extra, band)
+        grid, claimed = _grid_loops(lev, levels, origin, cell, p0, p1, hashes, loop_id, clearance)
+        if not len(grid.faces):
+            return grid
+        result, tangled = _rings(grid, claimed, loops, hashes, loop_id, seg_base, corner_angle)
+        if not tangled:
+            return result
+        near = tangled_near.copy()
+        near[_nearest_any(hashes, grid.verts[np.concatenate(tangled)])[1]] = True
+        if np.array_equal(near, tangled_near) or not levels:
+            break
+        tangled_near = near
+    raise ValueError("El borde conforme quedó con quads cóncavos o invertidos: "
+                     "probá con otro tamaño de celda, más holgura o refinar junto al contorno")
+
+def _grid_loops(lev, levels, origin, cell, p0, p1, hashes, loop_id, clearance):
+    """(grilla de hojas dentro del contorno, {lazo de contorno: lazo escalonado})."""
+    keep = _remove_pinches(_inside_leaves(lev, levels, origin, cell, p0, p1, hashes, clearance), lev, levels)
+    # Huecos e islas de la grilla que ningún lazo de contorno reclama (una
+    # hoja gruesa descartada entre hojas finas, celdas sueltas junto a una
+    # ranura) quedarían sin anillo: se rellenan los huecos con las hojas
+    # descartadas de su borde y se quitan las islas, hasta que no quede ninguno
+    fine_origin, step = origin * 3 ** levels, cell / 3 ** levels
+    while True:
+        grid = _leaf_quads(keep, lev, levels, origin, cell)
+        if not len(grid.faces):
+            return grid, {}
+        claimed, holes, islands = _claim_loops(grid, hashes, loop_id)
+        if not (holes or islands):
+            return grid, claimed
+        fill = _cells_beside(holes, grid.verts, fine_origin, step, keep.shape, 1) & ~keep
+        cut = _cells_beside(islands, grid.verts, fine_origin, step, keep.shape, -1) & keep
+        grown = _remove_pinches((keep | _whole_leaves(fill, lev, levels)) & ~_whole_leaves(cut, lev, levels),
+                                lev, levels)
+        if np.array_equal(grown, keep):
+            return grid, claimed
+        keep = grown
+
+def _rings(grid, claimed, loops, hashes, loop_id, seg_base, corner_angle):
+    """(grilla más los anillos de cada lazo reclamado, vértices del borde escalonado en quads malos)."""
+    verts, faces, tangled = [grid.verts], [grid.faces.astype(np.int64)], []
+    n_verts = len(grid.verts)
+    for target, inner in sorted(claimed.items()):
+        allowed = loop_id == target
+        outer, quads, wrong = _ring(inner, grid.verts[inner], loops[target], hashes, allowed,
+                                    seg_base[target], corner_angle, n_verts)
+        verts.append(outer)
+        faces.append(quads)
+        n_verts += len(outer)
+        if len(wrong):
+            tangled.append(inner[wrong])
+    return Fill(np.concatenate(verts), np.concatenate(faces).astype(np.int32)), tangled
+
+def conforming_fill(loops, cell, clearance=0.5, corner_angle=30.0):
+    """Grilla retirada del contorno más un anillo de quads con sus vértices exteriores sobre el contorno.
+
+    clearance: distancia mínima (en celdas) entre la grilla y el contorno.
+    corner_angle: giro (grados) a partir del cual un vértice del contorno es
+    una esquina y se conserva exacto en el anillo.
+    """
+    return adaptive_fill(loops, cell, clearance=clearance, corner_angle=corner_angle)
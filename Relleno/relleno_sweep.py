@@ -0,0 +1,95 @@
+"""Barrido de regresión del relleno sobre patrones de Patronaje.
+
+Rellena la media pieza, el panel completo y el panel con contorno denso
+(densify_outline) barriendo la profundidad del cuello, la profundidad de la
+sisa de la manga y el tamaño de celda (uniforme y con un nivel de
+refinamiento), más casos sorteados con semilla fija, y verifica que cada
+quad del relleno tenga área positiva y sea convexo (giro positivo en los
+cuatro vértices). Los cuellos poco profundos dejan cuñas y dedos angostos
+entre el cuello y el contorno, que el anillo tiene que rodear con escaleras
+y abanicos. Sale con código 1 si algún relleno falla.
+
+Uso:
+    python relleno_sweep.py [--random 150] [--seed 1]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from itertools import product
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(HERE), "Patronaje"))
+
+from patronaje_core import solve_pattern, as_params
+from patronaje_curves import densify_outline_indexed
+from patronaje_panel import mirror_panel, centre_indices
+from relleno_core import outline_loops, plane_axes, adaptive_fill, _quad_cross
+
+MODES = ("mitad", "completo", "denso")
+NECK_DEPTHS_CM = (0.0, 0.5, 1.0, 1.5, 2.0, 3.0, 5.0, 8.0)
+SLEEVE_DEPTHS_CM = (20.0, 26.0, 33.0)
+# (celda base en m, niveles de refinamiento, zona fina en m)
+CELLS = ((0.005, 0, 0.0), (0.01, 0, 0.0), (0.02, 0, 0.0), (0.02, 1, 0.0))
+_RANDOM_RANGES = {"cuello_profundidad_cm": (0.0, 8.0), "cuello_scale_x": (0.8, 1.3), "cuello_scale_y": (0.8, 1.3),
+                  "curve_upper_scale_x": (0.8, 1.2), "curve_upper_scale_y": (0.8, 1.2),
+                  "curve_upper_position_y": (-5.0, 5.0), "curve_internal_position_y": (-5.0, 5.0),
+                  "curve_upper_depth_cm": (20.0, 33.0)}
+_RANDOM_CELLS = CELLS + ((0.03, 1, 0.02),)
+
+def outline(mode, **settings):
+    """Lazos 2D del contorno del patrón en el modo pedido."""
+    half = solve_pattern(as_params(settings))
+    if mode == "mitad":
+        coords, edges = half, [(i, (i + 1) % len(half)) for i in range(len(half))]
+    elif mode == "denso":
+        dense, index = densify_outline_indexed(half, 300, 600, 1.0)
+        coords, edges = mirror_panel(dense, [index[i] for i in centre_indices()])
+    else:
+        coords, edges = mirror_panel(half, centre_indices())
+    coords = np.asarray(coords)
+    u, v, _w = plane_axes(coords)
+    return [coords[loop][:, [u, v]] for loop in outline_loops(edges)]
+
+def check(mode, settings, cell, levels, band):
+    """None si el relleno sale bien; si no, la descripción del problema."""
+    try:
+        fill = adaptive_fill(outline(mode, **settings), cell, levels, None, band, True)
+    except ValueError as e:
+        return str(e)
+    bad = int((_quad_cross(fill.verts[fill.faces]) <= 0.0).any(axis=1).sum())
+    return f"{bad} quads cóncavos o invertidos" if bad else None
+
+def generate_cases(count, seed):
+    """Grilla fija de cuello × manga × celda por modo, y count casos sorteados."""
+    cases = [(mode, {"cuello_profundidad_cm": neck, "curve_upper_depth_cm": sleeve}) + cell
+             for mode, neck, sleeve, cell in product(MODES, NECK_DEPTHS_CM, SLEEVE_DEPTHS_CM, CELLS)]
+    rng = random.Random(seed)
+    for _ in range(count):
+        key = rng.choice(sorted(_RANDOM_RANGES))
+        settings = {key: round(rng.uniform(*_RANDOM_RANGES[key]), 3)}
+        cases.append((rng.choice(MODES), settings) + rng.choice(_RANDOM_CELLS))
+    return cases
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--random", type=int, default=150, help="casos sorteados además de la grilla fija")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    cases = generate_cases(args.random, args.seed)
+    start = time.perf_counter()
+    failed = 0
+    for mode, settings, cell, levels, band in cases:
+        problem = check(mode, settings, cell, levels, band)
+        if problem:
+            failed += 1
+            print(f"FALLA {mode} {settings} celda={cell} niveles={levels} zona={band}: {problem}")
+    print(f"{len(cases) - failed}/{len(cases)} rellenos bien en {time.perf_counter() - start:.1f} s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""Relleno incremental: sólo la franja que tocó un cambio del contorno (sin Blender).
+
+Con la grilla anclada en el origen del patrón, el relleno es local: una celda
+lejos de los tramos que se movieron sale igual, vértice por vértice. Para
+actualizar una malla de relleno ya cargada (con grupos de vértices de Doblar,
+costuras y aristas de Coser):
+
+1. moved_segments compara los tramos guardados (contorno y refinamiento, en el
+   plano del patrón) con los nuevos y devuelve los que están en uno solo, en
+   su posición vieja y nueva.
+2. plan_update empareja los vértices de los dos rellenos por posición
+   (cuantizada a UPDATE_QUANTUM) y las caras por sus vértices. Lo que no
+   cambió conserva su índice; los vértices nuevos ocupan los índices que se
+   liberaron y después van al final; si sobran índices liberados, los
+   vértices de índice más alto pasan a los huecos, así la malla no tiene
+   vértices sueltos. Esos vértices cambian de índice aunque estén lejos de
+   la franja (todo índice >= la cantidad nueva tiene que moverse); para
+   que sean los menos posibles se borran los liberados más altos.
+
+Si algo cambió a más de reach de los tramos movidos (otro tamaño de celda,
+una malla editada a mano) plan_update devuelve None: hay que reconstruir.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from relleno_core import SegmentHash
+
+UPDATE_QUANTUM = 1e-6   # m: posiciones iguales a menos de esto son el mismo vértice
+
+FillUpdate = namedtuple("FillUpdate", "drop_faces freed reused appended add_faces order")
+FillUpdate.__doc__ = """Cambios para pasar del relleno viejo (M vértices) al nuevo, sobre la malla vieja.
+
+Índices "extendidos": 0..M-1 son los vértices viejos, M + k el k-ésimo agregado.
+drop_faces: caras viejas a quitar. freed: vértices viejos que ya no están
+(ordenados); los primeros len(reused) se mueven a new_verts[reused] y el
+resto se borra. appended: vértices nuevos (índices de new_verts) que se
+agregan al final. add_faces: caras nuevas (K, 4) en índices extendidos.
+order: índice final de cada índice extendido (-1 si se borra), o None si
+no cambia ninguno.
+"""
+
+def _rows(values, quantum):
+    """Filas enteras comparables: valores / quantum redondeados."""
+    return np.round(np.asarray(values, dtype=np.float64) / quantum).astype(np.int64)
+
+def _match_rows(a, b):
+    """Para cada fila de a, índice de una fila igual de b (-1 si no hay)."""
+    if not len(a) or not len(b):
+        return np.full(len(a), -1, dtype=np.int64)
+    rows = np.concatenate([a, b])
+    order = np.lexsort(rows.T[::-1])
+    s = rows[order]
+    inv = np.empty(len(rows), dtype=np.int64)
+    inv[order] = np.cumsum(np.r_[True, (s[1:] != s[:-1]).any(axis=1)]) - 1
+    where = np.full(int(inv.max()) + 1, -1, dtype=np.int64)
+    where[inv[len(a):]] = np.arange(len(b))
+    return where[inv[:len(a)]]
+
+def _segment_rows(segments, quantum):
+    """Tramos (K, 2, 2) como filas (K, 4) sin importar el sentido."""
+    q = _rows(segments, quantum).reshape(-1, 2, 2)
+    swap = (q[:, 0, 0] > q[:, 1, 0]) | ((q[:, 0, 0] == q[:, 1, 0]) & (q[:, 0, 1] > q[:, 1, 1]))
+    q[swap] = q[swap, ::-1]
+    return q.reshape(-1, 4)
+
+def moved_segments(old, new, quantum=UPDATE_QUANTUM):
+    """Tramos (K, 2, 2) que están sólo en old o sólo en new (posición vieja y nueva juntas)."""
+    old = np.asarray(old, dtype=np.float64).reshape(-1, 2, 2)
+    new = np.asarray(new, dtype=np.float64).reshape(-1, 2, 2)
+    ko, kn = _segment_rows(old, quantum), _segment_rows(new, quantum)
+    return np.concatenate([old[_match_rows(ko, kn) < 0], new[_match_rows(kn, ko) < 0]])
+
+def near_segments(pts, segments, reach):
+    """Máscara de los puntos (N, 2) a menos de reach de algún tramo (K, 2, 2)."""
+    pts = np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+    if not len(segments) or not len(pts):
+        return np.zeros(len(pts), dtype=bool)
+    dist, _seg, _t = SegmentHash(segments[:, 0], segments[:, 1], reach).nearest(pts)
+    return dist <= reach
+
+def plan_update(old_verts, old_faces, new_verts, new_faces, moved, reach, quantum=UPDATE_QUANTUM):
+    """FillUpdate de old a new (vértices (N, 2) en el plano, quads (F, 4)), o None.
+
+    moved: tramos movidos (moved_segments). Devuelve None si cambió un
+    vértice a más de reach de ellos, o una cara sin ningún vértice a menos
+    de reach, o si dos vértices nuevos caen sobre el mismo viejo.
+    """
+    old_verts = np.asarray(old_verts, dtype=np.float64).reshape(-1, 2)
+    new_verts = np.asarray(new_verts, dtype=np.float64).reshape(-1, 2)
+    old_faces = np.asarray(old_faces, dtype=np.int64).reshape(-1, 4)
+    new_faces = np.asarray(new_faces, dtype=np.int64).reshape(-1, 4)
+    n_old, n_new = len(old_verts), len(new_verts)
+    ko, kn = _rows(old_verts, quantum), _rows(new_verts, quantum)
+    source = _match_rows(kn, ko)                     # vértice viejo de cada nuevo
+    if len(np.unique(source[source >= 0])) != (source >= 0).sum():
+        return None
+    used = np.zeros(n_old, dtype=bool)
+    used[source[source >= 0]] = True
+    freed = np.flatnonzero(~used)
+    fresh = np.flatnonzero(source < 0)
+    if not (near_segments(old_verts[freed], moved, reach).all()
+            and near_segments(new_verts[fresh], moved, reach).all()):
+        return None
+
+    # caras: las nuevas con todos sus vértices viejos se buscan entre las viejas
+    reused = fresh[:len(freed)]
+    appended = fresh[len(freed):]
+    target = source.copy()
+    target[reused] = freed[:len(reused)]
+    target[appended] = n_old + np.arange(len(appended))
+    mapped = target[new_faces]
+    known = (source[new_faces] >= 0).all(axis=1)
+    old_keys, new_keys = np.sort(old_faces, axis=1), np.sort(mapped[known], axis=1)
+    kept = _match_rows(old_keys, new_keys) >= 0
+    drop_faces = np.flatnonzero(~kept)
+    add = np.ones(len(new_faces), dtype=bool)
+    add[np.flatnonzero(known)[_match_rows(new_keys, old_keys) >= 0]] = False
+    near = near_segments(old_verts[old_faces[drop_faces]].reshape(-1, 2), moved, reach)
+    if not near.reshape(-1, 4).any(axis=1).all():
+        return None
+
+    order = None
+    removed = freed[len(reused):]
+    if len(removed):
+        # sobran índices: los vértices del final pasan a los huecos
+        order = np.arange(n_old, dtype=np.int64)
+        order[removed] = -1
+        holes = removed[removed < n_new]
+        tail = np.flatnonzero(order >= n_new)
+        order[tail] = holes
+    return FillUpdate(drop_faces, freed, reused, appended, mapped[add], order)